@@ -0,0 +1,95 @@
+"""
+Created on Mon Oct 19 11:02:15 2026
+
+Activity-based scheduling of edge updates in the graph dissolution loop.
+"""
+
+import numpy as np
+
+
+class activityScheduler:
+    """
+        Classifies edges as active or dormant between time steps.
+        An edge becomes dormant after a full update in which its relative
+        widening and its concentration change are below tolerance. Dormant
+        edges are advanced with the frozen-rate update crack.forward_engine_frozen
+        until their inlet concentration, flow or flow direction changes, or
+        until refresh_every steps have passed since their last full update.
+    """
+
+    def __init__(self, rate_tol=1e-3, conc_tol=1e-3, flow_tol=1e-2, refresh_every=10):
+        #rate_tol: max relative aperture change per step (2*gamma*f*dt/alpha)
+        #conc_tol: max outlet concentration change per step as a fraction of c_eq, also
+        #the inlet concentration change (fraction of c_eq) that re-activates an edge
+        #flow_tol: relative flow change that re-activates an edge
+        #refresh_every: dormant edges get a full update at least every refresh_every steps
+        self.rate_tol = rate_tol
+        self.conc_tol = conc_tol
+        self.flow_tol = flow_tol
+        self.refresh_every = refresh_every
+
+        self.reset()
+
+        return
+
+    def reset(self):
+        #called when the graph topology changes (e.g. after mapper)
+        self.state = {}
+        self.num_active = []
+        self.num_dormant = []
+
+        return
+
+    def edgeKey(self, edge):
+        #edges are directed by flow and can flip between steps
+        return tuple(sorted(edge))
+
+    def startStep(self):
+        self.num_active.append(0)
+        self.num_dormant.append(0)
+
+        return
+
+    def isActive(self, edge, init_c, Q, c_eq):
+        state = self.state.get(self.edgeKey(edge))
+
+        if state is None or not state['dormant']:
+            active = True
+        elif state['direction'] != edge:
+            active = True
+        elif state['since_full'] >= self.refresh_every:
+            active = True
+        elif abs(init_c - state['init_c']) > self.conc_tol*c_eq:
+            active = True
+        elif abs(Q - state['Q']) > self.flow_tol*abs(state['Q']):
+            active = True
+        else:
+            active = False
+
+        if active:
+            self.num_active[-1] += 1
+        else:
+            self.num_dormant[-1] += 1
+            state['since_full'] += 1
+
+        return active
+
+    def update(self, edge, alpha, f, c_out, init_c, Q, c_eq, gamma, dt):
+        #classifies the edge from the full update it just received
+        #alpha, f: profiles of the step, c_out: outlet concentration of the step
+        #(only the current step is used so that it works with any history retention)
+        rate = np.amax(2*gamma*np.abs(f)*dt/alpha)
+        state = self.state.get(self.edgeKey(edge))
+        if state is not None:
+            dc = abs(c_out - state['c_out'])/c_eq
+        else:
+            dc = np.inf
+
+        self.state[self.edgeKey(edge)] = {'direction': edge,
+                                          'init_c': init_c,
+                                          'Q': Q,
+                                          'c_out': c_out,
+                                          'since_full': 0,
+                                          'dormant': rate < self.rate_tol and dc < self.conc_tol}
+
+        return
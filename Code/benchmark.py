@@ -0,0 +1,382 @@
+"""
+Created on Mon Oct 19 23:41:08 2026
+
+Benchmarks of crack and graph dissolution. Every case runs in its own process
+so that peak memory is not carried over between cases.
+
+scaling: wall time and peak memory per phase of synthetic DFNs of increasing
+fracture count
+
+    python benchmark.py scaling --sizes 100 1000 10000 100000 --output scaling.json
+
+regression: a fixed set of scenarios (single crack, bundled DFN, synthetic
+DFN, mapper pass) compared against a stored baseline with tolerances, exits
+with status 1 on a slowdown or memory growth beyond tolerance
+
+    python benchmark.py regression --save-baseline baseline.json
+    python benchmark.py regression --baseline baseline.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import dgd
+import planner
+import processDFN
+import profiling
+import synthDFN
+
+
+def runCase(num_frac, num_years=2, dt=1, num_cells=16, density=0.1, size=30.0,
+            seed=0, budget=16e9):
+    """
+    generates, loads and dissolves one synthetic network of num_frac fractures
+        at constant density (P32) and fracture size, so that the domain grows
+        with num_frac. Edge state and adjacency keep the current step only and
+        the run is refused by the memory planner above budget (bytes).
+        returns {'num_frac', 'phases', 'graphDiss', 'network', 'error'}, phases
+        hold the wall time of every phase and the peak RSS after it
+
+    """
+    prof = profiling.profiler()
+    result = {'num_frac': num_frac, 'phases': {}, 'graphDiss': {}, 'network': {},
+              'error': None}
+
+    def phase(name, start):
+        result['phases'][name] = {'seconds': time.perf_counter() - start,
+                                  'peak_rss_mb': prof.peakMemory()}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = tmp + os.sep
+        try:
+            start = time.perf_counter()
+            side = (num_frac*size**2/density)**(1/3)
+            generator = synthDFN.synthDFN(num_frac, domain=(side, side, side), size=size,
+                                          seed=seed)
+            generator.write(path)
+            phase('generate', start)
+
+            start = time.perf_counter()
+            dfn = processDFN.dfn(path)
+            G = dfn.getGraph()
+            phase('load', start)
+            result['network'] = {'fractures': dfn.getNumPolygons(),
+                                 'nodes': G.number_of_nodes(),
+                                 'edges': G.number_of_edges()}
+
+            start = time.perf_counter()
+            diss = dgd.graph(num_years, dt, dfn)
+            diss.setResolution(num_cells=num_cells)
+            diss.setRetention('current', 'current', 'current', 'current', adjacency='current')
+            diss.setMemoryBudget(budget)
+            diss.setProfiler(sample_spans=())
+            phase('graph init', start)
+
+            start = time.perf_counter()
+            diss.graphDiss()
+            phase('graphDiss', start)
+            result['graphDiss'] = diss.prof.summary()['spans']
+        except (planner.MemoryBudgetError, MemoryError, ValueError) as error:
+            result['error'] = '%s: %s' % (type(error).__name__, str(error).splitlines()[0])
+
+    return result
+
+
+def runScaling(sizes, output=None, **kwargs):
+    # runs every size in a fresh interpreter, returns the list of results
+    results = []
+    for num_frac in sizes:
+        args = ['case', str(num_frac)]
+        for key, value in kwargs.items():
+            args += ['--' + key.replace('_', '-'), str(value)]
+        results.append(runSubprocess(args))
+        print(report([results[-1]]), flush=True)
+
+    if output is not None:
+        with open(output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    return results
+
+
+def report(results):
+    lines = []
+    for result in results:
+        network = result['network']
+        lines.append('%d fractures (%s nodes, %s edges)'
+                     % (result['num_frac'], network.get('nodes', '-'), network.get('edges', '-')))
+        for name, values in result['phases'].items():
+            lines.append('    %-24s %10.3f s %10.1f MB'
+                         % (name, values['seconds'], values['peak_rss_mb'] or 0))
+        for name, values in result['graphDiss'].items():
+            lines.append('        %-20s %10.3f s %6d calls'
+                         % (name, values['total_s'], values['calls']))
+        if result['error'] is not None:
+            lines.append('    stopped: %s' % result['error'])
+
+    return '\n'.join(lines)
+
+
+#### regression scenarios
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data') + os.sep
+
+# default tolerances, relative to the baseline. Phases shorter than
+# min_seconds in the baseline are not compared and times must also grow by
+# more than min_seconds to count (timer noise)
+TOLERANCES = {'time': 0.25, 'memory': 0.20, 'phase': 0.50, 'min_seconds': 0.1}
+
+
+def crackScenario():
+    # single crack, default dc algorithm
+    diss = dgd.crack(2000, 2)
+    diss.setProfiler(sample_spans=())
+    diss.crackDiss(1e3, 0.02, 100, 0.01)
+
+    return diss.prof.summary()['spans']
+
+
+def bundledScenario():
+    # graphDiss on the bundled 54 fracture DFN
+    diss = dgd.graph(20, 1, processDFN.dfn(DATA))
+    diss.setResolution(num_cells=32)
+    diss.setProfiler(sample_spans=())
+    diss.graphDiss()
+
+    return diss.prof.summary()['spans']
+
+
+def syntheticScenario():
+    # graphDiss on a 300 fracture synthetic DFN
+    result = runCase(300, num_years=3)
+    if result['error'] is not None:
+        raise RuntimeError(result['error'])
+    spans = {name: {'total_s': values['seconds'], 'calls': 1}
+             for name, values in result['phases'].items() if name != 'graphDiss'}
+    spans.update(result['graphDiss'])
+
+    return spans
+
+
+def mapperScenario():
+    # mapper re-meshing of the bundled DFN after a short run
+    diss = dgd.graph(2, 1, processDFN.dfn(DATA))
+    diss.setResolution(num_cells=32)
+    diss.graphDiss()
+    diss.setProfiler(sample_spans=())
+    with diss.prof.span('mapper'):
+        diss.runMapperAfter()
+
+    return diss.prof.summary()['spans']
+
+
+SCENARIOS = {'crack': crackScenario,
+             'bundled dfn': bundledScenario,
+             'synthetic dfn': syntheticScenario,
+             'mapper': mapperScenario}
+
+
+def runScenario(name):
+    """
+    runs one scenario in the current process. returns {'name', 'seconds',
+        'peak_rss_mb', 'phases': {span: seconds}, 'skipped', 'error'}, skipped
+        is the reason when an optional dependency of the scenario is missing,
+        error the exception when the scenario failed
+
+    """
+    result = {'name': name, 'seconds': None, 'peak_rss_mb': None, 'phases': {},
+              'skipped': None, 'error': None}
+    start = time.perf_counter()
+    try:
+        spans = SCENARIOS[name]()
+    except ImportError as error:
+        result['skipped'] = '%s: %s' % (type(error).__name__, error)
+        return result
+    except Exception as error:
+        result['error'] = '%s: %s' % (type(error).__name__, error)
+        return result
+    result['seconds'] = time.perf_counter() - start
+    result['peak_rss_mb'] = profiling.profiler().peakMemory()
+    result['phases'] = {span: values['total_s'] for span, values in spans.items()}
+
+    return result
+
+
+def runRegression(names=None):
+    # runs the scenarios in fresh interpreters, returns the list of results
+    results = []
+    for name in names if names is not None else list(SCENARIOS):
+        results.append(runSubprocess(['scenario', name]))
+
+    return results
+
+
+def runSubprocess(args):
+    # runs this script with args and --output, returns the json it writes
+    with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as file:
+        output = file.name
+    try:
+        subprocess.run([sys.executable, os.path.abspath(__file__)] + args
+                       + ['--output', output], check=True)
+        with open(output) as file:
+            result = json.load(file)
+    finally:
+        os.remove(output)
+
+    return result
+
+
+def compare(results, baseline, tolerances=None):
+    """
+    compares results against a baseline (as written by saveBaseline).
+        tolerances default to the ones stored with the baseline.
+        returns the list of regressions as messages
+
+    """
+    tol = dict(TOLERANCES)
+    tol.update(baseline.get('tolerances', {}))
+    if tolerances is not None:
+        tol.update(tolerances)
+    reference = {result['name']: result for result in baseline['results']}
+
+    regressions = []
+    for result in results:
+        base = reference.get(result['name'])
+        if base is None or result['skipped'] is not None or base['skipped'] is not None:
+            continue
+        if result['error'] is not None:
+            if base['error'] is None:
+                regressions.append('%s: failed (%s)' % (result['name'], result['error']))
+            continue
+        checks = [('wall time', result['seconds'], base['seconds'], tol['time'],
+                   tol['min_seconds']),
+                  ('peak RSS', result['peak_rss_mb'], base['peak_rss_mb'], tol['memory'], 0)]
+        for phase, seconds in base['phases'].items():
+            if seconds >= tol['min_seconds'] and phase in result['phases']:
+                checks.append(('phase ' + phase, result['phases'][phase], seconds,
+                               tol['phase'], tol['min_seconds']))
+        for label, value, reference_value, rel_tol, slack in checks:
+            if value is None or reference_value is None:
+                continue
+            if value > reference_value*(1 + rel_tol) and value - reference_value > slack:
+                regressions.append('%s: %s %.3f -> %.3f (+%.0f%%, tolerance %.0f%%)'
+                                   % (result['name'], label, reference_value, value,
+                                      100*(value/reference_value - 1), 100*rel_tol))
+
+    return regressions
+
+
+def saveBaseline(filename, results, tolerances=None):
+    tol = dict(TOLERANCES)
+    if tolerances is not None:
+        tol.update(tolerances)
+    baseline = {'results': results, 'tolerances': tol,
+                'platform': {'python': platform.python_version(),
+                             'machine': platform.machine(),
+                             'system': platform.system()}}
+    with open(filename, 'w') as file:
+        json.dump(baseline, file, indent=2)
+
+    return
+
+
+def regressionReport(results):
+    lines = []
+    for result in results:
+        if result['skipped'] is not None:
+            lines.append('%-16s skipped (%s)' % (result['name'], result['skipped']))
+            continue
+        if result['error'] is not None:
+            lines.append('%-16s failed (%s)' % (result['name'], result['error']))
+            continue
+        lines.append('%-16s %10.3f s %10.1f MB'
+                     % (result['name'], result['seconds'], result['peak_rss_mb'] or 0))
+        for phase, seconds in result['phases'].items():
+            lines.append('    %-24s %10.3f s' % (phase, seconds))
+
+    return '\n'.join(lines)
+
+
+def addCaseArguments(parser):
+    parser.add_argument('--num-years', type=int, default=2)
+    parser.add_argument('--dt', type=int, default=1)
+    parser.add_argument('--num-cells', type=int, default=16)
+    parser.add_argument('--density', type=float, default=0.1, help='P32 [1/m]')
+    parser.add_argument('--size', type=float, default=30.0, help='fracture side length')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--budget', type=float, default=16e9, help='memory budget [bytes]')
+
+    return
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    scaling = commands.add_parser('scaling', help='time and memory per phase for several sizes')
+    scaling.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000, 100000])
+    scaling.add_argument('--output', default=None, help='results .json')
+    addCaseArguments(scaling)
+
+    case = commands.add_parser('case', help='one size (used by scaling)')
+    case.add_argument('num_frac', type=int)
+    case.add_argument('--output', required=True)
+    addCaseArguments(case)
+
+    regression = commands.add_parser('regression', help='compare scenarios to a baseline')
+    regression.add_argument('--scenarios', nargs='+', choices=list(SCENARIOS), default=None)
+    regression.add_argument('--baseline', default=None, help='baseline .json to compare to')
+    regression.add_argument('--save-baseline', default=None, help='write results as baseline')
+    regression.add_argument('--output', default=None, help='results .json')
+    for key, value in TOLERANCES.items():
+        regression.add_argument('--%s-tol' % key.replace('_', '-'), type=float, default=None,
+                                dest=key, help='default %g or the baseline value' % value)
+
+    scenario = commands.add_parser('scenario', help='one scenario (used by regression)')
+    scenario.add_argument('name', choices=list(SCENARIOS))
+    scenario.add_argument('--output', required=True)
+
+    args = vars(parser.parse_args(argv))
+    command = args.pop('command')
+    output = args.pop('output')
+    if command == 'scaling':
+        runScaling(args.pop('sizes'), output, **args)
+    elif command == 'case':
+        result = runCase(**args)
+        with open(output, 'w') as file:
+            json.dump(result, file)
+    elif command == 'scenario':
+        result = runScenario(args['name'])
+        with open(output, 'w') as file:
+            json.dump(result, file)
+    else:
+        tolerances = {key: args[key] for key in TOLERANCES if args[key] is not None}
+        results = runRegression(args['scenarios'])
+        print(regressionReport(results))
+        if output is not None:
+            with open(output, 'w') as file:
+                json.dump(results, file, indent=2)
+        if args['save_baseline'] is not None:
+            saveBaseline(args['save_baseline'], results, tolerances)
+        if args['baseline'] is not None:
+            with open(args['baseline']) as file:
+                baseline = json.load(file)
+            regressions = compare(results, baseline, tolerances)
+            for message in regressions:
+                print('REGRESSION', message)
+            if regressions:
+                sys.exit(1)
+            print('no regression against %s' % args['baseline'])
+
+    return
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,235 @@
+"""
+Created on Mon Oct 19 23:58:41 2026
+
+Binary cache of parsed dfnWorks inputs, so that a DFN is parsed from text once
+and later opened from .npy files with memory mapping.
+"""
+
+import os
+import json
+import hashlib
+
+import numpy as np
+import networkx as nx
+
+
+class dfnCache:
+    """
+        Cache directory of one DFN. Every entry (e.g. 'polygons', 'graph') is a
+        directory of .npy arrays plus meta.json holding the content hash of the
+        source files it was parsed from. An entry is reused while the sources
+        are unchanged: files whose size and modification time match are taken
+        as unchanged, others are hashed again and compared.
+
+        Graphs are stored column-wise: node labels, edge endpoints as node
+        indices and one set of arrays per attribute (see encodeValues).
+    """
+
+    version = 1
+    hash_block = 1 << 24
+
+    def __init__(self, path):
+        self.path = path
+
+        return
+
+    #### source files
+
+    def fileHash(self, filename):
+        digest = hashlib.blake2b(digest_size=20)
+        with open(filename, 'rb') as file:
+            for block in iter(lambda: file.read(self.hash_block), b''):
+                digest.update(block)
+
+        return digest.hexdigest()
+
+    def sourceState(self, sources, known=None):
+        # {file name: [size, mtime_ns, hash]}, hashes of files whose size and
+        # mtime match known are taken from known
+        known = known or {}
+        state = {}
+        for filename in sources:
+            stat = os.stat(filename)
+            name = os.path.basename(filename)
+            old = known.get(name)
+            if old is not None and old[:2] == [stat.st_size, stat.st_mtime_ns]:
+                state[name] = old
+            else:
+                state[name] = [stat.st_size, stat.st_mtime_ns, self.fileHash(filename)]
+
+        return state
+
+    #### entries
+
+    def entryPath(self, entry):
+        return os.path.join(self.path, entry)
+
+    def readMeta(self, entry):
+        try:
+            with open(os.path.join(self.entryPath(entry), 'meta.json')) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def isValid(self, entry, sources):
+        meta = self.readMeta(entry)
+        if meta is None or meta['version'] != self.version:
+            return False
+        state = self.sourceState(sources, meta['sources'])
+        if [value[2] for value in state.values()] != [value[2] for value in meta['sources'].values()]:
+            return False
+        if state != meta['sources']:
+            # touched but unchanged, skip hashing next time
+            meta['sources'] = state
+            self.writeMeta(entry, meta)
+
+        return True
+
+    def writeMeta(self, entry, meta):
+        with open(os.path.join(self.entryPath(entry), 'meta.json'), 'w') as file:
+            json.dump(meta, file)
+
+        return
+
+    def save(self, entry, sources, arrays, info=None):
+        # arrays: {name: array}, info: json serializable extras
+        entry_path = self.entryPath(entry)
+        os.makedirs(entry_path, exist_ok=True)
+        meta_file = os.path.join(entry_path, 'meta.json')
+        if os.path.exists(meta_file):
+            os.remove(meta_file)    # invalid until complete
+        for name, values in arrays.items():
+            np.save(os.path.join(entry_path, name + '.npy'), values)
+        self.writeMeta(entry, {'version': self.version, 'sources': self.sourceState(sources),
+                               'arrays': list(arrays), 'info': info or {}})
+
+        return
+
+    def load(self, entry, mmap=True):
+        # returns ({name: array}, info) of a valid entry
+        meta = self.readMeta(entry)
+        mode = 'r' if mmap else None
+        arrays = {name: np.load(os.path.join(self.entryPath(entry), name + '.npy'), mmap_mode=mode)
+                  for name in meta['arrays']}
+
+        return arrays, meta['info']
+
+    #### graphs
+
+    def saveGraph(self, entry, sources, G):
+        nodes = list(G.nodes)
+        node_idx = {node: i for i, node in enumerate(nodes)}
+        edges = list(G.edges)
+        arrays = {'nodes': np.array(nodes, dtype=str),
+                  'edges': np.array([[node_idx[u], node_idx[v]] for u, v in edges],
+                                    dtype=np.int64).reshape(-1, 2)}
+        info = {'graph': dict(G.graph), 'directed': G.is_directed(),
+                'node_attrs': [], 'edge_attrs': []}
+
+        for kind, items, data in [('node', nodes, G.nodes), ('edge', edges, G.edges)]:
+            names = sorted({name for item in items for name in data[item]})
+            for name in names:
+                values = [data[item].get(name) for item in items]
+                for key, column in self.encodeValues(values).items():
+                    arrays['%s_%s_%s' % (kind, name, key)] = column
+            info[kind + '_attrs'] = names
+
+        self.save(entry, sources, arrays, info)
+
+        return
+
+    def loadGraph(self, entry):
+        arrays, info = self.load(entry)
+        G = nx.DiGraph() if info['directed'] else nx.Graph()
+        G.graph.update(info['graph'])
+
+        nodes = arrays['nodes'].tolist()
+        node_data = [{} for _ in nodes]
+        self.decodeAttrs(arrays, 'node', info['node_attrs'], node_data)
+        G.add_nodes_from(zip(nodes, node_data))
+
+        edges = np.asarray(arrays['edges'])
+        edge_data = [{} for _ in range(len(edges))]
+        self.decodeAttrs(arrays, 'edge', info['edge_attrs'], edge_data)
+        G.add_edges_from((nodes[u], nodes[v], data) for (u, v), data in zip(edges.tolist(), edge_data))
+
+        return G
+
+    def decodeAttrs(self, arrays, kind, names, data):
+        for name in names:
+            prefix = '%s_%s_' % (kind, name)
+            columns = {key[len(prefix):]: value for key, value in arrays.items()
+                       if key.startswith(prefix)}
+            for item, value in zip(data, self.decodeValues(columns)):
+                if value is not None:
+                    item[name] = value
+
+        return
+
+    def encodeValues(self, values):
+        """
+        encodes a list of attribute values (None where missing) as arrays:
+            kind: 0 missing, 1 int, 2 float, 3 str, 4 list
+            number: value of kinds 1, 2
+            str: value of kind 3
+            offsets, item_*: list items of kind 4, encoded in the same way
+
+        """
+        columns = self.encodeScalars(values)
+        items = []
+        offsets = np.zeros(len(values) + 1, dtype=np.int64)
+        for i, value in enumerate(values):
+            if isinstance(value, (list, tuple)):
+                columns['kind'][i] = 4
+                items.extend(value)
+            offsets[i + 1] = len(items)
+        columns['offsets'] = offsets
+        for key, column in self.encodeScalars(items).items():
+            columns['item_' + key] = column
+
+        return columns
+
+    def encodeScalars(self, values):
+        kind = np.zeros(len(values), dtype=np.int8)
+        number = np.zeros(len(values))
+        string = [''] * len(values)
+        for i, value in enumerate(values):
+            if isinstance(value, str):
+                kind[i] = 3
+                string[i] = value
+            elif isinstance(value, (bool, list, tuple)) or value is None:
+                continue
+            elif isinstance(value, (int, np.integer)):
+                kind[i] = 1
+                number[i] = value
+            else:
+                kind[i] = 2
+                number[i] = value
+
+        return {'kind': kind, 'number': number, 'str': np.array(string, dtype=str)}
+
+    def decodeValues(self, columns):
+        values = self.decodeScalars(columns['kind'], columns['number'], columns['str'])
+        items = self.decodeScalars(columns['item_kind'], columns['item_number'], columns['item_str'])
+        offsets = np.asarray(columns['offsets']).tolist()
+        for i, k in enumerate(np.asarray(columns['kind']).tolist()):
+            if k == 4:
+                values[i] = items[offsets[i]:offsets[i + 1]]
+
+        return values
+
+    def decodeScalars(self, kind, number, string):
+        number = np.asarray(number).tolist()
+        string = np.asarray(string).tolist()
+        values = []
+        for i, k in enumerate(np.asarray(kind).tolist()):
+            if k == 1:
+                values.append(int(number[i]))
+            elif k == 2:
+                values.append(number[i])
+            elif k == 3:
+                values.append(string[i])
+            else:
+                values.append(None)
+
+        return values
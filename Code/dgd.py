@@ -12,12 +12,22 @@ import networkx as nx
 import matplotlib.pyplot as plt
 import matplotlib
 from scipy import interpolate
+from scipy import spatial
 import time
 import segment
 import pyvista as pv
 import processDFN
 import utilities
-import sys
+import network
+import activity
+import history
+import snapshot
+import voxel
+import results
+import writer
+import planner
+import profiling
+import events
 from multiprocess import Pool, Process
 from tqdm import tqdm
 
@@ -43,12 +53,42 @@ class crack:
     dc = c_s/inc_1                      # step concentration
     dx = 10**-3                         # space grid increment
     init_c = 0
+    # per crack resolution (see spaceGrid)
+    num_cells = None                    # target cells per crack, None for uniform dx spacing
+    dx_min = 10**-3                     # finest mean spacing of a target cell grid
+    dx_max = None                       # coarsest mean spacing of a target cell grid
+    inlet_grading = 1                   # >1 clusters cells near the inlet
 
     def __init__(self, num_years, dt):
         self.dt = dt
         self.t = np.arange(0, num_years, dt)
         self.t = np.append(self.t, num_years)
         self.time_condStep = round((len(self.t)-1)/10)
+        # phase timings and counters, no-op unless setProfiler is called
+        self.prof = profiling.nullProfiler()
+        # progress and diagnostics go to observers (see addObserver)
+        self.events = events.eventHub()
+
+    def setProfiler(self, enabled=True, sample_spans=('transport',)):
+        # named spans per phase, counters and peak memory samples (see profiling.profiler)
+        if enabled:
+            self.prof = profiling.profiler(sample_spans, self.events.phase)
+        else:
+            self.prof = profiling.nullProfiler()
+
+        return
+
+    def exportProfile(self, filename):
+        # .json or .csv
+        self.prof.export(filename)
+
+        return
+
+    def addObserver(self, obs):
+        # obs: events.observer (e.g. events.progressObserver() for a progress bar)
+        self.events.addObserver(obs)
+
+        return
 
     def calcPerimeter(self, alpha, beta, model):
         # calculates the cross section perimeter across the fracture
@@ -196,28 +236,36 @@ class crack:
 
         return f
 
-    def xGrid_dc(self, f, P, Q, x_ref, L):
+    def xGrid_dc(self, alpha, P, Q, x_ref, L, init_c):
         """
-        calculates the appropriate spacings dx based on fixed dc 
+        calculates the appropriate spacings dx based on fixed dc: marches from
+            the inlet until L or the capped concentration of cGrid_dc is reached,
+            with alpha and P interpolated from the reference grid x_ref, so the
+            spacings do not depend on the resolution of x_ref
 
         """
-        i = 0
-        x = np.zeros(1)
-
-        while (x[i] < L and i < len(x_ref)):
-            #print('test xGrid_dc')
-            # find index of the closest value of predefined x (self.x) to x_dx
-            # in order to calc ~P at x_dc(iter)
-            x_idx = np.argmin(np.abs(x_ref - x[i]))      # closest index
-            dx = Q*self.dc/(f[i]*P[x_idx])
-            x = np.append(x, x[i] + dx)
-            i += 1
-
-        if i == len(x_ref):
-            x = x_ref
-            #print('approximation failed')
-
-        return x
+        # concentration of each step up to the first capped one, as in cGrid_dc
+        num_dc = int(np.ceil((self.c_eq - init_c)/(self.dc + init_c))) + 1
+        c = self.cGrid_dc(np.zeros(max(num_dc, 1)), init_c)
+        # alpha only selects the linear kinetics branch of fGrid_dc
+        f_wide = self.fGrid_dc(c, np.inf)
+        f_narrow = self.fGrid_dc(c, 0)
+
+        # without flow the front collapses to the inlet, dx_min keeps x increasing
+        dx_min = L*1e-12
+        x = [0.0]
+        for i in range(len(c) - 1):
+            f = f_wide[i] if np.interp(x[i], x_ref, alpha) > 0.1 else f_narrow[i]
+            dx = Q*self.dc/(f*np.interp(x[i], x_ref, P))
+            x.append(x[i] + max(dx, dx_min))
+            if x[-1] >= L:
+                break
+
+        # rest of the crack at the capped concentration
+        if x[-1] < L:
+            x.append(L)
+
+        return np.array(x)
 
     def refX_nl(self, x_dc, L):
         """
@@ -258,33 +306,92 @@ class crack:
 
         return grid
 
-    def createGrid(self, L, init_alpha, init_beta):
+    def spaceGrid(self, L, num_cells=None):
+        """
+        spatial grid of a crack of length L. Uniform dx spacing unless a target
+            cell count is given (argument or class attribute num_cells): the 
+            count is then bounded by dx_min/dx_max and cells are graded towards 
+            the inlet, where the concentration gradient is steepest, with
+            x = L*s**inlet_grading for uniform s in [0, 1]
 
-        x, alpha, beta = self.crackGrid(L, init_alpha, init_beta)
-        Q = np.zeros(len(self.t), dtype='float')
-        c = np.ones((len(x), len(self.t)))*self.init_c
-        init_f = self.calcDissRate(init_alpha, self.init_c)
-        f = np.ones_like(c)*init_f
+        """
+        if num_cells is None:
+            num_cells = self.num_cells
+
+        if num_cells is None:
+            x = np.arange(0, L, self.dx)
+            x = np.append(x, L)
+            return x
+
+        n = self.boundCells(L, num_cells)
+        s = np.linspace(0, 1, n + 1)
+        x = L*s**self.inlet_grading
+
+        return x
+
+    def boundCells(self, L, num_cells):
+        # target cell count bounded by dx_min/dx_max
+        n = max(int(num_cells), 1)
+        n = min(n, max(int(np.ceil(L/self.dx_min)), 1))
+        if self.dx_max is not None:
+            n = max(n, int(np.ceil(L/self.dx_max)))
+
+        return n
+
+    def gridSize(self, L, num_cells=None):
+        # len(spaceGrid(L, num_cells)) without building the grid
+        if num_cells is None:
+            num_cells = self.num_cells
+
+        if num_cells is None:
+            return int(np.ceil(L/self.dx)) + 1
+
+        return self.boundCells(L, num_cells) + 1
+
+    def createGrid(self, L, init_alpha, init_beta, num_cells=None, current=(), t0=0):
+
+        x = self.spaceGrid(L, num_cells)
+        grid = self.allocGrid(x, init_alpha, init_beta, current, t0)
+
+        return grid
+
+    def allocGrid(self, x, init_alpha, init_beta, current=(), t0=0):
+        # allocates the edge state from time step t0 on
+        # fields in current keep only the present step (see col), alpha and beta
+        # then hold the present and the next step. init_alpha/init_beta are
+        # scalars or profiles along x
+        num_t = len(self.t) - t0
+        shape = {'alpha': num_t + 1, 'beta': num_t + 1, 'c': num_t, 'f': num_t}
+        for key in current:
+            shape[key] = 2 if key in ['alpha', 'beta'] else 1
+
+        alpha = np.empty((len(x), shape['alpha']))
+        alpha[:] = np.transpose(np.atleast_2d(init_alpha))
+        beta = np.empty((len(x), shape['beta']))
+        beta[:] = np.transpose(np.atleast_2d(init_beta))
+        Q = np.zeros(num_t, dtype='float')
+        c = np.ones((len(x), shape['c']))*self.init_c
+        init_f = self.calcDissRate(alpha[0, 0], self.init_c)
+        f = np.ones((len(x), shape['f']))*init_f
 
         grid = {'Q': Q, 'alpha': alpha, 'beta': beta,
-                'c': c, 'f': f, 'x': x, 't': self.t}
+                'c': c, 'f': f, 'x': x, 't': self.t,
+                'current': tuple(current), 't0': t0}
 
         return grid
 
-    def crackGrid(self, L, init_alpha, init_beta):
+    def crackGrid(self, L, init_alpha, init_beta, num_cells=None):
 
-        x = np.arange(0, L, self.dx)
-        x = np.append(x, L)  # changed
+        x = self.spaceGrid(L, num_cells)
         # creates crack grid
         alpha = np.ones((len(x), len(self.t) + 1))*init_alpha
         beta = np.ones_like(alpha)*init_beta
 
         return x, alpha, beta
 
-    def initCrackGrid(self, L, init_alpha, init_beta):
+    def initCrackGrid(self, L, init_alpha, init_beta, num_cells=None):
 
-        x = np.arange(0, L, self.dx)
-        x = np.append(x, L)  # changed
+        x = self.spaceGrid(L, num_cells)
         # creates spatial dimenstional grid of initial time step
         alpha = np.ones((len(x), 1))*init_alpha
         #alpha = np.ones(len(x))*init_alpha
@@ -303,13 +410,11 @@ class crack:
         init_beta = beta[0]  # changed
         Q = np.zeros(len(self.t), dtype='float')
 
-        c_ref = self.cGrid_dc(x, self.init_c)
-        f_ref = self.fGrid_dc(c_ref, alpha[:, j])
         P = self.calcPerimeter(alpha[:, j], beta[:, j], model)
         R = self.calcR(alpha[:, j], beta[:, j], x, model)
         Q[j] = self.calcFlow(R, Hgrad, L)
 
-        x_dc = self.xGrid_dc(f_ref, P, Q[j], x, L)
+        x_dc = self.xGrid_dc(alpha[:, j], P, Q[j], x, L, self.init_c)
         x_nl = self.refX_nl(x_dc, L)
 
         alpha_approx = np.ones((len(x_nl), len(self.t) + 1))*init_alpha
@@ -330,8 +435,9 @@ class crack:
         P = self.calcPerimeter(grid['alpha'][:, j], grid['beta'][:, j], model)
         #R = self.calcR(grid['alpha'][:, j], grid['beta'][:, j], grid['x'], model)
         grid['Q'][j] = self.calcFlow(R, Hgrad, L)
+        dx = np.diff(grid['x'])
         for i in range(len(grid['x']) - 1):
-            dc = self.dx*P[i]*grid['f'][i, j]/grid['Q'][j]
+            dc = dx[i]*P[i]*grid['f'][i, j]/grid['Q'][j]
             grid['c'][i+1, j] = grid['c'][i, j] + dc
             if grid['c'][i+1, j] >= self.c_eq:
                 grid['c'][i+1, j] = self.c_eq - self.dc
@@ -344,51 +450,161 @@ class crack:
 
         return grid
 
+    def col(self, grid, key, time_step):
+        #column of time_step in grid[key]: fields kept as current state only
+        #(grid['current']) hold the step in column 0, alpha and beta in columns 0 and 1,
+        #full history fields start at the grid time offset grid['t0']
+        if key in grid.get('current', ()):
+            return 0
+        return time_step - grid.get('t0', 0)
+
     def forward_engine_dc(self, grid, L, init_c, R, Hgrad, model, time_step):
         j = time_step
+        ja = self.col(grid, 'alpha', j)
+        jb = self.col(grid, 'beta', j)
+        jc = self.col(grid, 'c', j)
+        jf = self.col(grid, 'f', j)
+        jq = self.col(grid, 'Q', j)
 
-        c_ref = self.cGrid_dc(grid['x'], init_c)
-        f_ref = self.fGrid_dc(c_ref, grid['alpha'][:, j])
-
-        P = self.calcPerimeter(grid['alpha'][:, j], grid['beta'][:, j], model)
+        P = self.calcPerimeter(grid['alpha'][:, ja], grid['beta'][:, jb], model)
         #R = self.calcR(grid['alpha'][:, j], grid['beta'][:, j], grid['x'], model)
-        grid['Q'][j] = self.calcFlow(R, Hgrad, L)
+        grid['Q'][jq] = self.calcFlow(R, Hgrad, L)
 
-        x_dc = self.xGrid_dc(f_ref, P, grid['Q'][j], grid['x'], L)
+        x_dc = self.xGrid_dc(grid['alpha'][:, ja], P, grid['Q'][jq], grid['x'], L, init_c)
         c_dc = self.cGrid_dc(x_dc, init_c)
-        grid['c'][:, j] = np.interp(grid['x'], x_dc, c_dc)
-        grid['f'][:, j] = self.fGrid_dc(grid['c'][:, j], grid['alpha'][:, j])
+        grid['c'][:, jc] = np.interp(grid['x'], x_dc, c_dc)
+        grid['f'][:, jf] = self.fGrid_dc(grid['c'][:, jc], grid['alpha'][:, ja])
 
-        grid['alpha'][:, j+1], grid['beta'][:, j+1] = self.updateCrack(grid['alpha'][:, j],
-                                                                       grid['beta'][:, j],
-                                                                       grid['f'][:, j])
+        grid['alpha'][:, ja+1], grid['beta'][:, jb+1] = self.updateCrack(grid['alpha'][:, ja],
+                                                                         grid['beta'][:, jb],
+                                                                         grid['f'][:, jf])
+
+        return grid
+
+    def forward_engine_frozen(self, grid, L, R, Hgrad, time_step):
+        """
+        advances a dormant edge with its concentration and dissolution rate 
+            profiles frozen at the previous step: the aperture grows linearly 
+            at the frozen rate and only the flow is updated
+
+        """
+        j = time_step
+        ja = self.col(grid, 'alpha', j)
+        jb = self.col(grid, 'beta', j)
+        jc = self.col(grid, 'c', j)
+        jf = self.col(grid, 'f', j)
+
+        grid['Q'][self.col(grid, 'Q', j)] = self.calcFlow(R, Hgrad, L)
+        grid['c'][:, jc] = grid['c'][:, self.col(grid, 'c', j-1)]
+        grid['f'][:, jf] = grid['f'][:, self.col(grid, 'f', j-1)]
+
+        grid['alpha'][:, ja+1], grid['beta'][:, jb+1] = self.updateCrack(grid['alpha'][:, ja],
+                                                                         grid['beta'][:, jb],
+                                                                         grid['f'][:, jf])
+
+        return grid
+
+    def calcExitRate(self, alpha, beta, L, Q, init_c, model):
+        """
+        closed-form outlet undersaturation u = 1 - c/c_eq and dissolution rate
+            of a lumped (uniform aperture) crack: linear kinetics until c_s 
+            is reached, then non-linear kinetics of order n
+
+        """
+        u0 = 1 - init_c/self.c_eq
+        u_s = 1 - self.c_s/self.c_eq
+        if Q <= 0 or u0 <= 0:
+            return 0, 0
+
+        P = self.calcPerimeter(alpha, beta, model)
+        k1 = self.calcDissRate(alpha, 0)            # linear regime f = k1*u
+        if u0 > u_s:
+            x_s = Q*self.c_eq/(P*k1)*np.log(u0/u_s)
+        else:
+            x_s = 0
+
+        if L <= x_s:
+            u_L = u0*np.exp(-P*k1*L/(Q*self.c_eq))
+            f_L = k1*u_L
+        else:
+            u_start = min(u0, u_s)
+            u_L = (u_start**(1-self.n)
+                   + (self.n-1)*P*self.kn*(L-x_s)/(Q*self.c_eq))**(1/(1-self.n))
+            f_L = self.kn*u_L**self.n
+
+        return u_L, f_L
+
+    def calcBreakthroughTime(self, alpha, u_L, f_L):
+        """
+        closed-form breakthrough time of a lumped crack. In the non-linear 
+            regime the outlet widening follows dalpha/dt ~ alpha**m with
+            m = 3n/(n-1), which reaches breakthrough after 
+            T_B = alpha/((m-1)*dalpha/dt). Zero once the outlet is in the 
+            linear regime (already broken through)
+
+        """
+        u_s = 1 - self.c_s/self.c_eq
+        if u_L >= u_s:
+            return 0
+        if f_L <= 0:
+            return np.inf
+        m = 3*self.n/(self.n-1)
+        T_B = alpha/((m-1)*2*self.gamma*f_L)
+
+        return T_B
+
+    def forward_engine_lumped(self, grid, L, init_c, R, Hgrad, model, time_step):
+        """
+        reduced-order engine on a two point (inlet, outlet) grid: the aperture 
+            is lumped to the outlet (bottleneck) value and advanced with the 
+            closed-form power law alpha(t) = alpha*(1 - t/T_B)**(-1/(m-1)).
+            grid['t_break'] returns the breakthrough time estimate
+
+        """
+        j = time_step
+        ja = self.col(grid, 'alpha', j)
+        jb = self.col(grid, 'beta', j)
+        jq = self.col(grid, 'Q', j)
+        alpha = grid['alpha'][0, ja]
+        beta = grid['beta'][0, jb]
+
+        grid['Q'][jq] = self.calcFlow(R, Hgrad, L)
+        u_L, f_L = self.calcExitRate(alpha, beta, L, grid['Q'][jq], init_c, model)
+        grid['c'][:, self.col(grid, 'c', j)] = [init_c, self.c_eq*(1 - u_L)]
+        grid['f'][:, self.col(grid, 'f', j)] = [self.calcDissRate(alpha, init_c), f_L]
+
+        T_B = self.calcBreakthroughTime(alpha, u_L, f_L)
+        m = 3*self.n/(self.n-1)
+        if T_B > self.dt:
+            alpha_next = alpha*(1 - self.dt/T_B)**(-1/(m-1))
+        else:
+            alpha_next = alpha + 2*self.gamma*f_L*self.dt
+
+        grid['alpha'][:, ja+1] = alpha_next
+        grid['beta'][:, jb+1] = beta + (alpha_next - alpha)
+        grid['t_break'] = T_B
 
         return grid
 
     def calcDiss_dx(self, L, init_alpha, init_beta, Hgrad, model):
 
         total_start = time.time()
-        iter_startTime = time.time()
-        time_condition = self.time_condStep
-        duration = 0
-        grid = self.createGrid(L, init_alpha, init_beta)
+        with self.prof.span('grid'):
+            grid = self.createGrid(L, init_alpha, init_beta)
         for j in range(len(self.t)):
-            R = self.calcR(grid['alpha'][:, j], grid['beta']
-                           [:, j], grid['x'], model)
-            grid = self.forward_engine_dx(grid, L, R, Hgrad, model, j)
-
-            if j == time_condition:
-                iter_endTime = time.time()
-                lapse_percent = time_condition/(len(self.t)-1)
-                time_condition += self.time_condStep
-                duration += iter_endTime - iter_startTime
-                print('%.2f percent in %.2f sec' % (lapse_percent,
-                                                    duration))
-                iter_startTime = time.time()
-
-        total_end = time.time()
-        duration = (total_end - total_start)/60
-        print('total duration: %.2f min' % duration)
+            step_start = time.time()
+            with self.prof.span('R'):
+                R = self.calcR(grid['alpha'][:, j], grid['beta']
+                               [:, j], grid['x'], model)
+            with self.prof.span('transport'):
+                grid = self.forward_engine_dx(grid, L, R, Hgrad, model, j)
+            self.prof.count('cells processed', len(grid['x']))
+            self.events.step(j, len(self.t), {'time': self.t[j], 'edges': 1,
+                                              'seconds': time.time() - step_start})
+
+        self.prof.sampleMemory('end')
+        duration = (time.time() - total_start)/60
+        self.events.message('total duration: %.2f min' % duration)
 
         return grid
     
@@ -403,11 +619,17 @@ class crack:
             grid = self.approxGrid(
                 x_full, alpha_full, beta_full, L, Hgrad, model)  # x here is x_
 
-        for j in tqdm(range(len(self.t))):
-            R = self.calcR(grid['alpha'][:, j], grid['beta']
-                           [:, j], grid['x'], model)
-            grid = self.forward_engine_dc(
-                grid, L, self.init_c, R, Hgrad, model, j)
+        for j in range(len(self.t)):
+            step_start = time.time()
+            with self.prof.span('R'):
+                R = self.calcR(grid['alpha'][:, j], grid['beta']
+                               [:, j], grid['x'], model)
+            with self.prof.span('transport'):
+                grid = self.forward_engine_dc(
+                    grid, L, self.init_c, R, Hgrad, model, j)
+            self.prof.count('cells processed', len(grid['x']))
+            self.events.step(j, len(self.t), {'time': self.t[j], 'edges': 1,
+                                              'seconds': time.time() - step_start})
 
         return grid
 
@@ -416,7 +638,14 @@ class crack:
 
 class graph:
 
-    def __init__(self, num_years, dt, G, path):
+    def __init__(self, num_years, dt, G, path=None):
+        # G: networkx graph of the DFN in path, or a processDFN.dfn (then path
+        # is not needed). path: DFN directory or its processDFN.dfn, directories
+        # are loaded through processDFN.loadDFN and shared between graphs
+        if isinstance(G, processDFN.dfn):
+            path = G
+            # the dfn graph may be shared (see processDFN.loadDFN), it is modified here
+            G = G.getGraph().copy()
         self.crack = crack(num_years, dt)
         self.seg = utilities.vecTopoints()
         self.t = self.crack.t
@@ -424,7 +653,11 @@ class graph:
         self.dx = self.crack.dx
 
         self.G = G
+        # fracture -> edges of G, built by graphProcessing
+        self.frac_index = None
         self.processBoundaryNodes()
+        # incidence operator, rebuilt whenever the topology or edge grids change
+        self.net = None
         #self.edge_key = list(self.G.edges)
         #self.node_key = list(self.G.nodes)
 
@@ -433,14 +666,40 @@ class graph:
 
         self.source_pres = 1000
         self.target_pres = 0
-
-        #self.dfn = processDFN.dfn()
-        self.num_frac = processDFN.dfn(path).getNumPolygons()
-        self.domain_size = processDFN.dfn(path).getDomainSize()
+        # additional boundary scenarios solved with the 'base' one (see addScenario)
+        self.scenarios = []
+        # activity scheduler, disabled unless setActivityScheduler is called
+        self.activity = None
+        # reduced-order edges, disabled unless setHybridFidelity is called
+        self.hybrid = None
+        # mapper boundary nodes attach to their nearest mapper node (see setBoundaryAttachment)
+        self.boundary_attach = {'k': 1, 'radius': None}
+        # history kept for the edge fields (see setRetention)
+        self.retention = {'alpha': 'full', 'beta': 'full', 'c': 'full', 'f': 'full'}
+        self.adj_retention = 'full'
+        self.history = history.historyStore()
+        self.epoch = 0
+        # on-disk results written during the run, disabled unless setResultStore is called
+        self.store = None
+        self.writer = None
+        # memory budget checked before allocation, disabled unless setMemoryBudget is called
+        self.memory_budget = None
+        # phase timings and counters, no-op unless setProfiler is called
+        self.prof = profiling.nullProfiler()
+        # progress, warnings and diagnostics go to observers (see addObserver)
+        self.events = events.eventHub()
+
+        network = path if isinstance(path, processDFN.dfn) else processDFN.loadDFN(path, self.events)
+        self.num_frac = network.getNumPolygons()
+        self.domain_size = network.getDomainSize()
 
         # grid video dimensions
         num_points = 50
         self.num_points = num_points + 1
+        # voxel size of the mapper point cloud and its occupancy grid (see setVoxelGrid)
+        self.voxel_size = 1.0
+        self.voxel_tol = None
+        self.voxels = None
         # 7.5# 7.5# 8# 9 #9 #actualy year number and not iteration
         self.mapper_cond_start = 30
         self.mapper_iter = 1000  # 4.5# 4.5# 4 #3 #10000
@@ -455,115 +714,503 @@ class graph:
 
     def calcDiss_dc(self):
 
-        mapper_cond = self.mapper_cond_start  # conduct mapper every 5 time steps
+        mapper_steps = self.getMapperSteps()
 
         self.graph_list = []
-        self.graphGrid()
+        if self.memory_budget is not None:
+            self.planMemory(*self.memory_budget)
+        with self.prof.span('allocation'):
+            self.graphGrid()
         # self.graphApproxGrid()
         ####
-        self.graphProcessing()
+        with self.prof.span('graph processing'):
+            self.graphProcessing()
         ####
-        for t_step in tqdm(range(len(self.t))):
+        try:
+            for t_step in range(len(self.t)):
+                step_start = time.time()
+
+                ##
+                if t_step in mapper_steps:
+                    with self.prof.span('mapper'):
+                        self.graph_list.append(self.takeSnapshot(t_step)) #add previous graph
+                        self.runMapper(t_step)
+                    self.events.mapper(t_step, {'nodes': self.G.number_of_nodes(),
+                                                'edges': self.G.number_of_edges()})
+                ###
 
-            ##
-            if self.t[t_step] == mapper_cond:
-                mapper_cond = mapper_cond + self.mapper_iter
-                self.graph_list.append(self.G) #add previous graph
-                self.runMapper(t_step)
-                print('========= MAPPER RUN =========')
-            ###
-
-            self.calcHgrad(t_step)
-            self.makeDirected()
-            self.getOrderdEdges()
-
-            for edge in self.ordered_edges:
-                init_c = self.getInitC(edge, t_step)
-                grid = self.edgeTogrid(edge)
-                grid = self.crack.forward_engine_dc(grid,
-                                                    self.G.edges[edge]['length'],
-                                                    init_c,
-                                                    1/self.G.edges[edge]['1/R_temp'],
-                                                    self.G.edges[edge]['Hgrad_temp'],
-                                                    self.model, t_step)
-                self.gridToedge(grid, edge)
-                
-        self.graph_list.append(self.G)  # add last graph if using mapper
+                self.calcHgrad(t_step)
+                with self.prof.span('ordering'):
+                    self.makeDirected()
+                    self.getOrderdEdges()
+
+                if self.activity is not None:
+                    self.activity.startStep()
+                with self.prof.span('transport'):
+                    for edge in self.ordered_edges:
+                        grid = self.stepEdge(edge, t_step)
+                        self.commitStep(edge, grid, t_step)
+                self.prof.count('edges processed', len(self.ordered_edges))
+                if self.store is not None:
+                    with self.prof.span('results write'):
+                        self.writeResults(t_step)
+                self.events.step(t_step, len(self.t), {'time': self.t[t_step],
+                                                       'edges': len(self.ordered_edges),
+                                                       'seconds': time.time() - step_start})
+
+            # add last graph if using mapper, self.G keeps views into it
+            self.graph_list.append(self.takeSnapshot(len(self.t), share=True))
+            self.prof.sampleMemory('end')
+        finally:
+            # results written so far are flushed on error as well
+            if self.store is not None:
+                self.closeResults()
 
         return grid
+
+    def setResultStore(self, path, compress=False, time_chunk=64, edge_chunk=256,
+                       fields=('Q', 'alpha', 'beta', 'c', 'f', 'head'), background=True,
+                       max_queue=4):
+        # writes the selected fields of every time step to a chunked store at path
+        # (see results.resultStore), read it back with results.resultStore(path)
+        # background: chunking, compression and file writes run on a writer thread
+        # (see writer.asyncWriter), at most max_queue steps are waiting to be written
+        self.store = results.resultStore(path, 'w', compress, time_chunk, edge_chunk)
+        self.store_fields = list(fields)
+        self.store_edges = {}
+        self.store_background = background
+        self.store_max_queue = max_queue
+
+        return
+
+    def submitWrite(self, func, *args):
+        if self.store_background:
+            if self.writer is None:
+                self.writer = writer.asyncWriter(self.store_max_queue)
+            self.writer.submit(func, *args)
+        else:
+            func(*args)
+
+        return
+
+    def closeResults(self):
+        # flushes the last partial chunks and stops the writer thread
+        # the thread is stopped and the writer reset even if a write failed, the
+        # error of the failed write is raised
+        try:
+            self.submitWrite(self.store.close)
+        except BaseException:
+            if self.writer is not None:
+                self.writer.stop()
+            raise
+        finally:
+            writer_thread = self.writer
+            self.writer = None
+        if writer_thread is not None:
+            writer_thread.close()
+
+        return
+
+    def writeResults(self, t_step):
+        # c, f, Q and head of the step and alpha, beta after it, edges in the order
+        # of the undirected graph at the start of the epoch
+        # arrays are copied here, the writer may run while the next step updates them
+        if self.epoch not in self.store_edges:
+            edges = list(self.getNetwork().edges)
+            self.store_edges[self.epoch] = edges
+            self.submitWrite(self.store.startEpoch, self.epoch, self.G.graph.get('t0', 0),
+                             list(self.G.nodes), edges,
+                             [self.getEdgeData(edge)['x'] for edge in edges])
+
+        edges = self.store_edges[self.epoch]
+        data = [self.getEdgeData(edge) for edge in edges]
+        fields = {}
+        for key in self.store_fields:
+            if key == 'head':
+                j = self.getTimeIndex(t_step)
+                fields[key] = np.array([self.G.nodes[node]['head'][j] for node in self.G.nodes])
+            elif key == 'Q':
+                j = self.getTimeIndex(t_step)
+                fields[key] = np.array([edge_data['Q'][j] for edge_data in data])
+            else:
+                j = self.getCol(key, t_step + 1 if key in ['alpha', 'beta'] else t_step)
+                fields[key] = [edge_data[key][:, j].copy() for edge_data in data]
+        self.submitWrite(self.store.writeStep, self.epoch, t_step, fields,
+                         [edge_data['x'] for edge_data in data])
+
+        return
+
+    def getEdgeData(self, edge):
+        # edge attributes for either orientation of a directed edge
+        u, v = edge
+        if self.G.has_edge(u, v):
+            return self.G.edges[(u, v)]
+        return self.G.edges[(v, u)]
+
+    def takeSnapshot(self, t_end, share=False):
+        # compact copy of the current graph for graph_list, rebuild it with toGraph()
+        # share: at the end of the run, self.G then refers to the snapshot arrays
+        # instead of keeping its own copy (see snapshot.graphSnapshot)
+        return snapshot.graphSnapshot(self.G, t_end, self.currentFields(), self.epoch, share)
     
 
+    def stepEdge(self, edge, t_step):
+        # advances one edge by one time step
+        # reduced edges (setHybridFidelity) get the lumped update and dormant edges
+        # (setActivityScheduler) the frozen-rate update
+        init_c = self.getInitC(edge, t_step)
+        L = self.G.edges[edge]['length']
+        R = 1/self.G.edges[edge]['1/R_temp']
+        Hgrad = self.G.edges[edge]['Hgrad_temp']
+        Q = self.G.edges[edge]['Q_temp']
+
+        if self.hybrid is not None:
+            self.selectFidelity(edge, t_step, init_c)
+        grid = self.edgeTogrid(edge)
+
+        if self.G.edges[edge].get('fidelity') == 'reduced':
+            grid = self.crack.forward_engine_lumped(grid, L, init_c, R, Hgrad, self.model, t_step)
+            if grid['t_break'] < self.hybrid['promote_margin']*self.crack.dt:
+                # near breakthrough: full model from the next step on
+                self.gridToedge(grid, edge)
+                self.promoteEdge(edge)
+                return self.edgeTogrid(edge)
+        elif self.activity is not None and not self.activity.isActive(edge, init_c, Q, self.crack.c_eq):
+            grid = self.crack.forward_engine_frozen(grid, L, R, Hgrad, t_step)
+        else:
+            grid = self.crack.forward_engine_dc(grid, L, init_c, R, Hgrad, self.model, t_step)
+            if self.activity is not None:
+                j = self.getCol('c', t_step)
+                self.activity.update(edge, grid['alpha'][:, self.getCol('alpha', t_step)],
+                                     grid['f'][:, self.getCol('f', t_step)], grid['c'][-1, j],
+                                     init_c, Q, self.crack.c_eq, self.crack.gamma, self.crack.dt)
+        self.gridToedge(grid, edge)
+        self.prof.count('cells processed', len(grid['x']))
+
+        return grid
+
+    def setRetention(self, c='full', f='full', alpha='full', beta='full', adjacency='full'):
+        # history kept for each edge field: 'full' (every time step, default),
+        # 'current' (present step only) or an int k (present step, plus a snapshot
+        # every k time steps in self.history)
+        # adjacency: 'full' or 'current' for the nodes x nodes 1/R, Hgrad and Q arrays
+        # call before graphDiss, edge arrays are sized when the edge state is allocated
+        retention = {'c': c, 'f': f, 'alpha': alpha, 'beta': beta}
+        for key, policy in retention.items():
+            if policy not in ['full', 'current'] and not (isinstance(policy, int) and policy > 0):
+                raise ValueError('retention of %s must be full, current or a positive int' % key)
+        if adjacency not in ['full', 'current']:
+            raise ValueError('retention of adjacency must be full or current')
+        self.retention = retention
+        self.adj_retention = adjacency
+
+        return
+
+    def currentFields(self):
+        # fields whose arrays hold the present step only
+        return tuple(key for key, policy in self.retention.items() if policy != 'full')
+
+    def getTimeWindow(self):
+        # number of time steps stored by the current graph, graphs built by mapper
+        # only allocate the steps from their time offset G.graph['t0'] on
+        return len(self.t) - self.G.graph.get('t0', 0)
+
+    def getTimeIndex(self, t_step):
+        # position of time step t_step in the time axis of the current graph arrays
+        return t_step - self.G.graph.get('t0', 0)
+
+    def getAdjIndex(self, t_step):
+        # position of time step t_step in the adjacency arrays
+        if self.adj_retention == 'current':
+            return 0
+        return self.getTimeIndex(t_step)
+
+    def getCol(self, key, t_step):
+        # column of time step t_step in the edge arrays of key
+        if key in self.currentFields():
+            return 0
+        return self.getTimeIndex(t_step)
+
+    def commitStep(self, edge, grid, t_step):
+        # snapshots of every-k fields, then alpha and beta kept as current state
+        # move the next step into column 0. c and f are recorded at the steps they
+        # are computed (t_step), alpha and beta at the step they are updated to
+        data_key = tuple(sorted(edge))
+        for key in ['c', 'f']:
+            k = self.retention[key]
+            if isinstance(k, int) and t_step % k == 0:
+                self.history.record(key, self.epoch, data_key, t_step, grid[key][:, 0])
+        for key in ['alpha', 'beta']:
+            k = self.retention[key]
+            if isinstance(k, int) and (t_step + 1) % k == 0:
+                self.history.record(key, self.epoch, data_key, t_step + 1, grid[key][:, 1])
+            if k != 'full':
+                grid[key][:, 0] = grid[key][:, 1]
+
+        return
+
+    def setProfiler(self, enabled=True, sample_spans=('transport', 'mapper')):
+        # named spans per phase, counters and peak memory samples (see profiling.profiler)
+        # peak memory is sampled at the end of every sample_spans span
+        if enabled:
+            self.prof = profiling.profiler(sample_spans, self.events.phase)
+        else:
+            self.prof = profiling.nullProfiler()
+        if self.net is not None:
+            self.net.prof = self.prof
+
+        return
+
+    def exportProfile(self, filename):
+        # .json or .csv
+        self.prof.export(filename)
+
+        return
+
+    def __getstate__(self):
+        # Pool.map on bound methods pickles the graph, the writer thread stays here
+        state = self.__dict__.copy()
+        state['writer'] = None
+
+        return state
+
+    def addObserver(self, obs):
+        # obs: events.observer (e.g. events.printObserver() for the former printed
+        # output, events.progressObserver() for the former progress bar)
+        # phase timings are only reported with setProfiler enabled
+        self.events.addObserver(obs)
+
+        return
+
+    def setMemoryBudget(self, budget, auto=False):
+        # graphDiss checks the projected memory (bytes) before allocating and
+        # refuses to start (planner.MemoryBudgetError) or, with auto, switches to
+        # cheaper retention and resolution settings that fit (see planMemory)
+        self.memory_budget = (budget, auto)
+
+        return
+
+    def planMemory(self, budget=None, auto=False):
+        # projected memory of the current settings, printed per array
+        # with a budget the settings are checked and, with auto, replaced
+        mem = planner.memoryPlanner(self.G, self.crack, len(self.scenarios),
+                                    self.getMapperSteps())
+        config = {'retention': self.retention, 'adjacency': self.adj_retention,
+                  'num_cells': self.crack.num_cells}
+        if budget is None:
+            breakdown = mem.estimate(**config)
+        else:
+            config, breakdown = mem.plan(budget, auto=auto, **config)
+            self.setRetention(adjacency=config['adjacency'], **config['retention'])
+            self.crack.num_cells = config['num_cells']
+        self.events.message(mem.report(breakdown))
+
+        return breakdown
+
+    def getMapperSteps(self):
+        # time steps at which calcDiss_dc runs mapper
+        mapper_steps = []
+        mapper_cond = self.mapper_cond_start
+        for t_step in range(len(self.t)):
+            if self.t[t_step] == mapper_cond:
+                mapper_cond = mapper_cond + self.mapper_iter
+                mapper_steps.append(t_step)
+
+        return mapper_steps
+
+    def setResolution(self, num_cells=None, dx_min=None, dx_max=None, inlet_grading=None):
+        # per edge grid resolution instead of the global crack.dx spacing (see crack.spaceGrid)
+        # a 'num_cells' edge attribute overrides num_cells for that edge
+        # call before graphDiss, grids are built when the edge state is allocated
+        self.crack.num_cells = num_cells
+        if dx_min is not None:
+            self.crack.dx_min = dx_min
+        if dx_max is not None:
+            self.crack.dx_max = dx_max
+        if inlet_grading is not None:
+            self.crack.inlet_grading = inlet_grading
+
+        return
+
+    def setActivityScheduler(self, rate_tol=1e-3, conc_tol=1e-3, flow_tol=1e-2, refresh_every=10):
+        # skip full transport updates on edges that barely evolve (see activity.activityScheduler)
+        self.activity = activity.activityScheduler(rate_tol, conc_tol, flow_tol, refresh_every)
+
+        return
+
+    def setHybridFidelity(self, max_length=1.0, max_flow=None, demote_margin=50, promote_margin=5):
+        # reduced-order (lumped) model for short, low-flow or dormant edges
+        # max_length: edges up to this length are candidates
+        # max_flow: edges with Q_temp up to this flow are candidates (None to disable)
+        # dormant edges of the activity scheduler are candidates as well
+        # a candidate is demoted when its breakthrough estimate is beyond demote_margin
+        # time steps and promoted back to the full grid within promote_margin time steps
+        self.hybrid = {'max_length': max_length, 'max_flow': max_flow,
+                       'demote_margin': demote_margin, 'promote_margin': promote_margin}
+
+        return
+
+    def setBoundaryAttachment(self, k=1, radius=None):
+        # after mapper, source and target nodes attach to their k nearest mapper nodes
+        # radius: only neighbours within radius beyond the nearest one are attached
+        self.boundary_attach = {'k': max(int(k), 1), 'radius': radius}
+
+        return
+
+    def setVoxelGrid(self, voxel_size=1.0, tol=None):
+        # voxel size of the mapper point cloud, edges are voxelized again when a
+        # half-width moved by more than tol (default voxel_size) since the last time
+        self.voxel_size = voxel_size
+        self.voxel_tol = tol
+        self.voxels = None
+
+        return
+
+    def selectFidelity(self, edge, t_step, init_c):
+        data = self.G.edges[edge]
+        if data.get('fidelity') == 'reduced':
+            return
+
+        L = data['length']
+        candidate = self.hybrid['max_length'] is not None and L <= self.hybrid['max_length']
+        if self.hybrid['max_flow'] is not None and data['Q_temp'] <= self.hybrid['max_flow']:
+            candidate = True
+        if self.activity is not None:
+            state = self.activity.state.get(self.activity.edgeKey(edge))
+            if state is not None and state['dormant']:
+                candidate = True
+        if not candidate:
+            return
+
+        alpha = np.amin(data['alpha'][:, self.getCol('alpha', t_step)])
+        beta = np.amin(data['beta'][:, self.getCol('beta', t_step)])
+        u_L, f_L = self.crack.calcExitRate(alpha, beta, L, data['Q_temp'], init_c, self.model)
+        T_B = self.crack.calcBreakthroughTime(alpha, u_L, f_L)
+        if T_B > self.hybrid['demote_margin']*self.crack.dt:
+            self.demoteEdge(edge, t_step, alpha, beta)
+
+        return
+
+    def demoteEdge(self, edge, t_step, alpha, beta):
+        # full grid -> two point (inlet, outlet) lumped grid, history is kept at the end points
+        data = self.G.edges[edge]
+        for key in ['alpha', 'beta', 'c', 'f']:
+            data[key] = data[key][[0, -1], :]
+        data['alpha'][:, self.getCol('alpha', t_step):] = alpha
+        data['beta'][:, self.getCol('beta', t_step):] = beta
+        data['x'] = np.array([0, data['length']], dtype=float)
+        data['fidelity'] = 'reduced'
+        self.net = None
+        if self.activity is not None:
+            self.activity.state.pop(self.activity.edgeKey(edge), None)
+
+        return
+
+    def promoteEdge(self, edge):
+        # lumped grid -> full grid, fields are interpolated linearly between inlet and outlet
+        data = self.G.edges[edge]
+        L = data['length']
+        x = self.crack.spaceGrid(L, data.get('num_cells'))
+        s = (x/L)[:, None]
+        for key in ['alpha', 'beta', 'c', 'f']:
+            data[key] = data[key][0, :]*(1 - s) + data[key][1, :]*s
+        data['x'] = x
+        data['fidelity'] = 'full'
+        self.net = None
+        if self.activity is not None:
+            self.activity.state.pop(self.activity.edgeKey(edge), None)
+
+        return
+
     def runMapperAfter(self):
         
         t_step = len(self.t)
-        self.graph_list.append(self.G) #add previous graph
+        G = self.G
+        self.graph_list.append(self.takeSnapshot(t_step, share=True)) #add previous graph
         self.runMapper(t_step)
-        self.graph_list.append(self.G)  #add last graph if using mapper
-        self.G = self.graph_list[0] #sloppy way to have the graph unchanged in the class after mapper
+        self.graph_list.append(self.takeSnapshot(t_step))  #add last graph if using mapper
+        self.G = G #keep the graph unchanged in the class after mapper
 
-        return self.graph_list[1]
+        return self.graph_list[-1].toGraph()
     
     def runMapper(self, t_step):
         # get the point cloud of current time step
-        tic = time.time()
-        pcloud = self.parGetGridVox(t_step)
-        toc = time.time()
-        print('Total PC algorithm done in {:.4f} seconds \n'.format(toc-tic))
-
+        with self.prof.span('mapper point cloud'):
+            pcloud = self.parGetGridVox(t_step)
 
         self.QC = pcloud
         # object instance that runs mapper
-        tic = time.time()
-        mapper = utilities.processMapper(pcloud)
-        mapperGraph = mapper.getGraph()
-        self.M = self.G.copy() #not necessary I think
-        self.G = self.processMapper(mapperGraph)
-        toc = time.time()
-        print('Mapper algorithm done in {:.4f} seconds \n'.format(toc-tic))
-
-        print('after mapper G nodes are: ', len(self.G.nodes))
-        self.mapperGraphGrid()
-        print('after mapper G nodes are: ', list(self.G.nodes))
+        with self.prof.span('mapper clustering'):
+            mapper = utilities.processMapper(pcloud)
+            mapperGraph = mapper.getGraph()
+            self.G = self.processMapper(mapperGraph)
+        # state of the new graph is allocated from the mapper time step on
+        self.G.graph['t0'] = t_step
+        self.net = None
+        self.epoch += 1
+        if self.activity is not None:
+            self.activity.reset()
+
+        self.events.message('after mapper G nodes are: %d' % len(self.G.nodes))
+        with self.prof.span('mapper geometry'):
+            self.mapperGraphGrid()
+        self.events.message('after mapper G nodes are: %s' % list(self.G.nodes))
         if nx.is_connected(self.G) == False:
-            print('MAPPER GRAPH IS NOT CONNECTED!')
-            sys.exit()  # quit()
+            num_components = nx.number_connected_components(self.G)
+            raise events.DisconnectedGraphError('mapper graph at time step %d is not connected '
+                                                '(%d components)' % (t_step, num_components),
+                                                num_components, t_step)
 
         return
 
     def processMapper(self, mapperGraph):
         s_list, t_list = self.findBoundaryNodes()
-        print('source nodes are: ', s_list)
-        print('target nodes are: ', t_list)
+        self.events.message('source nodes are: %s' % s_list)
+        self.events.message('target nodes are: %s' % t_list)
         original_mapper_nodes = list(
             mapperGraph.nodes)  # without boundary nodes
 
         # careful: before mapper it's a list now it's a numpy array
         # mapper graph does not have boundary nodes. here add the nodes to the graph we save their indicies
+        tree = self.getMapperIndex(mapperGraph, original_mapper_nodes)
         mapperGraph.graph['source_idx'] = np.arange(
             len(mapperGraph.nodes), + len(mapperGraph.nodes) + len(s_list))
-        for source_node in s_list:
-            mapperGraph = self.addBoundaryNode(
-                mapperGraph, source_node, original_mapper_nodes)
+        mapperGraph = self.addBoundaryNodes(mapperGraph, s_list, original_mapper_nodes, tree)
 
         mapperGraph.graph['target_idx'] = np.arange(
             len(mapperGraph.nodes), + len(mapperGraph.nodes) + len(t_list))
-        for target_node in t_list:
-            mapperGraph = self.addBoundaryNode(
-                mapperGraph, target_node, original_mapper_nodes)
+        mapperGraph = self.addBoundaryNodes(mapperGraph, t_list, original_mapper_nodes, tree)
+
+        return mapperGraph
+
+    def getMapperIndex(self, mapperGraph, original_mapper_nodes):
+        # kd-tree of the mapper node coordinates, built once per mapper output
+        coords = np.array([mapperGraph.nodes[node]['coords'] for node in original_mapper_nodes],
+                          dtype=float).reshape(-1, 3)
+
+        return spatial.cKDTree(coords)
+
+    def addBoundaryNodes(self, mapperGraph, boundary_nodes, original_mapper_nodes, tree):
+        # all boundary nodes are looked up in one batched query
+        boundary_coords = np.array([self.getCoords(node) for node in boundary_nodes]).reshape(-1, 3)
+        neighbours = self.findClosestNodes(boundary_coords, original_mapper_nodes, tree)
+        for boundary_node, coords, closest in zip(boundary_nodes, boundary_coords, neighbours):
+            mapperGraph = self.addBoundaryNode(mapperGraph, boundary_node, coords, closest)
 
         return mapperGraph
 
-    def addBoundaryNode(self, mapperGraph, boundary_node, original_mapper_nodes):
-        closest_node, length, boundary_Coords = self.findClosestNode(
-            boundary_node, mapperGraph, original_mapper_nodes)
+    def addBoundaryNode(self, mapperGraph, boundary_node, boundary_Coords, closest):
+        # closest: [(mapper node, length)] sorted by length, the first one gives the properties
+        closest_node = closest[0][0]
 
         # this is a new node with no properties
         # change name so that when added to graph it will definitely be added because it's unique. Is there a problem if it's not a number? I don't think so.
         boundary_node = boundary_node + '111' #previously 'b' but had to change cause of karstnet
         mapperGraph.add_node(boundary_node)
-        mapperGraph.add_edge(boundary_node, closest_node)
+        for node, length in closest:
+            mapperGraph.add_edge(boundary_node, node)
+            mapperGraph.edges[(boundary_node, node)]['length'] = length
 
-        mapperGraph.edges[(boundary_node, closest_node)]['length'] = length
         mapperGraph.nodes[boundary_node]['alpha'] = mapperGraph.nodes[closest_node]['alpha']
         mapperGraph.nodes[boundary_node]['beta'] = mapperGraph.nodes[closest_node]['beta']
         mapperGraph.nodes[boundary_node]['coords'] = boundary_Coords
@@ -586,19 +1233,22 @@ class graph:
 
         return source_node_list, target_node_list
 
-    def findClosestNode(self, boundary_node, mapperGraph, original_mapper_nodes):
-        boundary_coords = self.getCoords(boundary_node)
-        #node_list = list(mapperGraph.nodes)
-        dist = []
-        for node in original_mapper_nodes:
-            dist.append(np.linalg.norm(boundary_coords -
-                        mapperGraph.nodes[node]['coords']))
+    def findClosestNodes(self, boundary_coords, original_mapper_nodes, tree):
+        # [(mapper node, length)] of every boundary point: its nearest mapper node
+        # plus the next k - 1 nearest within the attachment radius
+        k = min(self.boundary_attach['k'], len(original_mapper_nodes))
+        radius = self.boundary_attach['radius']
+        if len(boundary_coords) == 0:
+            return []
+        dist, idx = tree.query(boundary_coords, k=k)
+        dist, idx = dist.reshape(len(boundary_coords), -1), idx.reshape(len(boundary_coords), -1)
 
-        length = min(dist)
-        idx_min = dist.index(length)
-        closest_node = original_mapper_nodes[idx_min]
+        closest = []
+        for row_dist, row_idx in zip(dist.tolist(), idx.tolist()):
+            closest.append([(original_mapper_nodes[i], d) for j, (d, i) in enumerate(zip(row_dist, row_idx))
+                            if j == 0 or radius is None or d <= radius])
 
-        return closest_node, length, boundary_coords
+        return closest
 
     def getCoords(self, node):
         coords = np.zeros((3,))
@@ -609,6 +1259,7 @@ class graph:
         return coords
 
     def mapperGraphGrid(self):
+        self.net = None
         self.initNodeAttributes()
         self.initGraphAttributes()
         self.mapperEdgeAttributes()
@@ -623,21 +1274,15 @@ class graph:
 
     def getMapperGrid(self, edge):
         x, alpha, beta = self.getMapperGeometry(edge)
-        Q = np.zeros(len(self.t), dtype='float')
-        c = np.ones((len(x), len(self.t)))*self.init_c
-        init_f = self.crack.calcDissRate(alpha[0, 0], self.init_c)
-        #init_f = self.fGrid_dc(c, alpha[:, 0])
-        f = np.ones_like(c)*init_f
-
-        grid = {'Q': Q, 'alpha': alpha, 'beta': beta,
-                'c': c, 'f': f, 'x': x, 't': self.t}
+        grid = self.crack.allocGrid(x, alpha, beta, self.currentFields(),
+                                    self.G.graph.get('t0', 0))
 
         return grid
 
     def getMapperGeometry(self, edge):
+        # returns the grid and the initial alpha and beta profiles along it
         L = self.G.edges[edge]['length']
-        x = np.arange(0, L, self.dx)
-        x = np.append(x, L)
+        x = self.crack.spaceGrid(L, self.G.edges[edge].get('num_cells'))
 
         node_start = edge[0]
         alpha_start = self.G.nodes[node_start]['alpha']
@@ -655,25 +1300,17 @@ class graph:
         if alpha_start > alpha_end:
             alpha_interp = np.interp(x, x_at_nodes, alpha_at_nodes)
         else:
-            alpha_interp = alpha_start
+            alpha_interp = alpha_start*np.ones(len(x))
 
         if beta_start > beta_end:
             beta_interp = np.interp(x, x_at_nodes, beta_at_nodes)
         else:
-            beta_interp = beta_start
+            beta_interp = beta_start*np.ones(len(x))
 
         #alpha_interp = np.interp(x, x_at_nodes, alpha_at_nodes)
         #beta_interp = np.interp(x, x_at_nodes, beta_at_nodes)
 
-        alpha = np.ones((len(x), len(self.t) + 1))
-        alpha = np.transpose(alpha)*alpha_interp
-        alpha = np.transpose(alpha)
-
-        beta = np.ones_like(alpha)
-        beta = np.transpose(beta)*beta_interp
-        beta = np.transpose(beta)
-
-        return x, alpha, beta
+        return x, alpha_interp, beta_interp
 
 
     def graphProcessing(self):
@@ -681,86 +1318,29 @@ class graph:
         # checks if graph is connected after processing
 
         # collect all edges on each fracture polygon
-        self.calcHgrad(0)
-        self.makeDirected()
+        self.frac_index = processDFN.fractureIndex(self.G)
         frac_list = self.getEdgesOnSameFrac()
         redundant_edges = self.getRedundantEdges(frac_list)
         self.removeEdges(redundant_edges)
-        self.G = self.G.to_undirected()
         # check if graph is connected
         if nx.is_connected(self.G) == False:
-            print('processed graph is not connected')
+            self.events.warning('processed graph is not connected')
 
         return
     
     def removeEdges(self, edges_list):
         for edge in edges_list:
-            self.G.remove_edge(edge[0], edge[1])
+            self.frac_index.removeEdge(self.G, edge)
 
         return
 
     def getRedundantEdges(self, frac_list):
-        redundant_lst = []
-        # loop fractures polygons
-        for frac in range(len(frac_list)):
-            edge_list = frac_list[frac]
-            init_nodes = self.getInitialNodes(edge_list)
-
-            # list of list: y-axis init nodes, x-axis edges starting with init nodes
-            sorted_edges_by_nodes = []
-            # loop over unique initial nodes of all edges along each fracture
-            for node in init_nodes:
-                lst = []  # list of edges with similar init_node ID
-                # loop edges along each fracture
-                for edge in edge_list:
-                    if edge[0] == node:
-                        lst.append(edge)
-                sorted_edges_by_nodes.append(lst)
-
-            redundant_lst.extend(
-                self.getRedundantEdgesForEachFrac(sorted_edges_by_nodes))
-
-        return redundant_lst
-
-    def getRedundantEdgesForEachFrac(self, sorted_edges_by_nodes):
-        redundant_lst = []
-        for edge_list in sorted_edges_by_nodes:
-            edge_lengths = []
-            for edge in edge_list:
-                edge_lengths.append(self.G.edges[edge]['length'])
-            min_length = min(edge_lengths)
-            idx_min = edge_lengths.index(min_length)
-            edge_list.pop(idx_min)
-            redundant_lst.extend(edge_list)
-
-        return redundant_lst
-
-    def getInitialNodes(self, edge_list):
-        # return unique initial nodes of a given edge list
-        init_nodes = []
-        for edge in edge_list:
-            init_nodes.append(edge[0])
-        # remove any duplicates
-        init_nodes = set(init_nodes)
-        init_nodes = list(init_nodes)
-
-        return init_nodes
+        # edges spanning other intersections of their fracture (see processDFN.overlapEdges)
+        return processDFN.overlapEdges(self.G, frac_list)
 
     def getEdgesOnSameFrac(self):
-        # returns list of lists: each list is a fracture polygon and it contains a list of all edges in that fracture
-        # edges here are directed
-        frac_list = []
-        frac = 1
-        while frac <= self.num_frac:
-            edge_list = []
-            for edge in list(self.G.edges):
-                if self.G.edges[edge]['frac'] == frac:
-                    edge_list.append(edge)
-            if len(edge_list) > 1:  # why
-                frac_list.append(edge_list)
-            frac = frac + 1
-            #print('test get')
-        return frac_list
+        # returns list of lists: each list is a fracture polygon with more than one edge and it contains a list of all edges in that fracture
+        return self.frac_index.getFracList()
 
     #######
 
@@ -773,6 +1353,8 @@ class graph:
         grid['beta'] = self.G.edges[key]['beta']
         grid['x'] = self.G.edges[key]['x']
         grid['t'] = self.t
+        grid['current'] = self.currentFields()
+        grid['t0'] = self.G.graph.get('t0', 0)
 
         return grid
 
@@ -788,6 +1370,7 @@ class graph:
         return
 
     def graphGrid(self):
+        self.net = None
         self.initNodeAttributes()
         self.initGraphAttributes()
         self.initEdgeAttributes()
@@ -803,21 +1386,35 @@ class graph:
         idx_t = 0
         self.calcHgrad(idx_t)
         self.setApproxGrid()
+        self.net = None
 
         return
 
     def calcHgrad(self, idx_t):
 
-        self.G = self.G.to_undirected()
-        self.setRtoEdge(idx_t)
-        self.setRtoGraph(idx_t)
+        self.G = self.toUndirected()
+        with self.prof.span('R'):
+            self.setRtoEdge(idx_t)
+            self.setRtoGraph(idx_t)
         self.setHeadtoNode(idx_t)
-        self.setHgradtoEdge(idx_t)
-        self.setHgradToGraph(idx_t)
-        self.setQtoGraph(idx_t)
+        with self.prof.span('gradients'):
+            self.setHgradtoEdge(idx_t)
+            self.setHgradToGraph(idx_t)
+            self.setQtoGraph(idx_t)
 
         return
 
+    def toUndirected(self):
+        # same as G.to_undirected() but the node and edge arrays are shared
+        # instead of deep copied every time step
+        G = nx.Graph()
+        G.graph.update(self.G.graph)
+        G.add_nodes_from((node, data.copy()) for node, data in self.G.nodes.items())
+        G.add_edges_from((u, v, data.copy()) for u, nbrs in self.G.adj.items()
+                         for v, data in nbrs.items())
+
+        return G
+
     def setApproxGrid(self):
         for key in list(self.G.edges):
             L = self.G.edges[key]['length']
@@ -833,15 +1430,17 @@ class graph:
 
     def initNodeAttributes(self):
         for key in list(self.G.nodes):
-            self.G.nodes[key]['head'] = np.zeros(len(self.t))
+            self.G.nodes[key]['head'] = np.zeros(self.getTimeWindow())
         return
 
     def initGraphAttributes(self):
         shape = (self.G.number_of_nodes(),
-                 self.G.number_of_nodes(), len(self.t))
+                 self.G.number_of_nodes(),
+                 self.getTimeWindow() if self.adj_retention == 'full' else 1)
         self.G.graph['1/R_adj'] = np.zeros(shape, dtype=float)
         self.G.graph['Hgrad_adj'] = np.zeros(shape, dtype=float)
         self.G.graph['Q_adj'] = np.zeros(shape, dtype=float)
+        self.G.graph['scenario_head'] = {}
 
         return
 
@@ -851,7 +1450,9 @@ class graph:
             L = self.G.edges[key]['length']
             init_alpha = self.G.edges[key]['alpha']
             init_beta = self.G.edges[key]['beta']
-            grid = self.crack.createGrid(L, init_alpha, init_beta)
+            grid = self.crack.createGrid(L, init_alpha, init_beta,
+                                         self.G.edges[key].get('num_cells'),
+                                         self.currentFields(), self.G.graph.get('t0', 0))
             self.gridToedge(grid, key)
 
         return
@@ -865,41 +1466,139 @@ class graph:
 
             (self.G.edges[key]['x'],
              self.G.edges[key]['alpha'],
-             self.G.edges[key]['beta']) = self.crack.initCrackGrid(L, init_alpha, init_beta)
+             self.G.edges[key]['beta']) = self.crack.initCrackGrid(L, init_alpha, init_beta,
+                                                                   self.G.edges[key].get('num_cells'))
 
         return
 
+    def getNetwork(self):
+        # incidence operator is built once per topology and reused every time step
+        if self.net is None or not self.net.matches(self.G):
+            self.net = network.networkOperator(self.G, self.crack, self.model)
+            self.net.prof = self.prof
+
+        return self.net
+
     def setRtoEdge(self, t_step):
         # R needs to be computed but not saved (for now I save for QC)
-        for key in list(self.G.edges):
-            self.G.edges[key]['1/R_temp'] = 1 / self.crack.calcR(self.G.edges[key]['alpha'][:, t_step],
-                                                                 self.G.edges[key]['beta'][:, t_step],
-                                                                 self.G.edges[key]['x'],
-                                                                 self.model)
+        net = self.getNetwork()
+        alpha = net.gatherColumn(self.G, 'alpha', self.getCol('alpha', t_step))
+        beta = net.gatherColumn(self.G, 'beta', self.getCol('beta', t_step))
+        self.edge_Rinv = net.calcConductance(alpha, beta)
+        for i, key in enumerate(net.edges):
+            self.G.edges[key]['1/R_temp'] = self.edge_Rinv[i]
         return
 
     def setRtoGraph(self, idx_t):
         # R needs to be computed but not saved (for now I save for QC)
-        self.G.graph['1/R_adj'][:, :,
-                                idx_t] = nx.to_numpy_array(self.G, weight='1/R_temp')
+        self.G.graph['1/R_adj'][:, :, self.getAdjIndex(idx_t)] = self.net.toAdjacency(self.edge_Rinv)
 
         return
 
     def setHeadtoNode(self, idx_t):
-        # calculate laplacian
-        adjW = self.G.graph['1/R_adj'][:, :, idx_t]
-        lapG = self.calcLaplacian(adjW)
-        # calculate head
-        self.head = self.calcHead(lapG)
+        # solve all boundary scenarios against one factorization of the Laplacian
+        # assembled from the same incidence operator used for R
+        heads = self.net.solveHeads(self.edge_Rinv, self.getScenarios())
+        # 'base' scenario (source_pres, target_pres) drives the dissolution
+        self.head = heads['base']
+        self.setScenarioHeads(heads, idx_t)
         # adds pressure/head attribute to nodes
         # unnecessary step (can directly go to addedgeattribute), but I wanted to save pressures too
+        j = self.getTimeIndex(idx_t)
         counter = 0
         for key in list(self.G.nodes):
-            self.G.nodes[key]['head'][idx_t] = self.head[counter]
+            self.G.nodes[key]['head'][j] = self.head[counter]
             counter += 1
 
         return
 
+    def addScenario(self, name, source_pres=None, target_pres=None, swap=False, fixed=None):
+        # adds a hydraulic boundary scenario solved alongside 'base' every time step
+        # source_pres/target_pres default to the graph pressures
+        # swap exchanges the source and target boundary node sets
+        # fixed: {node label: head} of additional Dirichlet nodes. Labels refer to the
+        # current graph and are not carried through mapper re-meshing
+        if name == 'base' or name in [scenario['name'] for scenario in self.scenarios]:
+            raise ValueError('scenario %s already exists' % name)
+
+        scenario = {'name': name, 'source_pres': source_pres, 'target_pres': target_pres,
+                    'swap': swap, 'fixed': fixed if fixed is not None else {}}
+        self.scenarios.append(scenario)
+
+        return scenario
+
+    def getScenarios(self):
+        # resolves the base scenario and all added scenarios into Dirichlet node sets
+        base = {'name': 'base', 'source_pres': None, 'target_pres': None,
+                'swap': False, 'fixed': {}}
+        resolved = [self.resolveScenario(scenario) for scenario in [base] + self.scenarios]
+
+        return resolved
+
+    def resolveScenario(self, scenario):
+        # keys missing from a hand-built scenario dict take the addScenario defaults
+        source_idx = self.G.graph['source_idx']
+        target_idx = self.G.graph['target_idx']
+        if scenario.get('swap', False):
+            source_idx, target_idx = target_idx, source_idx
+
+        source_pres = scenario.get('source_pres')
+        target_pres = scenario.get('target_pres')
+        if source_pres is None:
+            source_pres = self.source_pres
+        if target_pres is None:
+            target_pres = self.target_pres
+
+        # same precedence as processInversion: source overrides target
+        dirichlet = {}
+        for idx in target_idx:
+            dirichlet[int(idx)] = target_pres
+        for idx in source_idx:
+            dirichlet[int(idx)] = source_pres
+
+        node_idx = self.getNetwork().node_idx
+        for node, value in scenario.get('fixed', {}).items():
+            if node not in node_idx:
+                raise ValueError('scenario %s: node %s is not in the graph' % (scenario['name'], node))
+            dirichlet[node_idx[node]] = value
+
+        return {'name': scenario['name'], 'dirichlet': dirichlet}
+
+    def setScenarioHeads(self, heads, idx_t):
+        # per scenario head history, nodes x time
+        # 'base' is already kept as the node 'head' attribute
+        scenario_head = self.G.graph.setdefault('scenario_head', {})
+        for name, head in heads.items():
+            if name == 'base':
+                continue
+            if name not in scenario_head:
+                scenario_head[name] = np.zeros((self.G.number_of_nodes(), self.getTimeWindow()))
+            scenario_head[name][:, self.getTimeIndex(idx_t)] = head
+
+        return
+
+    def solveScenarios(self, idx_t, scenarios=None):
+        # solves a block of boundary scenarios on the graph state at idx_t without
+        # stepping the dissolution (e.g. after graphDiss for scenario studies)
+        # scenarios: list of scenario dicts as returned by addScenario, or dicts with
+        # 'name' and any of its keyword arguments, default all added scenarios
+        if scenarios is None:
+            scenarios = [self.resolveScenario(scenario) for scenario in self.scenarios]
+        else:
+            scenarios = [self.resolveScenario(scenario) for scenario in scenarios]
+
+        # with current only retention idx_t has to be the present step
+        G = self.G.to_undirected(as_view=True)
+        net = self.getNetwork()
+        alpha = net.gatherColumn(G, 'alpha', self.getCol('alpha', idx_t))
+        beta = net.gatherColumn(G, 'beta', self.getCol('beta', idx_t))
+        k = net.calcConductance(alpha, beta)
+
+        heads = net.solveHeads(k, scenarios)
+        flows = {name: net.calcFlow(k, head) for name, head in heads.items()}
+
+        return heads, flows
+
     def calcHead(self, lapG):
         # calculates head
 
@@ -913,34 +1612,26 @@ class graph:
     # change graph to directed
     # think about direction and consequences later
     def setHgradtoEdge(self, idx_t):
+        # gradients and flows for all edges as B·h products
+        self.edge_Hgrad, order = self.net.calcHgrad(self.head)
+        # delete this after QC...calculating Q twice (temp and in engine, otherwise when doing 1 step with engine allocate in temp and do 1 redundant step in initializing grid. Either way this in this place needs ot be delted)
+        self.edge_Q = self.net.calcFlow(self.edge_Rinv, self.head)
         for key in list(self.G.edges):
-            start_node = key[0]
-            end_node = key[1]
-            head1 = self.G.nodes[start_node]['head'][idx_t]
-            head2 = self.G.nodes[end_node]['head'][idx_t]
-            #Hgrad = head1 - head2
-            Hgrad = (head1 - head2)/self.G.edges[key]['length']
-            self.G.edges[key]['Hgrad_temp'] = abs(Hgrad)
-            # delete this after QC...calculating Q twice (temp and in engine, otherwise when doing 1 step with engine allocate in temp and do 1 redundant step in initializing grid. Either way this in this place needs ot be delted)
-            self.G.edges[key]['Q_temp'] = self.crack.calcFlow(1/self.G.edges[key]['1/R_temp'],
-                                                              self.G.edges[key]['Hgrad_temp'],
-                                                              self.G.edges[key]['length'])
-            if head2 < head1:
-                self.G.edges[key]['order'] = True
-            else:
-                self.G.edges[key]['order'] = False
+            # order is relative to the orientation of key in the current graph
+            i = self.net.edge_idx[key]
+            self.G.edges[key]['Hgrad_temp'] = self.edge_Hgrad[i]
+            self.G.edges[key]['Q_temp'] = self.edge_Q[i]
+            self.G.edges[key]['order'] = bool(order[i]) != self.net.isFlipped(key)
         return
 
     def setHgradToGraph(self, idx_t):
-        self.G.graph['Hgrad_adj'][:, :, idx_t] = nx.to_numpy_array(
-            self.G, weight='Hgrad_temp')
+        self.G.graph['Hgrad_adj'][:, :, self.getAdjIndex(idx_t)] = self.net.toAdjacency(self.edge_Hgrad)
 
         return
 
     def setQtoGraph(self, idx_t):
         # R needs to be computed but not saved (for now I save for QC)
-        self.G.graph['Q_adj'][:, :, idx_t] = nx.to_numpy_array(
-            self.G, weight='Q_temp')
+        self.G.graph['Q_adj'][:, :, self.getAdjIndex(idx_t)] = self.net.toAdjacency(self.edge_Q)
 
         return
 
@@ -997,15 +1688,23 @@ class graph:
 
     def makeDirected(self):
         # directs graph based on pressure differences for concentration accumulation purposes (for flow is unnecesary)
-        G_dir = self.G.to_directed()
         # loop based on G which has order information before direction
+        kept = set()
         for key in list(self.G.edges):
-            reversed_key = key[::-1]
             if self.G.edges[key]['order'] == True:
-                G_dir.remove_edge(*reversed_key)
+                kept.add(key)
             else:
-                G_dir.remove_edge(*key)
-                G_dir.edges[reversed_key]['order'] = True
+                kept.add(key[::-1])
+
+        # same edge order as to_directed followed by removing the upstream copies,
+        # edge arrays are shared instead of deep copied
+        G_dir = nx.DiGraph()
+        G_dir.graph.update(self.G.graph)
+        G_dir.add_nodes_from((node, data.copy()) for node, data in self.G.nodes.items())
+        G_dir.add_edges_from((u, v, data.copy()) for u, nbrs in self.G.adj.items()
+                             for v, data in nbrs.items() if (u, v) in kept)
+        for key in kept:
+            G_dir.edges[key]['order'] = True
         self.G = G_dir
 
         return
@@ -1019,6 +1718,10 @@ class graph:
         node_list = list(self.G.nodes)
         source_idx = self.G.graph['source_idx']
         source_nodes = [node_list[idx] for idx in source_idx]
+        # nodes without inflow (e.g. local head maxima) also start a chain
+        source_set = set(source_nodes)
+        source_nodes += [node for node in node_list
+                         if node not in source_set and self.G.in_degree(node) == 0]
         ordered_edges = list(self.G.edges(source_nodes))
         edges = ordered_edges.copy()
         fail_nodes = []
@@ -1027,8 +1730,7 @@ class graph:
             # get next nodes
             next_nodes = self.getEndNodeFromEdges(edges)
             if type(fail_nodes) == str:
-                print('fail_nodes are:', fail_nodes)
-                print('type fail nodes', type(fail_nodes))
+                self.events.message('fail_nodes are: %s (%s)' % (fail_nodes, type(fail_nodes)))
                 next_nodes.append(fail_nodes)
             else:
                 next_nodes.extend(fail_nodes)
@@ -1055,8 +1757,7 @@ class graph:
         pass_nodes = []
         fail_nodes = []
         if type(next_nodes) == str:
-            print('next_nodes are:', fail_nodes)
-            print('type next nodes', type(fail_nodes))
+            self.events.message('next_nodes are: %s (%s)' % (next_nodes, type(next_nodes)))
             incoming_edges = self.G.in_edges(next_nodes)
             if set(incoming_edges).issubset(ordered_edges):
                 pass_nodes.append(next_nodes)
@@ -1087,7 +1788,8 @@ class graph:
         out_edges = list(self.G.out_edges(start_node))
 
         # calculate total concentration into node
-        c_list = [self.G.edges[key]['c'][-1, idx_t] for key in in_edges]
+        j = self.getCol('c', idx_t)
+        c_list = [self.G.edges[key]['c'][-1, j] for key in in_edges]
         total_c = sum(c_list)
 
         # calculate fraction of concentration going into edge
@@ -1095,7 +1797,8 @@ class graph:
         flow_list = [self.G.edges[key]['Q_temp'] for key in out_edges]
         total_flow = sum(flow_list)
         edge_flow = self.G.edges[edge]['Q_temp']
-        frac = edge_flow/total_flow
+        # stagnant junction, no flow leaves the node
+        frac = edge_flow/total_flow if total_flow > 0 else 0
 
         init_c = frac*total_c
 
@@ -1125,7 +1828,7 @@ class graph:
             idx = 0
             for edge in self.ordered_edges:  # change over time, need to save or just plot random edges
                 # init_c is the first concentration in the edge [0]
-                init_c[idx] = self.G.edges[edge]['c'][0, t_step]
+                init_c[idx] = self.G.edges[edge]['c'][0, self.getCol('c', t_step)]
                 idx = idx + 1
             plt.plot(edge_label, init_c, '-o')
             plt.xlabel('edge # based on ordered edges')
@@ -1180,7 +1883,7 @@ class graph:
         vox = pv.voxelize(mesh, check_surface=False, density=mesh.length/(mesh.length*density_factor))
         
         for j in range(1, (len(self.G.edges))):  # make len(edge_list). it's the same
-            print(j)
+            self.events.message('voxelizing edge %d' % j)
             edge_cloud = edge_list[j]
             mesh = pv.StructuredGrid()
             mesh.points = edge_cloud
@@ -1193,25 +1896,32 @@ class graph:
         return vox.points
     
 
-    def edgeToVox(self, edge_cloud):
-        # each func returns vox.points
-        # then st
-        # can I stack the voxes af
-    
-        dim = [self.num_points, 2, 2]  # why does this work?
-        density_factor = 1  # 20
-
-        mesh = pv.StructuredGrid()
-        mesh.points = edge_cloud
-        mesh.dimensions = dim
-        mesh = mesh.extract_surface()
-        #mesh = mesh.smooth()
-        vox = pv.voxelize(mesh, check_surface=False, density=mesh.length/(mesh.length*density_factor))
-        pc = vox.points
+    def edgeToVox(self, edge, t_step):
+        # voxel centers inside the edge at t_step (see voxel.prismKeys)
+        keys = voxel.prismKeys(*self.getEdgePrism(edge, t_step), self.voxel_size)
+        pc = keys*self.voxel_size
         #can decimate if too expensive 
         #pc = utilities.dataProcess().decimatePoints(pc, 500)
     
         return pc
+
+    def getEdgePrism(self, edge, t_step):
+        # end points, grid positions, half-widths and alpha axis of the edge at t_step
+        start = self.getNodeCoords(edge[0])
+        end = self.getNodeCoords(edge[1])
+        azi, inc = self.seg.getDirection(start, end)
+        inc = np.pi/2 - inc
+        # alpha offsets along the same coordinate axis as in getEdgeGeometry
+        if azi < np.radians(60):
+            alpha_axis = 1
+        elif inc > np.radians(60):
+            alpha_axis = 0
+        else:
+            alpha_axis = 2
+        alpha = self.G.edges[edge]['alpha'][:, self.getCol('alpha', t_step)]
+        beta = self.G.edges[edge]['beta'][:, self.getCol('beta', t_step)]
+
+        return start, end, self.G.edges[edge]['x'], alpha, beta, np.eye(3)[alpha_axis]
     
     def decimatePoints(self, points, num_points): #duplicate function in mapper
         #should put this in utilities
@@ -1222,22 +1932,20 @@ class graph:
         return points
 
     def parGetGridVox(self, t_step):
-        tic = time.time()
-        edge_list = self.getGeometryCloudAtTime(t_step)
-        toc = time.time()
-        print('getGeometryCloudAtTime Done in {:.4f} seconds \n'.format(toc-tic))
-        
-        tic = time.time()
-        p = Pool()
-        lst_pc = p.map(self.edgeToVox, edge_list)  # for single input you can do [n]
-        pc = np.vstack(lst_pc)
-        toc = time.time()
-        print('parEdgeToVox Done in {:.4f} seconds \n'.format(toc-tic))
-
-        tic = time.time()
-        pc = utilities.dataProcess().pcUniformDensityXY(pc)
-        toc = time.time()
-        print('pcUniformDensityXY Done in {:.4f} seconds \n'.format(toc-tic))
+        with self.prof.span('point cloud geometry'):
+            prisms = {edge: self.getEdgePrism(edge, t_step) for edge in self.G.edges}
+
+        # only edges that changed since the last mapper run are voxelized again
+        with self.prof.span('point cloud voxels'):
+            if self.voxels is None:
+                self.voxels = voxel.voxelGrid(self.voxel_size, self.voxel_tol)
+            updated = self.voxels.update(prisms)
+            pc = self.voxels.points()
+        self.prof.count('point cloud updated edges', updated)
+
+        with self.prof.span('point cloud density'):
+            pc = utilities.dataProcess().pcUniformDensityXY(pc)
+        self.prof.count('point cloud points', len(pc))
         
         return pc 
 
@@ -1392,7 +2100,7 @@ class graph:
         actor = dict()
         graph_counter = 0
         mapper_cond = self.mapper_cond_start
-        self.G = self.graph_list[graph_counter]
+        self.G = self.graph_list[graph_counter].toGraph()
         self.processInletGeometry()
         time_list = self.getGeometryCloud()
 
@@ -1401,8 +2109,8 @@ class graph:
             if self.t[i] == mapper_cond:
                 mapper_cond = mapper_cond + self.mapper_iter
                 graph_counter += 1
-                print('graph_counter', graph_counter)
-                self.G = self.graph_list[graph_counter]
+                self.events.message('graph_counter %d' % graph_counter)
+                self.G = self.graph_list[graph_counter].toGraph()
                 self.processInletGeometry()
                 time_list = self.getGeometryCloud()
 
@@ -1486,9 +2194,10 @@ class graph:
         # to do
         # instead of append we can do pre-allocate time and space
         # getEdgeGeometry before time step and then use the time step to just get the 4 corners from alpha and beta (point x-spacings doesn't change over time)
-        time_lst = []
-        for t_step in range(len(self.t)):
-            print(t_step)
+        # steps before the time offset of a mapper graph are not stored (None)
+        time_lst = [None]*self.G.graph.get('t0', 0)
+        for t_step in range(self.G.graph.get('t0', 0), self.G.graph.get('t_end', len(self.t))):
+            self.events.message('geometry cloud at time step %d' % t_step)
             # for t_step in range(0, len(self.t), step):
             space_lst = []
             # list(self.ordered_edges): #should be directed since after last iteration
@@ -1509,9 +2218,10 @@ class graph:
         # to do
         # instead of append we can do pre-allocate time and space
         # getEdgeGeometry before time step and then use the time step to just get the 4 corners from alpha and beta (point x-spacings doesn't change over time)
-        time_lst = []
+        # steps before the time offset of a mapper graph are not stored (None)
+        time_lst = [None]*self.G.graph.get('t0', 0)
         edge_lst = list(self.G.edges)
-        for t_step in range(len(self.t)):   
+        for t_step in range(self.G.graph.get('t0', 0), self.G.graph.get('t_end', len(self.t))):
             self.pool_t = t_step
             p = Pool()
             space_lst = p.map(self.getEdgePoints, edge_lst)  # for single input you can do [n]
@@ -1572,6 +2282,8 @@ class graph:
         points, azi, inc = self.getPointsAlongEdge(edge)
         # limit points to certain indices
         idx = self.getIndex(edge)
+        ja = self.getCol('alpha', t_step)
+        jb = self.getCol('beta', t_step)
         inc = np.pi/2 - inc  # more intuitive from zero
 
         # later implement more accurate geometry using azimuth and inclination
@@ -1579,72 +2291,72 @@ class graph:
             if inc > np.radians(60):  # vertical
                 # right top
                 p1 = points[idx, :]
-                p1[:, 0] = p1[:, 0] + self.G.edges[edge]['beta'][idx, t_step]
-                p1[:, 1] = p1[:, 1] + self.G.edges[edge]['alpha'][idx, t_step]
+                p1[:, 0] = p1[:, 0] + self.G.edges[edge]['beta'][idx, jb]
+                p1[:, 1] = p1[:, 1] + self.G.edges[edge]['alpha'][idx, ja]
                 # left top
                 p2 = points[idx, :]
-                p2[:, 0] = p2[:, 0] + self.G.edges[edge]['beta'][idx, t_step]
-                p2[:, 1] = p2[:, 1] - self.G.edges[edge]['alpha'][idx, t_step]
+                p2[:, 0] = p2[:, 0] + self.G.edges[edge]['beta'][idx, jb]
+                p2[:, 1] = p2[:, 1] - self.G.edges[edge]['alpha'][idx, ja]
                 # right down
                 p3 = points[idx, :]
-                p3[:, 0] = p3[:, 0] - self.G.edges[edge]['beta'][idx, t_step]
-                p3[:, 1] = p3[:, 1] + self.G.edges[edge]['alpha'][idx, t_step]
+                p3[:, 0] = p3[:, 0] - self.G.edges[edge]['beta'][idx, jb]
+                p3[:, 1] = p3[:, 1] + self.G.edges[edge]['alpha'][idx, ja]
                 # left down
                 p4 = points[idx, :]
-                p4[:, 0] = p4[:, 0] - self.G.edges[edge]['beta'][idx, t_step]
-                p4[:, 1] = p4[:, 1] - self.G.edges[edge]['alpha'][idx, t_step]
+                p4[:, 0] = p4[:, 0] - self.G.edges[edge]['beta'][idx, jb]
+                p4[:, 1] = p4[:, 1] - self.G.edges[edge]['alpha'][idx, ja]
             else:
                 # right top
                 p1 = points[idx, :]
-                p1[:, 2] = p1[:, 2] + self.G.edges[edge]['beta'][idx, t_step]
-                p1[:, 1] = p1[:, 1] + self.G.edges[edge]['alpha'][idx, t_step]
+                p1[:, 2] = p1[:, 2] + self.G.edges[edge]['beta'][idx, jb]
+                p1[:, 1] = p1[:, 1] + self.G.edges[edge]['alpha'][idx, ja]
                 # left topå
                 p2 = points[idx, :]
-                p2[:, 2] = p2[:, 2] + self.G.edges[edge]['beta'][idx, t_step]
-                p2[:, 1] = p2[:, 1] - self.G.edges[edge]['alpha'][idx, t_step]
+                p2[:, 2] = p2[:, 2] + self.G.edges[edge]['beta'][idx, jb]
+                p2[:, 1] = p2[:, 1] - self.G.edges[edge]['alpha'][idx, ja]
                 # right down
                 p3 = points[idx, :]
-                p3[:, 2] = p3[:, 2] - self.G.edges[edge]['beta'][idx, t_step]
-                p3[:, 1] = p3[:, 1] + self.G.edges[edge]['alpha'][idx, t_step]
+                p3[:, 2] = p3[:, 2] - self.G.edges[edge]['beta'][idx, jb]
+                p3[:, 1] = p3[:, 1] + self.G.edges[edge]['alpha'][idx, ja]
                 # left down
                 p4 = points[idx, :]
-                p4[:, 2] = p4[:, 2] - self.G.edges[edge]['beta'][idx, t_step]
-                p4[:, 1] = p4[:, 1] - self.G.edges[edge]['alpha'][idx, t_step]
+                p4[:, 2] = p4[:, 2] - self.G.edges[edge]['beta'][idx, jb]
+                p4[:, 1] = p4[:, 1] - self.G.edges[edge]['alpha'][idx, ja]
         else:
             if inc > np.radians(60):  # vertical
                 # right top
                 p1 = points[idx, :]
-                p1[:, 1] = p1[:, 1] + self.G.edges[edge]['beta'][idx, t_step]
-                p1[:, 0] = p1[:, 0] + self.G.edges[edge]['alpha'][idx, t_step]
+                p1[:, 1] = p1[:, 1] + self.G.edges[edge]['beta'][idx, jb]
+                p1[:, 0] = p1[:, 0] + self.G.edges[edge]['alpha'][idx, ja]
                 # left top
                 p2 = points[idx, :]
-                p2[:, 1] = p2[:, 1] + self.G.edges[edge]['beta'][idx, t_step]
-                p2[:, 0] = p2[:, 0] - self.G.edges[edge]['alpha'][idx, t_step]
+                p2[:, 1] = p2[:, 1] + self.G.edges[edge]['beta'][idx, jb]
+                p2[:, 0] = p2[:, 0] - self.G.edges[edge]['alpha'][idx, ja]
                 # right down
                 p3 = points[idx, :]
-                p3[:, 1] = p3[:, 1] - self.G.edges[edge]['beta'][idx, t_step]
-                p3[:, 0] = p3[:, 0] + self.G.edges[edge]['alpha'][idx, t_step]
+                p3[:, 1] = p3[:, 1] - self.G.edges[edge]['beta'][idx, jb]
+                p3[:, 0] = p3[:, 0] + self.G.edges[edge]['alpha'][idx, ja]
                 # left down
                 p4 = points[idx, :]
-                p4[:, 1] = p4[:, 1] - self.G.edges[edge]['beta'][idx, t_step]
-                p4[:, 0] = p4[:, 0] - self.G.edges[edge]['alpha'][idx, t_step]
+                p4[:, 1] = p4[:, 1] - self.G.edges[edge]['beta'][idx, jb]
+                p4[:, 0] = p4[:, 0] - self.G.edges[edge]['alpha'][idx, ja]
             else:
                 # right top
                 p1 = points[idx, :]
-                p1[:, 2] = p1[:, 2] + self.G.edges[edge]['alpha'][idx, t_step]
-                p1[:, 0] = p1[:, 0] + self.G.edges[edge]['beta'][idx, t_step]
+                p1[:, 2] = p1[:, 2] + self.G.edges[edge]['alpha'][idx, ja]
+                p1[:, 0] = p1[:, 0] + self.G.edges[edge]['beta'][idx, jb]
                 # left top
                 p2 = points[idx, :]
-                p2[:, 2] = p2[:, 2] + self.G.edges[edge]['alpha'][idx, t_step]
-                p2[:, 0] = p2[:, 0] - self.G.edges[edge]['beta'][idx, t_step]
+                p2[:, 2] = p2[:, 2] + self.G.edges[edge]['alpha'][idx, ja]
+                p2[:, 0] = p2[:, 0] - self.G.edges[edge]['beta'][idx, jb]
                 # right down
                 p3 = points[idx, :]
-                p3[:, 2] = p3[:, 2] - self.G.edges[edge]['alpha'][idx, t_step]
-                p3[:, 0] = p3[:, 0] + self.G.edges[edge]['beta'][idx, t_step]
+                p3[:, 2] = p3[:, 2] - self.G.edges[edge]['alpha'][idx, ja]
+                p3[:, 0] = p3[:, 0] + self.G.edges[edge]['beta'][idx, jb]
                 # left down
                 p4 = points[idx, :]
-                p4[:, 2] = p4[:, 2] - self.G.edges[edge]['alpha'][idx, t_step]
-                p4[:, 0] = p4[:, 0] - self.G.edges[edge]['beta'][idx, t_step]
+                p4[:, 2] = p4[:, 2] - self.G.edges[edge]['alpha'][idx, ja]
+                p4[:, 0] = p4[:, 0] - self.G.edges[edge]['beta'][idx, jb]
 
         all_points = np.concatenate((p1, p2, p3, p4), axis=0)
 
@@ -1657,7 +2369,7 @@ class graph:
         self.H = self.G.copy()  # save G before we play with it
         edge_list = list(self.H.edges)
         # can be parallelized
-        for idx_t in range(len(self.t)):
+        for idx_t in range(self.G.graph.get('t_end', len(self.t)) - self.G.graph.get('t0', 0)):
             for edge in edge_list:
                 self.G.edges[edge]['alpha'][0:num_points,
                                             idx_t] = self.G.edges[edge]['alpha'][num_points, idx_t]
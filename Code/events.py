@@ -0,0 +1,132 @@
+"""
+Created on Mon Oct 19 22:11:26 2026
+
+Progress and event callbacks for graph dissolution runs, and the typed
+exceptions raised instead of exiting the process.
+"""
+
+import warnings
+
+from tqdm import tqdm
+
+
+class DissolutionError(Exception):
+    # base class of the errors raised by a graph dissolution run
+    pass
+
+
+class DisconnectedGraphError(DissolutionError):
+    # the graph (e.g. after mapper re-meshing) is not connected
+    def __init__(self, message, num_components=None, t_step=None):
+        super().__init__(message)
+        self.num_components = num_components
+        self.t_step = t_step
+
+
+class observer:
+    """
+        Base class of run observers, override the hooks of interest.
+            onStep      after every time step, info: time, edges, seconds
+            onMapper    after a mapper re-meshing, info: nodes, edges
+            onPhase     end of a profiled span (graph.setProfiler enabled)
+            onMessage   diagnostics that used to be printed
+            onWarning   recoverable problems
+    """
+
+    def onStep(self, t_step, num_steps, info):
+        return
+
+    def onMapper(self, t_step, info):
+        return
+
+    def onPhase(self, name, seconds):
+        return
+
+    def onMessage(self, message):
+        return
+
+    def onWarning(self, message):
+        return
+
+
+class printObserver(observer):
+    # prints messages, warnings and mapper runs (the former default output)
+
+    def onMapper(self, t_step, info):
+        print('========= MAPPER RUN (step %d: %d nodes, %d edges) ========='
+              % (t_step, info['nodes'], info['edges']))
+
+    def onMessage(self, message):
+        print(message)
+
+    def onWarning(self, message):
+        print('WARNING:', message)
+
+
+class progressObserver(observer):
+    # tqdm progress bar over the time steps of a run
+
+    def __init__(self):
+        self.bar = None
+
+    def onStep(self, t_step, num_steps, info):
+        if self.bar is None:
+            self.bar = tqdm(total=num_steps)
+        self.bar.update(1)
+        if t_step == num_steps - 1:
+            self.bar.close()
+            self.bar = None
+
+
+class eventHub:
+    """
+        Dispatches events to the registered observers. Without observers,
+        warnings go to the warnings module and everything else is dropped.
+    """
+
+    def __init__(self):
+        self.observers = []
+
+        return
+
+    def addObserver(self, obs):
+        self.observers.append(obs)
+
+        return
+
+    def removeObserver(self, obs):
+        self.observers.remove(obs)
+
+        return
+
+    def step(self, t_step, num_steps, info):
+        for obs in self.observers:
+            obs.onStep(t_step, num_steps, info)
+
+        return
+
+    def mapper(self, t_step, info):
+        for obs in self.observers:
+            obs.onMapper(t_step, info)
+
+        return
+
+    def phase(self, name, seconds):
+        for obs in self.observers:
+            obs.onPhase(name, seconds)
+
+        return
+
+    def message(self, message):
+        for obs in self.observers:
+            obs.onMessage(message)
+
+        return
+
+    def warning(self, message):
+        if not self.observers:
+            warnings.warn(message, RuntimeWarning, stacklevel=3)
+        for obs in self.observers:
+            obs.onWarning(message)
+
+        return
@@ -0,0 +1,39 @@
+"""
+Created on Mon Oct 19 14:20:51 2026
+
+Snapshot store for edge fields that are not kept as full time history.
+"""
+
+import numpy as np
+
+
+class historyStore:
+    """
+        Snapshots of edge fields recorded every k time steps, kept outside the
+        arrays the step engine works on. Keyed by field, then (epoch, edge)
+        where epoch counts mapper re-meshings and edge is the sorted node pair.
+    """
+
+    def __init__(self):
+        self.data = {}
+
+        return
+
+    def record(self, field, epoch, edge, t_step, values):
+        times, arrays = self.data.setdefault(field, {}).setdefault((epoch, edge), ([], []))
+        times.append(t_step)
+        arrays.append(np.array(values, copy=True))
+
+        return
+
+    def getFields(self):
+        return list(self.data.keys())
+
+    def getEdges(self, field, epoch):
+        return [edge for (ep, edge) in self.data.get(field, {}) if ep == epoch]
+
+    def get(self, field, epoch, edge):
+        #returns recorded time steps and a (len(x), num_snapshots) array
+        times, arrays = self.data[field][(epoch, edge)]
+
+        return np.array(times), np.stack(arrays, axis=1)
@@ -0,0 +1,251 @@
+"""
+Created on Tue Oct 20 01:36:52 2026
+
+Streaming readers of large dfnWorks outputs: files are parsed chunk_lines lines
+at a time into growing numpy buffers, optionally keeping only a region of
+interest or a subset of fractures, and cutting sub-volumes out of a DFN.
+"""
+
+import os
+import itertools
+
+import numpy as np
+import networkx as nx
+
+import intersections
+
+
+# polygons.dat vertex delimiters
+VERTEX_DELIMITERS = str.maketrans('{},', '   ')
+
+
+class arrayBuffer:
+    """
+        Preallocated array of rows grown by doubling, so that streamed chunks
+        are appended without keeping the chunks themselves.
+    """
+
+    def __init__(self, width=None, dtype=float, capacity=1024):
+        self.width = width
+        shape = (max(capacity, 1),) if width is None else (max(capacity, 1), width)
+        self.data = np.empty(shape, dtype=dtype)
+        self.size = 0
+
+        return
+
+    def extend(self, values):
+        needed = self.size + len(values)
+        if needed > len(self.data):
+            capacity = max(needed, 2*len(self.data))
+            data = np.empty((capacity,) + self.data.shape[1:], dtype=self.data.dtype)
+            data[:self.size] = self.data[:self.size]
+            self.data = data
+        self.data[self.size:needed] = values
+        self.size = needed
+
+        return
+
+    def array(self):
+        return self.data[:self.size]
+
+
+def readChunks(file, chunk_lines):
+    # non-blank lines of an open file, chunk_lines at a time
+    while True:
+        lines = list(itertools.islice(file, chunk_lines))
+        if not lines:
+            return
+        lines = [line for line in lines if line.strip()]
+        if lines:
+            yield lines
+
+
+def estimateRows(filename, header_lines=1):
+    # number of rows of a text table from its size and the length of its first lines
+    with open(filename) as file:
+        lines = list(itertools.islice(file, header_lines + 256))[header_lines:]
+    if not lines:
+        return 0
+    bytes_per_line = max(sum(len(line) for line in lines)/len(lines), 1)
+
+    return int(os.path.getsize(filename)/bytes_per_line) + 1
+
+
+def inBox(lo, hi, roi):
+    # boxes [lo, hi] overlapping the region of interest roi = (lo, hi)
+    if roi is None:
+        return np.ones(len(lo), dtype=bool)
+    roi_lo, roi_hi = np.asarray(roi[0], dtype=float), np.asarray(roi[1], dtype=float)
+
+    return np.all((lo <= roi_hi) & (hi >= roi_lo), axis=1)
+
+
+def readPolygons(filename, roi=None, fractures=None, chunk_lines=1 << 16):
+    """
+    streams polygons.dat. roi: (lo, hi) box, only fractures whose bounding box
+        overlaps it are kept. fractures: fracture numbers (from 1) to keep.
+        returns the vertex coordinates of the kept fractures (vertices, 3), the
+        offsets of every fracture into them and their fracture numbers
+
+    """
+    subset = None if fractures is None else np.unique(np.asarray(list(fractures), dtype=int))
+    with open(filename) as file:
+        num_frac = int(next(file).split(':')[1])
+        coords = arrayBuffer(3, float, 4*num_frac if subset is None else 4*len(subset))
+        counts = arrayBuffer(None, int, num_frac)
+        ids = arrayBuffer(None, int, num_frac)
+        first = 1
+        for lines in readChunks(file, chunk_lines):
+            values = np.fromstring(''.join(lines).translate(VERTEX_DELIMITERS), sep=' ')
+            line_counts = np.array([line.count('{') for line in lines], dtype=int)
+            line_start = np.concatenate(([0], np.cumsum(1 + 3*line_counts)[:-1]))
+            if not np.array_equal(values[line_start], line_counts):
+                raise ValueError('%s: malformed polygon line near fracture %d' % (filename, first))
+            vertex = np.ones(len(values), dtype=bool)
+            vertex[line_start] = False
+            vertices = values[vertex].reshape(-1, 3)
+            frac = np.arange(first, first + len(lines))
+            first += len(lines)
+
+            starts = np.concatenate(([0], np.cumsum(line_counts)[:-1]))
+            keep = inBox(np.minimum.reduceat(vertices, starts), np.maximum.reduceat(vertices, starts), roi)
+            if subset is not None:
+                keep &= np.isin(frac, subset)
+            coords.extend(vertices[np.repeat(keep, line_counts)])
+            counts.extend(line_counts[keep])
+            ids.extend(frac[keep])
+
+    offsets = np.concatenate(([0], np.cumsum(counts.array())))
+
+    return coords.array(), offsets, ids.array()
+
+
+def readIntersectionList(filename, roi=None, fractures=None, chunk_lines=1 << 16):
+    """
+    streams intersection_list.dat. roi: (lo, hi) box, only intersections with
+        their midpoint inside are kept. fractures: fracture numbers, only
+        intersections between two of them (or one of them and a wall) are kept.
+        returns f1, f2, midpoints (rows, 3), lengths
+
+    """
+    subset = None if fractures is None else np.unique(np.asarray(list(fractures), dtype=int))
+    capacity = estimateRows(filename)
+    table = arrayBuffer(6, float, capacity if roi is None and subset is None else capacity//4)
+    with open(filename) as file:
+        next(file)
+        for lines in readChunks(file, chunk_lines):
+            rows = np.loadtxt(lines, ndmin=2)
+            keep = inBox(rows[:, 2:5], rows[:, 2:5], roi)
+            if subset is not None:
+                keep &= np.isin(rows[:, 0], subset) & ((rows[:, 1] < 0) | np.isin(rows[:, 1], subset))
+            table.extend(rows[keep])
+
+    rows = table.array()
+
+    return rows[:, 0].astype(int), rows[:, 1].astype(int), rows[:, 2:5], rows[:, 5]
+
+
+def readApertures(filename, fractures=None):
+    # apertures of aperture.dat (fracture k + 1 on line k + 2), of fractures if given
+    with open(filename) as file:
+        next(file)
+        values = np.array(file.read().split(), dtype=float).reshape(-1, 4)[:, 3]
+    if fractures is None:
+        return values
+
+    return values[np.asarray(fractures, dtype=int) - 1]
+
+
+#### sub-volumes
+
+def connectedFractures(num_frac, f1, f2, walls, prune=True):
+    """
+    fractures (from 1) of the cluster connected to both walls, raises
+        ValueError if there is none. walls: {f2: 's' or 't'}. prune: keep only
+        fractures on a simple path from wall to wall (no dead ends)
+
+    """
+    F = nx.Graph()
+    F.add_nodes_from(range(1, num_frac + 1))
+    F.add_nodes_from(['s', 't'])
+    F.add_edges_from((a, walls.get(b, b)) for a, b in zip(f1.tolist(), f2.tolist())
+                     if b > 0 or b in walls)
+    if not nx.has_path(F, 's', 't'):
+        raise ValueError('the fractures do not connect the source and target walls')
+    keep = nx.node_connected_component(F, 's')
+    if prune:
+        # the biconnected component of the fracture graph closed by a source-target edge
+        F.add_edge('s', 't')
+        keep = next(nodes for nodes in nx.biconnected_components(F)
+                    if 's' in nodes and 't' in nodes)
+
+    return sorted(node for node in keep if node not in ['s', 't'])
+
+
+def writeDFN(path, polygons, apertures, f1, f2, coords, length, domain):
+    """
+    writes the dfnWorks file set read by processDFN.dfn (polygons.dat,
+        aperture.dat, intersection_list.dat, params.txt) to directory path.
+        The graph is built from intersection_list.dat when loaded.
+
+    """
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, 'polygons.dat'), 'w') as file:
+        file.write('nPolygons: %d\n' % len(polygons))
+        for vertices in polygons:
+            points = ' '.join('{%.12g, %.12g, %.12g}' % tuple(vertex) for vertex in vertices)
+            file.write('%d %s \n' % (len(vertices), points))
+
+    with open(os.path.join(path, 'aperture.dat'), 'w') as file:
+        file.write('aperture.dat\n')
+        for i, value in enumerate(apertures):
+            file.write('%d 0 0 %.12g\n' % (-(i + 7), value))
+
+    with open(os.path.join(path, 'intersection_list.dat'), 'w') as file:
+        file.write('f1 f2 x y z length\n')
+        for row in zip(f1.tolist(), f2.tolist(), *np.asarray(coords).T.tolist(), length.tolist()):
+            file.write('%d %d %.10g %.10g %.10g %.10g\n' % row)
+
+    with open(os.path.join(path, 'params.txt'), 'w') as file:
+        for value in [len(polygons), 0.5, 1, 0, *domain]:
+            file.write('%g\n' % value)
+
+    return
+
+
+def cutDFN(path, output, roi, fractures=None, walls=None, prune=True, chunk_lines=1 << 16):
+    """
+    cuts the sub-volume roi = (lo, hi) out of the DFN in directory path and
+        writes it as a DFN to directory output, centered at the origin. Only
+        polygons.dat and aperture.dat are read (streamed). Fractures are clipped
+        to the box, their intersections recomputed with the box faces as walls
+        (walls as in intersections.intersectionEngine) and the cluster joining
+        the walls is kept. fractures: optional subset of fracture numbers.
+        returns the original numbers of the kept fractures
+
+    """
+    lo, hi = np.asarray(roi[0], dtype=float), np.asarray(roi[1], dtype=float)
+    center, size = 0.5*(lo + hi), hi - lo
+    coords, offsets, ids = readPolygons(os.path.join(path, 'polygons.dat'), (lo, hi),
+                                        fractures, chunk_lines)
+    polygons, kept_ids = [], []
+    for k, frac in enumerate(ids.tolist()):
+        vertices = intersections.clipToBox(coords[offsets[k]:offsets[k + 1]] - center, 0.5*size)
+        if len(vertices) >= 3:
+            polygons.append(vertices)
+            kept_ids.append(frac)
+
+    engine = intersections.intersectionEngine(polygons, size, walls)
+    f1, f2, midpoints, length = engine.getIntersections()
+    keep = np.array(connectedFractures(len(polygons), f1, f2, engine.walls, prune), dtype=int)
+    new_id = np.zeros(len(polygons) + 1, dtype=int)
+    new_id[keep] = np.arange(1, len(keep) + 1)
+    rows = (new_id[f1] > 0) & ((f2 < 0) | (new_id[np.maximum(f2, 0)] > 0))
+    f1, f2 = new_id[f1[rows]], np.where(f2[rows] > 0, new_id[np.maximum(f2[rows], 0)], f2[rows])
+
+    original = np.array(kept_ids)[keep - 1]
+    apertures = readApertures(os.path.join(path, 'aperture.dat'), original)
+    writeDFN(output, [polygons[k - 1] for k in keep], apertures, f1, f2, midpoints[rows],
+             length[rows], size)
+
+    return original
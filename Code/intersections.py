@@ -0,0 +1,255 @@
+"""
+Created on Tue Oct 20 00:41:19 2026
+
+Fracture intersections computed from the polygons of a DFN, written as the
+dfnWorks intersection_list.dat and its intersection graph.
+"""
+
+import numpy as np
+
+import processDFN
+
+
+def clipToBox(vertices, half):
+    # Sutherland-Hodgman clipping of a planar polygon to the box |x_i| <= half_i
+    for axis in range(3):
+        for sign in [1, -1]:
+            if len(vertices) == 0:
+                return vertices
+            dist = half[axis] - sign*vertices[:, axis]
+            clipped = []
+            for i in range(len(vertices)):
+                p, q = vertices[i], vertices[(i + 1) % len(vertices)]
+                dp, dq = dist[i], dist[(i + 1) % len(vertices)]
+                if dp >= 0:
+                    clipped.append(p)
+                if dp*dq < 0:
+                    point = p + dp/(dp - dq)*(q - p)
+                    point[axis] = sign*half[axis]
+                    clipped.append(point)
+            vertices = np.array(clipped).reshape(-1, 3)
+
+    return vertices
+
+
+class intersectionEngine:
+    """
+        Intersections of convex planar polygons (fractures) with each other and
+        with the walls of a box domain centered at the origin. Candidate pairs
+        come from a uniform grid hash of the polygon bounding boxes, the
+        intersection of the two planes is clipped against both polygons for
+        all candidate pairs at once (chunk pairs at a time).
+
+        Polygons are padded to the largest vertex count, the padding vertices
+        repeat the last one so that their edges are degenerate and never clip.
+
+        polygons        list of (vertices, 3) arrays, fracture k + 1 is polygons[k]
+        domain          box size (x, y, z)
+        walls           {f2: label} of the walls to intersect, f2 the dfnWorks face
+                        code (-1 top, -2 bottom, -3 left, -4 front, -5 right,
+                        -6 back), default {-3: 's', -5: 't'}
+    """
+
+    faces = {-1: (2, 1), -2: (2, -1), -3: (0, -1), -4: (1, 1), -5: (0, 1), -6: (1, -1)}
+    parallel_tol = 1e-12            # |n1 x n2|^2 below which planes are parallel
+    wall_tol = 1e-9                 # vertices this close to a wall are on it (relative)
+
+    def __init__(self, polygons, domain, walls=None, chunk=1 << 16):
+        self.domain = np.asarray(domain, dtype=float)
+        self.walls = walls if walls is not None else {-3: 's', -5: 't'}
+        self.chunk = chunk
+
+        self.num_frac = len(polygons)
+        self.counts = np.array([len(vertices) for vertices in polygons], dtype=int)
+        num_vert = max(self.counts.max(initial=0), 1)
+        self.vertices = np.zeros((self.num_frac, num_vert, 3))
+        for k, vertices in enumerate(polygons):
+            self.vertices[k, :len(vertices)] = vertices
+            self.vertices[k, len(vertices):] = vertices[-1]
+        self.valid = np.arange(num_vert)[None, :] < self.counts[:, None]
+        self.lo = np.array([np.min(vertices, axis=0) for vertices in polygons]).reshape(-1, 3)
+        self.hi = np.array([np.max(vertices, axis=0) for vertices in polygons]).reshape(-1, 3)
+
+        self.getPlanes()
+
+        return
+
+    #### polygons
+
+    def getPlanes(self):
+        # unit normals (Newell), plane offsets and the inward normals of every
+        # polygon edge within the plane with their offsets
+        a = self.vertices
+        vertex = np.arange(a.shape[1])[None, :]
+        following = np.where(self.valid, (vertex + 1) % self.counts[:, None], vertex)
+        b = np.take_along_axis(a, following[:, :, None], axis=1)
+        normal = np.sum(np.cross(a, b), axis=1)
+        self.normals = normal/np.linalg.norm(normal, axis=1)[:, None]
+        self.offsets = np.einsum('ij,ij->i', self.normals, a[:, 0])
+
+        edge_normals = np.cross(self.normals[:, None, :], b - a)
+        centroid = (np.sum(a*self.valid[:, :, None], axis=1)/self.counts[:, None])[:, None, :]
+        flip = np.einsum('ijk,ijk->ij', edge_normals, centroid - a) < 0
+        edge_normals[flip] *= -1
+        self.edge_normals = edge_normals
+        self.edge_offsets = np.einsum('ijk,ijk->ij', edge_normals, a)
+
+        return
+
+    #### spatial index
+
+    def getCandidatePairs(self):
+        # (i, j), i < j, of polygons with overlapping bounding boxes
+        if self.num_frac < 2:
+            return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+        extent = np.max(self.hi - self.lo, axis=1)
+        cell = max(np.median(extent), 1e-12*max(np.max(self.domain), 1))
+        origin = self.lo.min(axis=0)
+        c_lo = np.floor((self.lo - origin)/cell).astype(np.int64)
+        c_hi = np.floor((self.hi - origin)/cell).astype(np.int64)
+        dims = c_hi.max(axis=0) + 1
+
+        # one (cell, polygon) entry for every cell a bounding box covers
+        span = c_hi - c_lo + 1
+        num = np.prod(span, axis=1)
+        poly = np.repeat(np.arange(self.num_frac), num)
+        local = np.arange(num.sum()) - np.repeat(np.cumsum(num) - num, num)
+        cx = c_lo[poly, 0] + local % span[poly, 0]
+        rest = local//span[poly, 0]
+        cy = c_lo[poly, 1] + rest % span[poly, 1]
+        cz = c_lo[poly, 2] + rest//span[poly, 1]
+        key = (cx*dims[1] + cy)*dims[2] + cz
+        order = np.lexsort((poly, key))
+        key, poly = key[order], poly[order]
+
+        # pairs within a cell are entries d apart in the sorted list
+        i_list, j_list = [], []
+        d = 1
+        while d < len(key):
+            same = key[d:] == key[:-d]
+            if not same.any():
+                break
+            i_list.append(poly[:-d][same])
+            j_list.append(poly[d:][same])
+            d += 1
+        if not i_list:
+            return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+        pair = np.unique(np.concatenate(i_list)*self.num_frac + np.concatenate(j_list))
+        i, j = pair//self.num_frac, pair % self.num_frac
+        overlap = np.all((self.lo[i] <= self.hi[j]) & (self.lo[j] <= self.hi[i]), axis=1)
+
+        return i[overlap], j[overlap]
+
+    #### intersections
+
+    def clipLines(self, k, p0, u):
+        # parameter interval [t_min, t_max] of the lines p0 + t*u inside polygons k
+        num = np.einsum('ijk,ik->ij', self.edge_normals[k], p0) - self.edge_offsets[k]
+        den = np.einsum('ijk,ik->ij', self.edge_normals[k], u)
+        scale = np.linalg.norm(self.edge_normals[k], axis=2)*np.linalg.norm(u, axis=1)[:, None]
+        parallel = np.abs(den) <= 1e-14*scale
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = -num/den
+        t_min = np.max(np.where(~parallel & (den > 0), t, -np.inf), axis=1)
+        t_max = np.min(np.where(~parallel & (den < 0), t, np.inf), axis=1)
+        outside = np.any(parallel & (num < 0) & (scale > 0), axis=1)
+        t_max[outside] = -np.inf
+
+        return t_min, t_max
+
+    def intersectPairs(self, i, j):
+        # midpoints and lengths of the intersection segments of polygons i and j,
+        # returns the mask of intersecting pairs with their midpoints and lengths
+        n1, n2 = self.normals[i], self.normals[j]
+        u = np.cross(n1, n2)
+        uu = np.einsum('ij,ij->i', u, u)
+        crossing = uu > self.parallel_tol
+        uu = np.where(crossing, uu, 1)
+        p0 = (self.offsets[i][:, None]*np.cross(n2, u)
+              + self.offsets[j][:, None]*np.cross(u, n1))/uu[:, None]
+
+        t_min1, t_max1 = self.clipLines(i, p0, u)
+        t_min2, t_max2 = self.clipLines(j, p0, u)
+        t_min = np.maximum(t_min1, t_min2)
+        t_max = np.minimum(t_max1, t_max2)
+        hit = crossing & (t_max > t_min)
+
+        midpoint = p0 + 0.5*(t_min + t_max)[:, None]*u
+        length = (t_max - t_min)*np.sqrt(uu)
+
+        return hit, midpoint[hit], length[hit]
+
+    def intersectWalls(self, face):
+        # segments of the (truncated) polygons on a wall: the pair of their vertices
+        # on the wall furthest apart. returns polygon indices, midpoints, lengths
+        axis, sign = self.faces[face]
+        wall = sign*0.5*self.domain[axis]
+        tol = self.wall_tol*max(np.max(self.domain), 1)
+        on_wall = self.valid & (np.abs(self.vertices[:, :, axis] - wall) < tol)
+        frac = np.flatnonzero(np.sum(on_wall, axis=1) >= 2)
+
+        index, midpoints, lengths = [], [], []
+        for start in range(0, len(frac), self.chunk):
+            k = frac[start:start + self.chunk]
+            points = self.vertices[k]
+            mask = on_wall[k]
+            dist = np.linalg.norm(points[:, :, None, :] - points[:, None, :, :], axis=3)
+            dist[~(mask[:, :, None] & mask[:, None, :])] = -1
+            flat = np.argmax(dist.reshape(len(k), -1), axis=1)
+            a, b = np.unravel_index(flat, dist.shape[1:])
+            length = dist.reshape(len(k), -1)[np.arange(len(k)), flat]
+            keep = length > 0
+            rows = np.arange(len(k))[keep]
+            index.append(k[keep])
+            midpoints.append(0.5*(points[rows, a[keep]] + points[rows, b[keep]]))
+            lengths.append(length[keep])
+
+        if not index:
+            return np.zeros(0, dtype=int), np.zeros((0, 3)), np.zeros(0)
+
+        return np.concatenate(index), np.concatenate(midpoints), np.concatenate(lengths)
+
+    def getIntersections(self):
+        """
+        returns the rows of intersection_list.dat: f1, f2 (fracture numbers from
+            1, f1 < f2, or f2 the face code of a wall), midpoints (rows, 3) and
+            lengths, sorted by f1 then f2 with wall intersections last
+
+        """
+        i, j = self.getCandidatePairs()
+        f1, f2, coords, length = [], [], [], []
+        for start in range(0, len(i), self.chunk):
+            i_chunk, j_chunk = i[start:start + self.chunk], j[start:start + self.chunk]
+            hit, midpoint, segment = self.intersectPairs(i_chunk, j_chunk)
+            f1.append(i_chunk[hit] + 1)
+            f2.append(j_chunk[hit] + 1)
+            coords.append(midpoint)
+            length.append(segment)
+        for face in self.walls:
+            k, midpoint, segment = self.intersectWalls(face)
+            f1.append(k + 1)
+            f2.append(np.full(len(k), face))
+            coords.append(midpoint)
+            length.append(segment)
+
+        f1 = np.concatenate(f1).astype(int) if f1 else np.zeros(0, dtype=int)
+        f2 = np.concatenate(f2).astype(int) if f2 else np.zeros(0, dtype=int)
+        coords = np.concatenate(coords).reshape(-1, 3) if coords else np.zeros((0, 3))
+        length = np.concatenate(length) if length else np.zeros(0)
+        order = np.lexsort((np.abs(f2), f2 < 0, f1))
+
+        return f1[order], f2[order], coords[order], length[order]
+
+    def getGraph(self):
+        # intersection graph in the format of processDFN.dfn
+        return processDFN.intersectionGraph(*self.getIntersections(), self.walls)
+
+    def write(self, filename):
+        # writes intersection_list.dat, returns its rows
+        f1, f2, coords, length = self.getIntersections()
+        with open(filename, 'w') as file:
+            file.write('f1 f2 x y z length\n')
+            for row in zip(f1.tolist(), f2.tolist(), *coords.T.tolist(), length.tolist()):
+                file.write('%d %d %.10g %.10g %.10g %.10g\n' % row)
+
+        return f1, f2, coords, length
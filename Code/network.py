@@ -0,0 +1,179 @@
+"""
+Created on Mon Oct 19 09:12:40 2026
+
+Incidence-matrix operator for the dissolution graph: edge conductances,
+Laplacian assembly, head gradients and flows as sparse products.
+"""
+
+import numpy as np
+import scipy.sparse as sp
+import scipy.sparse.linalg as spla
+
+import profiling
+
+
+class networkOperator:
+    """
+        Edges x nodes incidence operator B built once per graph topology.
+        B[e, u] = 1 and B[e, v] = -1 for edge e = (u, v) in self.edges order,
+        so B·h is the head drop along every edge and B^T diag(1/R) B is the
+        weighted Laplacian used for the head solve.
+    """
+
+    drop_tol = 64*np.finfo(float).eps          # relative head drop treated as zero
+    prof = profiling.nullProfiler()             # set by graph.getNetwork
+
+    def __init__(self, G, crack, model=0):
+        self.crack = crack
+        self.model = model
+
+        self.nodes = list(G.nodes)
+        self.node_idx = {node: i for i, node in enumerate(self.nodes)}
+        self.edges = list(G.edges)
+        self.num_nodes = len(self.nodes)
+        self.num_edges = len(self.edges)
+
+        self.buildIncidence()
+        self.buildEdgeGrids(G)
+
+        return
+
+    def matches(self, G):
+        #cheap topology check, the operator is rebuilt when nodes or edges are added or removed
+        return (G.number_of_nodes() == self.num_nodes
+                and G.number_of_edges() == self.num_edges)
+
+    def buildIncidence(self):
+        # edge position for both orientations, networkx may flip (u, v) after to_undirected
+        self.edge_idx = {edge: i for i, edge in enumerate(self.edges)}
+        self.edge_idx.update({edge[::-1]: i for i, edge in enumerate(self.edges)})
+
+        u = np.array([self.node_idx[edge[0]] for edge in self.edges], dtype=int)
+        v = np.array([self.node_idx[edge[1]] for edge in self.edges], dtype=int)
+        rows = np.concatenate((np.arange(self.num_edges), np.arange(self.num_edges)))
+        cols = np.concatenate((u, v))
+        data = np.concatenate((np.ones(self.num_edges), -np.ones(self.num_edges)))
+
+        self.u = u
+        self.v = v
+        self.B = sp.csr_matrix((data, (rows, cols)),
+                               shape=(self.num_edges, self.num_nodes))
+
+        return
+
+    def isFlipped(self, key):
+        # True if key is the reverse of the operator orientation of the edge
+        return key != self.edges[self.edge_idx[key]]
+
+    def buildEdgeGrids(self, G):
+        #concatenates the spatial grid of every edge once so that the resistance
+        #integral of all edges is a single segmented reduction
+        x_list = [G.edges[edge]['x'] for edge in self.edges]
+        num_cells = np.array([len(x) for x in x_list], dtype=int)
+
+        self.length = np.array([G.edges[edge]['length'] for edge in self.edges], dtype=float)
+        self.num_cells = num_cells
+        self.offsets = np.concatenate(([0], np.cumsum(num_cells)))
+        self.seg = np.repeat(np.arange(self.num_edges), num_cells)
+        self.w = np.concatenate([self.trapzWeights(x) for x in x_list])
+
+        return
+
+    def trapzWeights(self, x):
+        #trapezoidal quadrature weights so that np.trapz(y, x) == sum(w*y)
+        w = np.zeros(len(x))
+        if len(x) > 1:
+            dx = np.diff(x)
+            w[:-1] += 0.5*dx
+            w[1:] += 0.5*dx
+
+        return w
+
+    def gatherColumn(self, G, key, idx_t):
+        #concatenates column idx_t of an edge field in operator edge order
+        column = np.concatenate([G.edges[edge][key][:, idx_t] for edge in self.edges])
+
+        return column
+
+    def calcConductance(self, alpha, beta):
+        #1/R for all edges, same expression as crack.calcR reduced per edge segment
+        if self.model == 0:                  # rectangle
+            M = 1 - 0.6*alpha/beta
+        func = beta*M*(alpha**3)
+        integral = np.bincount(self.seg, weights=self.w/func, minlength=self.num_edges)
+        R = 12*self.crack.eta/(self.crack.g*self.crack.rho)*integral
+
+        return 1/R
+
+    def laplacian(self, k):
+        #weighted graph Laplacian B^T diag(k) B (sparse, nodes x nodes)
+        lapG = self.B.T @ sp.diags(k) @ self.B
+
+        return lapG.tocsr()
+
+    def solveHeads(self, k, scenarios):
+        """
+        solves the head of every boundary scenario in one call. scenarios is a
+            list of dicts with 'name' and 'dirichlet' ({node index: head}).
+            Scenarios sharing the same Dirichlet node set share one LU
+            factorization of the processed Laplacian and are solved as one
+            block of right-hand sides.
+
+        """
+        with self.prof.span('laplacian'):
+            lapG = self.laplacian(k)
+
+        groups = {}
+        for scenario in scenarios:
+            fixed = tuple(sorted(scenario['dirichlet']))
+            groups.setdefault(fixed, []).append(scenario)
+
+        heads = {}
+        for fixed, group in groups.items():
+            with self.prof.span('head solve'):
+                fixed_idx = np.array(fixed, dtype=int)
+                # replace boundary rows by identity rows (same as graph.processInversion)
+                mask = np.ones(self.num_nodes)
+                mask[fixed_idx] = 0
+                A = sp.diags(mask) @ lapG + sp.diags(1 - mask)
+                lu = spla.splu(A.tocsc())
+
+                rhs = np.zeros((self.num_nodes, len(group)))
+                for j, scenario in enumerate(group):
+                    for idx, value in scenario['dirichlet'].items():
+                        rhs[idx, j] = value
+                sol = lu.solve(rhs)
+            self.prof.count('factorizations')
+            self.prof.count('head solves', len(group))
+
+            for j, scenario in enumerate(group):
+                heads[scenario['name']] = sol[:, j]
+
+        return heads
+
+    def headDrop(self, head):
+        #B·h: head drop from edge[0] to edge[1] for every edge
+        #drops at round-off level are zeroed so equal heads give no flow direction,
+        #as with the per-edge head1 - head2 it replaces
+        dh = self.B @ head
+        dh[np.abs(dh) <= self.drop_tol*np.amax(np.abs(head))] = 0
+
+        return dh
+
+    def calcHgrad(self, head):
+        dh = self.headDrop(head)
+        Hgrad = np.abs(dh)/self.length
+
+        return Hgrad, dh > 0
+
+    def calcFlow(self, k, head):
+        #crack.calcFlow(R, Hgrad, L) = Hgrad*L/R = |B·h|*k
+        return k*np.abs(self.headDrop(head))
+
+    def toAdjacency(self, values):
+        #dense symmetric nodes x nodes array in G.nodes order (same as nx.to_numpy_array)
+        adj = np.zeros((self.num_nodes, self.num_nodes))
+        adj[self.u, self.v] = values
+        adj[self.v, self.u] = values
+
+        return adj
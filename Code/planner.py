@@ -0,0 +1,153 @@
+"""
+Created on Mon Oct 19 20:15:38 2026
+
+Memory footprint of a graph dissolution configuration, computed before any
+of the large arrays are allocated.
+"""
+
+import numpy as np
+
+
+class MemoryBudgetError(MemoryError):
+    # configuration does not fit the memory budget, breakdown in bytes per array
+    def __init__(self, message, breakdown):
+        super().__init__(message)
+        self.breakdown = breakdown
+
+
+class memoryPlanner:
+    """
+        Projected footprint of the arrays allocated by graph.graphGrid and
+        grown by the run: adjacency arrays (nodes x nodes x time), node heads,
+        heads of the num_scenarios added scenarios, per-edge fields (cells x
+        time columns by retention), history snapshots and the graph_list
+        snapshots: one copy of the epoch state before every mapper run in
+        mapper_steps (mapper graphs are taken the size of this one) and one
+        field held twice while the final snapshot is built. Edges are counted
+        before graphProcessing removes the redundant ones, as they are when
+        allocated. Python and networkx object overhead is not included.
+    """
+
+    itemsize = 8                                # float64
+    min_cells = 8                               # auto mode does not coarsen below
+
+    def __init__(self, G, crack, num_scenarios=0, mapper_steps=()):
+        self.crack = crack
+        self.num_nodes = G.number_of_nodes()
+        self.num_edges = G.number_of_edges()
+        self.t0 = G.graph.get('t0', 0)
+        self.num_t = len(crack.t) - self.t0
+        self.num_scenarios = num_scenarios
+        self.mapper_steps = [t_step for t_step in mapper_steps if t_step > self.t0]
+        self.length = np.array([G.edges[edge]['length'] for edge in G.edges], dtype=float)
+        self.edge_cells = [G.edges[edge].get('num_cells') for edge in G.edges]
+
+        return
+
+    def numPoints(self, num_cells=None):
+        # grid points over all edges, num_cells as in crack.spaceGrid
+        total = 0
+        for L, edge_cells in zip(self.length, self.edge_cells):
+            total += self.crack.gridSize(L, edge_cells if edge_cells is not None else num_cells)
+
+        return total
+
+    def estimate(self, retention, adjacency='full', num_cells=None):
+        # bytes per array for a retention policy (graph.setRetention) and resolution
+        T = self.num_t
+        N = self.num_nodes
+        points = self.numPoints(num_cells)
+
+        breakdown = {}
+        breakdown['adjacency 1/R, Hgrad, Q'] = 3*N*N*(T if adjacency == 'full' else 1)
+        breakdown['node head'] = N*T
+        breakdown['scenario heads'] = self.num_scenarios*N*T
+        breakdown['edge Q'] = self.num_edges*T
+        breakdown['edge x'] = points
+        snapshots = 0
+        for key in ['alpha', 'beta', 'c', 'f']:
+            policy = retention[key]
+            breakdown['edge ' + key] = points*self.fieldColumns(key, policy, T)
+            if policy not in ['full', 'current']:
+                snapshots += points*int(np.ceil(T/policy))
+        breakdown['history snapshots'] = snapshots
+
+        # graph_list: edge state of every epoch window ending at a mapper run
+        epoch_list = 0
+        start = self.t0
+        for t_step in self.mapper_steps:
+            window = t_step - start
+            epoch_list += points*(1 + sum(self.fieldColumns(key, retention[key], window)
+                                          for key in ['alpha', 'beta', 'c', 'f']))
+            epoch_list += (4*self.num_edges + (1 + self.num_scenarios)*N)*window
+            start = t_step
+        breakdown['graph_list snapshots'] = epoch_list
+        breakdown['final snapshot build'] = max(breakdown['edge ' + key]
+                                                for key in ['alpha', 'beta', 'c', 'f'])
+
+        return {key: value*self.itemsize for key, value in breakdown.items()}
+
+    def fieldColumns(self, key, policy, num_t):
+        # time columns of an edge field allocated for num_t steps
+        if policy == 'full':
+            return num_t + 1 if key in ['alpha', 'beta'] else num_t
+        return 2 if key in ['alpha', 'beta'] else 1
+
+    def report(self, breakdown):
+        lines = ['%-28s %10.3f GB' % (key, value/1e9)
+                 for key, value in sorted(breakdown.items(), key=lambda item: -item[1])]
+        lines.append('%-28s %10.3f GB' % ('total', sum(breakdown.values())/1e9))
+
+        return '\n'.join(lines)
+
+    def plan(self, budget, retention, adjacency='full', num_cells=None, auto=False):
+        """
+        checks a configuration against budget (bytes). If it does not fit,
+            raises MemoryBudgetError or, with auto=True, returns the first
+            cheaper configuration that fits, trying in order: current-only
+            adjacency, current-only c and f, current-only alpha and beta,
+            then halving the target cells per edge down to min_cells.
+            returns config {'retention', 'adjacency', 'num_cells'}, breakdown
+
+        """
+        config = {'retention': dict(retention), 'adjacency': adjacency, 'num_cells': num_cells}
+        breakdown = self.estimate(**config)
+        if sum(breakdown.values()) <= budget:
+            return config, breakdown
+        if not auto:
+            raise MemoryBudgetError('projected memory exceeds the budget of %.3f GB\n%s'
+                                    % (budget/1e9, self.report(breakdown)), breakdown)
+
+        for config in self.cheaperConfigs(config):
+            breakdown = self.estimate(**config)
+            if sum(breakdown.values()) <= budget:
+                return config, breakdown
+
+        raise MemoryBudgetError('no cheaper configuration fits the budget of %.3f GB\n%s'
+                                % (budget/1e9, self.report(breakdown)), breakdown)
+
+    def cheaperConfigs(self, config):
+        config = {'retention': dict(config['retention']), 'adjacency': config['adjacency'],
+                  'num_cells': config['num_cells']}
+        config['adjacency'] = 'current'
+        yield dict(config)
+        for keys in [['c', 'f'], ['alpha', 'beta']]:
+            retention = dict(config['retention'])
+            for key in keys:
+                if retention[key] == 'full':
+                    retention[key] = 'current'
+            config['retention'] = retention
+            yield dict(config)
+
+        # coarser grids, starting from the mean points per edge of the current setting
+        points = self.numPoints(config['num_cells'])
+        num_cells = max(int(points/max(self.num_edges, 1)) - 1, 1)
+        while num_cells//2 >= self.min_cells:
+            num_cells = num_cells//2
+            if self.numPoints(num_cells) >= points:
+                break
+            points = self.numPoints(num_cells)
+            config['num_cells'] = num_cells
+            yield dict(config)
+
+        return
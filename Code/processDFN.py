@@ -4,43 +4,297 @@ Created on Thu Aug 26 14:19:22 2021
 @author: kanfar
 """
 import os 
-import re
 import numpy as np
 import mpl_toolkits.mplot3d as a3
 import matplotlib.colors as colors
 import matplotlib.pyplot as plt
 import networkx as nx
-from itertools import combinations
+import events
+import cache
+import ingest
+import intersections
+
+# dfn objects shared by path (see loadDFN)
+loaded = {}
+
+def loadDFN(path, hub=None, use_cache=True):
+    # returns the dfn of path, parsed at most once per process. The graph of a
+    # shared dfn is shared as well: copy it before modifying it
+    key = os.path.abspath(path)
+    if key not in loaded:
+        loaded[key] = dfn(path, hub, use_cache)
+
+    return loaded[key]
+
+def readIntersections(filename):
+    # intersection_list.dat: f1 f2 x y z length per row, returns f1, f2, the
+    # (rows, 3) midpoints and the intersection lengths (see ingest.readIntersectionList)
+    return ingest.readIntersectionList(filename)
+
+def intersectionGraph(f1, f2, coords, length, walls=None):
+    """
+    builds the dfnWorks intersection graph of intersection_list.dat: node i is
+        row i (label str(i), frac [f1, f2], x, y, z, length), nodes on the same
+        fracture are joined pairwise (frac, length between midpoints) and rows
+        on a wall in walls ({f2: label}, default {-3: 's', -5: 't'}) are joined
+        to that boundary node. Node, edge and adjacency order are those of the
+        graph.gml written by dfnWorks, so both give the same simulation.
+
+    """
+    walls = walls if walls is not None else {-3: 's', -5: 't'}
+    num_nodes = len(f1)
+    wall_nodes = list(walls.values())
+
+    # (fracture, node) memberships sorted by fracture then row, wall rows only on f1
+    on_frac = f2 > 0
+    member_frac = np.concatenate((f1, f2[on_frac]))
+    member_node = np.concatenate((np.arange(num_nodes), np.flatnonzero(on_frac)))
+    order = np.lexsort((member_node, member_frac))
+    member_frac, member_node = member_frac[order], member_node[order]
+    fracs, starts, counts = np.unique(member_frac, return_index=True, return_counts=True)
+
+    # every pair of nodes of a fracture, in insertion order
+    u_list, v_list, frac_list = [], [], []
+    pairs = {}
+    for frac, start, count in zip(fracs.tolist(), starts.tolist(), counts.tolist()):
+        if count < 2:
+            continue
+        if count not in pairs:
+            pairs[count] = np.triu_indices(count, 1)
+        nodes = member_node[start:start + count]
+        u_list.append(nodes[pairs[count][0]])
+        v_list.append(nodes[pairs[count][1]])
+        frac_list.append(np.full(len(pairs[count][0]), frac))
+    u = np.concatenate(u_list) if u_list else np.zeros(0, dtype=int)
+    v = np.concatenate(v_list) if v_list else np.zeros(0, dtype=int)
+    frac = np.concatenate(frac_list) if frac_list else np.zeros(0, dtype=int)
+
+    # nodes sharing two fractures are joined twice: keep the first position and
+    # the last fracture, as repeated add_edge calls do
+    key = u*num_nodes + v
+    _, first = np.unique(key, return_index=True)
+    _, last = np.unique(key[::-1], return_index=True)
+    last = len(key) - 1 - last
+    u, v, position, frac = u[first], v[first], first, frac[last]
+    edge_length = np.sqrt(np.sum((coords[u] - coords[v])**2, axis=1))
+
+    # wall edges follow the fracture edges
+    wall_label = np.array([walls.get(value, '') for value in f2.tolist()], dtype=object)
+    wall_rows = np.flatnonzero(wall_label != '')
+
+    # edges in the order of the gml file: by first node, then insertion
+    first_node = np.concatenate((u, wall_rows))
+    edge_position = np.concatenate((position, len(key) + np.arange(len(wall_rows))))
+    num_frac_edges = len(u)
+    order = np.lexsort((edge_position, first_node))
+
+    G = nx.Graph()
+    G.graph['representation'] = 'intersection'
+    f1_list, f2_list = f1.tolist(), f2.tolist()
+    x, y, z = coords.T.tolist()
+    length_list = length.tolist()
+    G.add_nodes_from((str(i), {'frac': [f1_list[i], walls.get(f2_list[i], f2_list[i])],
+                               'x': x[i], 'y': y[i], 'z': z[i], 'length': length_list[i]})
+                     for i in range(num_nodes))
+    G.add_nodes_from(wall_nodes)
+
+    u_list, v_list = u.tolist(), v.tolist()
+    frac_list, edge_length = frac.tolist(), edge_length.tolist()
+    wall_rows = wall_rows.tolist()
+    edges = []
+    for i in order.tolist():
+        if i < num_frac_edges:
+            edges.append((str(u_list[i]), str(v_list[i]),
+                          {'frac': frac_list[i], 'length': edge_length[i],
+                           'perm': 1e-12, 'iperm': 1e12}))
+        else:
+            row = wall_rows[i - num_frac_edges]
+            label = wall_label[row]
+            edges.append((str(row), label, {'frac': label, 'length': 0.0,
+                                            'perm': 1.0, 'iperm': 1.0}))
+    G.add_edges_from(edges)
+
+    return G
+
+class fractureIndex:
+    """
+        fracture -> edges of a graph, built in one pass over the edges and
+        kept up to date by removeEdge. Edges are kept in graph order, wall
+        edges under their 's' / 't' label.
+    """
+
+    def __init__(self, G):
+        self.edges = {}         # frac: {edge key: edge}
+        self.frac = {}          # edge key: frac
+        for u, v, frac in G.edges(data='frac'):
+            self.add((u, v), frac)
+
+        return
+
+    def key(self, edge):
+        return frozenset(edge[:2])
+
+    def add(self, edge, frac):
+        self.edges.setdefault(frac, {})[self.key(edge)] = edge
+        self.frac[self.key(edge)] = frac
+
+        return
+
+    def removeEdge(self, G, edge):
+        # removes edge from G and the index
+        G.remove_edge(edge[0], edge[1])
+        key = self.key(edge)
+        frac = self.frac.pop(key)
+        del self.edges[frac][key]
+
+        return
+
+    def getEdges(self, frac):
+        return list(self.edges.get(frac, {}).values())
+
+    def getFractures(self):
+        # numbered fractures with edges, in increasing order
+        return sorted(frac for frac in self.edges if not isinstance(frac, str))
+
+    def getFracList(self, min_edges=2):
+        # edge lists of the numbered fractures with at least min_edges edges
+        return [list(self.edges[frac].values()) for frac in self.getFractures()
+                if len(self.edges[frac]) >= min_edges]
+
+def overlapEdges(G, frac_list):
+    """
+    returns the edges of G that overlap others on their fracture. The
+        intersections (nodes) of a fracture are projected onto the line they
+        lie along (the principal direction of their x, y, z) and sorted, only
+        edges between consecutive intersections are kept: an edge spanning
+        other intersections is covered by the chain of shorter edges between
+        them. frac_list: list of the edge lists of every fracture.
+        O(k log k) per fracture of k intersections.
+
+    """
+    redundant = []
+    for edge_list in frac_list:
+        nodes = list(dict.fromkeys(node for edge in edge_list for node in edge))
+        if len(nodes) < 3:
+            continue
+        coords = np.array([[G.nodes[node]['x'], G.nodes[node]['y'], G.nodes[node]['z']]
+                           for node in nodes])
+        coords = coords - coords.mean(axis=0)
+        direction = np.linalg.svd(coords, full_matrices=False)[2][0]
+        order = np.argsort(coords @ direction, kind='stable')
+        rank = dict(zip((nodes[i] for i in order), range(len(nodes))))
+        redundant.extend(edge for edge in edge_list if abs(rank[edge[0]] - rank[edge[1]]) != 1)
+
+    return redundant
 
 class dfn:
+    """
+        dfnWorks output of one directory. Files are parsed lazily, on first
+        access of polyCoords, aperture or G (getGraph), so that e.g. counting
+        the fractures does not load the graph.
+
+        The graph is read from graph.gml or built from intersection_list.dat
+        (see intersectionGraph), which gives the same graph without the GML,
+        or from intersections computed from polygons.dat and the domain size
+        (see intersections.intersectionEngine).
+    """
 
     round_dec = 2
 
-    def __init__(self, path):
-        
+    def __init__(self, path, hub=None, use_cache=True, graph_source='auto'):
+        # hub: events.eventHub receiving warnings (default: warnings module)
+        # use_cache: parse the text files once and reuse the binary cache in
+        # path/.dfn_cache while their content is unchanged
+        # graph_source: 'gml', 'intersections', 'polygons' or 'auto' (gml if
+        # graph.gml exists, else intersections)
+        self.events = hub if hub is not None else events.eventHub()
+        self.cache = cache.dfnCache(os.path.join(path, '.dfn_cache')) if use_cache else None
+        
+        self.path = path
         self.poly = path + 'polygons.dat'
         self.alpha = path + 'aperture.dat'
         self.nodeCoords = path + 'intersection_list.dat'
         self.graph = path + 'graph.gml'
         self.domain = path + 'params.txt'
-        self.getPolygonCoords() 
-        self.processGraph()
+        self.graph_source = graph_source
+        self._polyCoords = None
+        self._aperture = None
+        self._G = None
+        self.frac_index = None
 
         return
+
+    @property
+    def polyCoords(self):
+        if self._polyCoords is None:
+            self.getPolygonCoords()
+        return self._polyCoords
+
+    @property
+    def aperture(self):
+        if self._aperture is None:
+            self.getAperture()
+        return self._aperture
+
+    @property
+    def G(self):
+        if self._G is None:
+            self.processGraph()
+        return self._G
         
     def getGraph(self):
         return self.G
 
+    def isCached(self, entry, sources):
+        return self.cache is not None and self.cache.isValid(entry, sources)
+
+    def saveCache(self, entry, sources, arrays=None, G=None):
+        if self.cache is None:
+            return
+        try:
+            if G is not None:
+                self.cache.saveGraph(entry, sources, G)
+            else:
+                self.cache.save(entry, sources, arrays)
+        except OSError as error:
+            self.events.warning('could not write DFN cache: %s' % error)
+            self.cache = None
+
+        return
+
+    def loadGraph(self):
+        source = self.graph_source
+        if source == 'auto':
+            source = 'gml' if os.path.exists(self.graph) else 'intersections'
+        if source == 'gml':
+            entry, sources, parse = 'graph', [self.graph], lambda: nx.read_gml(self.graph)
+        elif source == 'intersections':
+            entry, sources = 'intersection_graph', [self.nodeCoords]
+            parse = lambda: intersectionGraph(*readIntersections(self.nodeCoords))
+        elif source == 'polygons':
+            entry, sources = 'polygon_graph', [self.poly, self.domain]
+            parse = lambda: intersections.intersectionEngine(self.polyCoords,
+                                                             self.getDomainSize()).getGraph()
+        else:
+            raise ValueError('unknown graph source %s' % self.graph_source)
+
+        if self.isCached(entry, sources):
+            return self.cache.loadGraph(entry)
+        G = parse()
+        self.saveCache(entry, sources, G=G)
+
+        return G
+
     def processGraph(self):
         #load graph
-        self.G = nx.read_gml(self.graph)
+        self._G = self.loadGraph()
         self.getAperture()
         self.setAlphaToGraph()
         self.setBetaToGraph()
         self.setCoordstoNodes()
         #self.removeOverlapEdges()
         if nx.is_connected(self.G) == False:
-            print('processed graph is not connected')
+            self.events.warning('processed graph is not connected')
 
         return
     
@@ -57,6 +311,15 @@ class dfn:
         return
 
     def getAperture(self):
+        if self.isCached('aperture', [self.alpha]):
+            self._aperture = np.array(self.cache.load('aperture')[0]['aperture'])
+            return
+        self.parseAperture()
+        self.saveCache('aperture', [self.alpha], {'aperture': self._aperture})
+
+        return
+
+    def parseAperture(self):
         file = open(self.alpha)         
         next(file)  
         lines = file.read()
@@ -67,23 +330,22 @@ class dfn:
         idx_spacing = 4     #from DFN data file
         idx_init = 3        #from DFN data file
         idx = np.arange(idx_init, len(doc), idx_spacing)
-        self.aperture = np.array(file_array[idx])
+        self._aperture = np.array(file_array[idx]).astype(float)
         
         return 
     
     def setAlphaToGraph(self):
         #alpha is aperture of fracture
-        #double check if implementation is correct
         #since aperture is stochastic or constant, order doesn't matter but better be consistent
-        #this is not necessary for fracture graphs since the sequence will be linear but will add the aperture correctly nonetheless
-        edge_key = list(self.G.edges)
-        for key in edge_key:
-            frac_num = self.G.edges[key]['frac']
-            if type(frac_num) == str:               #this is when it's the edges are connected from wall to source or target
-                self.G.edges[key]['alpha'] = 0
+        #edges connected from wall to source or target get 0
+        index = self.getFracIndex()
+        for frac, edges in index.edges.items():
+            if type(frac) == str:
+                alpha = 0
             else:
-                frac_num = frac_num - 1             #-1 because fracture labels start from 1 while aperture list starts from 0
-                self.G.edges[key]['alpha'] = float(self.aperture[frac_num])
+                alpha = float(self.aperture[frac - 1])    #-1 because fracture labels start from 1 while aperture list starts from 0
+            for edge in edges.values():
+                self.G.edges[edge]['alpha'] = alpha
     
         return
 
@@ -112,37 +374,22 @@ class dfn:
         return 
     
     def getPolygonCoords(self):
+        #polyCoords: list of (vertices, 3) arrays, one per fracture
+        if self.isCached('polygons', [self.poly]):
+            arrays, _ = self.cache.load('polygons')
+            coords, offsets = arrays['coords'], arrays['offsets']
+        else:
+            coords, offsets = self.parsePolygons()
+            self.saveCache('polygons', [self.poly], {'coords': coords, 'offsets': offsets})
+        self._polyCoords = [coords[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
 
-        #Can be improved. Problem: too customized for DFN file. 
-        #function: read polygon file and change it into a list of numpy arrays
-        #input: polygon.dat
-        #output: list of numpy arrays. numpy array is a fracture containing numpy arrays of coordinates for the polgyon. 
+        return
 
-        non_poly = 5                                #max number of characters in the delimiter 
-        file = open(self.poly)         
-        next(file)                                  #skip first line
-        lines = file.read()
-        file.close()
-        doc = re.split(' {|}',lines)                #remove some delimeters 
-        str_list = list(filter(None, doc))          #filter empty elements
-        str_list.pop()                              #remove last element in list which is double space in polygons.dat file
-
-        #change string list of coordinates for each fracture into elements in numpy array
-        lst = []
-        counter = -1 
-        i = 0
-            
-        while i < len(str_list):
-            if len(str_list[i]) < non_poly:
-                counter = counter + 1
-                i = i + 1
-                lst.append([])
-            lst[counter].append(np.asarray(re.split(',',str_list[i]), 'float'))
-            i = i + 1
-    
-        self.polyCoords = lst
-    
-        return 
+    def parsePolygons(self):
+        #vertex coordinates of all fractures (vertices, 3) and the offsets of every fracture
+        coords, offsets, _ = ingest.readPolygons(self.poly)
+
+        return coords, offsets
         
     def getCoordsfromDic(self, keys):
         x = self.G.nodes[keys]['x']
@@ -214,94 +461,23 @@ class dfn:
         num_frac = len(self.polyCoords)
         return num_frac
     
+    def getFracIndex(self):
+        if self.frac_index is None:
+            self.frac_index = fractureIndex(self.G)
+        return self.frac_index
+
     def getEdgesOnSameFrac(self):
-        #returns list of lists: each list is a fracture polygon and it contains a list of all edges in that fracture
-        frac_list = []
-        num_frac = len(self.polyCoords)
-        
-        frac = 1
-        while frac <= num_frac:
-            edge_list = []
-            for edge in list(self.G.edges):
-                if self.G.edges[edge]['frac'] == frac:
-                    edge_list.append(edge)
-            if len(edge_list) > 1: #why
-                frac_list.append(edge_list)
-            frac = frac + 1
-    
-        return frac_list
+        #returns list of lists: each list is a fracture polygon with more than one edge and it contains a list of all edges in that fracture
+        return self.getFracIndex().getFracList()
     
     
     def getRedundantEdges(self, frac_list):
-        #rounding disclaimer
-        redundant_list = []
-        for edge_list in frac_list:
-            #edge_list are all edges in a single fracture
-            all_edge_comb_list = self.getAllEdgeCombinations(edge_list)
-            all_length_comb_list = self.getAllEdgeCombinationLengths(all_edge_comb_list)
-            redundant_list.extend(self.getEdgesToRemove(all_length_comb_list, edge_list))
-
-        return redundant_list
-    
+        return overlapEdges(self.G, frac_list)
 
-    def getAllEdgeCombinations(self, edge_list):
-        #all combination of edges of 2 edges and above
-        edge_combinations = sum([list(map(list, combinations(edge_list, i))) for i in range(2, len(edge_list) + 1)], [])
-        
-        return edge_combinations
-    
-    def getAllEdgeCombinationLengths(self, edge_list):
-        length_lst = []
-        for lst in edge_list:
-            total_sum = 0
-            for edge in lst:
-                total_sum = total_sum + self.G.edges[edge]['length']
-            length_lst.append(total_sum)
-        length_lst = set(length_lst)
-        length_lst = list(length_lst)
-        
-        return length_lst
-    
-    
-    def getEdgesToRemove(self, length_lst, edge_list):
-        redundant_lst = []
-        all_edge_lengths = []
-        for edge in edge_list:
-            for length in length_lst:
-                if np.round(self.G.edges[edge]['length'], self.round_dec) == np.round(length, self.round_dec):
-                    redundant_lst.append(edge)
-
-            all_edge_lengths.append(self.G.edges[edge]['length'])
-        redundant_lst = set(redundant_lst) #because of rounding, one edge can be same length as many lengths and is readded to the list
-        redundant_lst = list(redundant_lst)
-        self.checkRedundantEdges(edge_list, redundant_lst, all_edge_lengths, length_lst)
-        
-        return redundant_lst
-    
-    def checkRedundantEdges(self, edge_list, redundant_lst, all_edge_lengths, length_lst):
-        #remove redundant edges from the fracture
-        for edge in redundant_lst:
-            edge_list.remove(edge) 
-        
-        #add all lengths of kept edges
-        sum_keep_list = 0 
-        for edge in edge_list:
-            sum_keep_list = sum_keep_list + self.G.edges[edge]['length']
-           
-        #kept edges must add to total fracture length (max)
-        max_length = max(all_edge_lengths)
-        if np.round(max_length, self.round_dec) != np.round(sum_keep_list, self.round_dec):
-            #print('comb lengths', length_lst)
-            print('redund. edges', redundant_lst)
-            print('all lengths', all_edge_lengths)
-            print('kept edges', edge_list)
-            print('error processing graph: non-overlapping edge removed')
-        
-        return
-    
     def removeEdges(self, edges_list):
+        index = self.getFracIndex()
         for edge in edges_list:
-            self.G.remove_edge(edge[0], edge[1])
+            index.removeEdge(self.G, edge)
         
         return
     
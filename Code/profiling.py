@@ -0,0 +1,141 @@
+"""
+Created on Mon Oct 19 21:04:51 2026
+
+Named timing spans, counters and peak memory samples for graph dissolution
+runs, exported as JSON or CSV.
+"""
+
+import csv
+import json
+import time
+
+try:
+    import resource
+except ImportError:                       # not available on Windows
+    resource = None
+
+
+class nullSpan:
+    # shared no-op context manager of a disabled profiler
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+class nullProfiler:
+    """
+        Disabled profiler: every call is a no-op, so instrumented code costs
+        one method call per span or counter.
+    """
+
+    enabled = False
+    null_span = nullSpan()
+
+    def span(self, name):
+        return self.null_span
+
+    def count(self, name, n=1):
+        return
+
+    def sampleMemory(self, label):
+        return
+
+
+class timedSpan:
+
+    def __init__(self, prof, name):
+        self.prof = prof
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.prof.addTime(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class profiler:
+    """
+        Accumulates wall time and calls per named span, counters and peak
+        resident memory samples (ru_maxrss, MB) taken at span exits of
+        sample_spans and on sampleMemory calls.
+    """
+
+    enabled = True
+
+    def __init__(self, sample_spans=(), listener=None):
+        # listener(name, seconds) is called at the end of every span
+        self.spans = {}
+        self.counters = {}
+        self.memory = []
+        self.sample_spans = set(sample_spans)
+        self.listener = listener
+        self.start = time.perf_counter()
+
+        return
+
+    def span(self, name):
+        return timedSpan(self, name)
+
+    def addTime(self, name, seconds):
+        total, calls = self.spans.get(name, (0.0, 0))
+        self.spans[name] = (total + seconds, calls + 1)
+        if name in self.sample_spans:
+            self.sampleMemory(name)
+        if self.listener is not None:
+            self.listener(name, seconds)
+
+        return
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+        return
+
+    def peakMemory(self):
+        # peak resident set size of the process in MB (None if unavailable)
+        if resource is None:
+            return None
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss/1024
+
+    def sampleMemory(self, label):
+        self.memory.append({'label': label,
+                            'time': time.perf_counter() - self.start,
+                            'peak_rss_mb': self.peakMemory()})
+
+        return
+
+    def summary(self):
+        spans = {name: {'total_s': total, 'calls': calls, 'mean_s': total/calls}
+                 for name, (total, calls) in self.spans.items()}
+
+        return {'wall_s': time.perf_counter() - self.start,
+                'peak_rss_mb': self.peakMemory(),
+                'spans': spans,
+                'counters': dict(self.counters),
+                'memory': list(self.memory)}
+
+    def export(self, filename):
+        # .json: full summary, .csv: one row per span, counter and memory sample
+        summary = self.summary()
+        if filename.endswith('.csv'):
+            with open(filename, 'w', newline='') as file:
+                out = csv.writer(file)
+                out.writerow(['kind', 'name', 'value', 'calls', 'mean_s'])
+                out.writerow(['wall', 'run', summary['wall_s'], '', ''])
+                for name, span in summary['spans'].items():
+                    out.writerow(['span', name, span['total_s'], span['calls'], span['mean_s']])
+                for name, value in summary['counters'].items():
+                    out.writerow(['counter', name, value, '', ''])
+                for sample in summary['memory']:
+                    out.writerow(['peak_rss_mb', sample['label'], sample['peak_rss_mb'],
+                                  '', sample['time']])
+        else:
+            with open(filename, 'w') as file:
+                json.dump(summary, file, indent=2)
+
+        return
@@ -0,0 +1,295 @@
+"""
+Created on Mon Oct 19 18:10:07 2026
+
+Chunked on-disk store for graph dissolution results, written incrementally
+during the run and read back by time range and edge subset.
+"""
+
+import os
+import json
+
+import numpy as np
+
+
+class resultStore:
+    """
+        Results keyed by (epoch, edge, time step). Every epoch (graph between
+        mapper runs) is a directory with meta.json, the edge grids and one
+        directory per field holding chunks of edge_chunk edges x time_chunk
+        time steps. Chunks are .npy files read with memory mapping, or .npz
+        files when compress=True (then only the chunks needed are loaded).
+
+        Fields and rows per edge:
+            'Q'                           1 (flow of the step)
+            'c', 'f'                      grid cells (profiles of the step)
+            'alpha', 'beta'               grid cells (apertures after the step)
+            'head'                        node field, one block of all nodes
+    """
+
+    cell_fields = ['alpha', 'beta', 'c', 'f']
+    edge_fields = ['Q']
+    node_fields = ['head']
+
+    def __init__(self, path, mode='r', compress=False, time_chunk=64, edge_chunk=256):
+        self.path = path
+        self.mode = mode
+        self.compress = compress
+        self.time_chunk = time_chunk
+        self.edge_chunk = edge_chunk
+
+        self.meta = {}
+        self.buffers = {}
+        if mode == 'w':
+            os.makedirs(path, exist_ok=True)
+
+        return
+
+    #### writing
+
+    def epochPath(self, epoch):
+        return os.path.join(self.path, 'epoch_%d' % epoch)
+
+    def hasEpoch(self, epoch):
+        return epoch in self.meta
+
+    def startEpoch(self, epoch, t0, nodes, edges, x_list):
+        # nodes: node labels, edges: (u, v) label pairs, x_list: grid of every edge
+        epoch_path = self.epochPath(epoch)
+        os.makedirs(epoch_path, exist_ok=True)
+
+        node_idx = {node: i for i, node in enumerate(nodes)}
+        num_cells = np.array([len(x) for x in x_list], dtype=int)
+        offsets = np.concatenate(([0], np.cumsum(num_cells)))
+        np.save(os.path.join(epoch_path, 'x.npy'), np.concatenate(x_list))
+        np.save(os.path.join(epoch_path, 'offsets.npy'), offsets)
+
+        self.meta[epoch] = {'epoch': epoch, 't0': t0, 'num_t': 0,
+                            'nodes': list(nodes),
+                            'edges': [[node_idx[u], node_idx[v]] for u, v in edges],
+                            'time_chunk': self.time_chunk, 'edge_chunk': self.edge_chunk,
+                            'compress': self.compress, 'fields': []}
+        self.buffers[epoch] = {'offsets': offsets, 'x': list(x_list), 'fields': {},
+                               'chunk': 0, 'pos': 0}
+        self.writeMeta(epoch)
+
+        return
+
+    def writeMeta(self, epoch):
+        with open(os.path.join(self.epochPath(epoch), 'meta.json'), 'w') as file:
+            json.dump(self.meta[epoch], file)
+
+        return
+
+    def writeStep(self, epoch, t_step, fields, x_list=None):
+        # fields: {name: values}, cell fields as one array per edge in startEpoch
+        # order, 'Q' as one value per edge and 'head' as one value per node.
+        # x_list: present grid of every edge if it can differ from startEpoch
+        # Steps of an epoch are written consecutively from t0
+        meta = self.meta[epoch]
+        buffer = self.buffers[epoch]
+        idx = t_step - meta['t0']
+        if idx != meta['num_t'] + buffer['pos']:
+            raise ValueError('epoch %d: expected time step %d, got %d'
+                             % (epoch, meta['t0'] + meta['num_t'] + buffer['pos'], t_step))
+
+        for name, values in fields.items():
+            if name not in buffer['fields']:
+                rows = self.numRows(epoch, name)
+                buffer['fields'][name] = np.zeros((rows, self.time_chunk))
+                if name not in meta['fields']:
+                    meta['fields'].append(name)
+            if name in self.cell_fields:
+                values = self.toCells(epoch, values, x_list)
+            buffer['fields'][name][:, buffer['pos']] = values
+
+        buffer['pos'] += 1
+        if buffer['pos'] == self.time_chunk:
+            self.flushEpoch(epoch)
+
+        return
+
+    def numRows(self, epoch, name):
+        if name in self.cell_fields:
+            return self.buffers[epoch]['offsets'][-1]
+        elif name in self.node_fields:
+            return len(self.meta[epoch]['nodes'])
+        return len(self.meta[epoch]['edges'])
+
+    def toCells(self, epoch, values, x_list=None):
+        # concatenates per edge profiles, edges whose grid changed within the epoch
+        # (hybrid fidelity) are interpolated onto their grid at the start of the epoch
+        x_start = self.buffers[epoch]['x']
+        if x_list is None:
+            x_list = x_start
+        cells = []
+        for x, x_now, value in zip(x_start, x_list, values):
+            if x_now is not x and (len(x_now) != len(x) or np.any(x_now != x)):
+                value = np.interp(x, x_now, value)
+            cells.append(value)
+
+        return np.concatenate(cells)
+
+    def flushEpoch(self, epoch):
+        # writes the buffered time chunk of every field
+        meta = self.meta[epoch]
+        buffer = self.buffers[epoch]
+        pos = buffer['pos']
+        if pos == 0:
+            return
+
+        for name, values in buffer['fields'].items():
+            field_path = os.path.join(self.epochPath(epoch), name)
+            os.makedirs(field_path, exist_ok=True)
+            for block, (start, stop) in enumerate(self.blockRows(epoch, name)):
+                self.saveChunk(os.path.join(field_path, self.chunkName(block, buffer['chunk'])),
+                               values[start:stop, :pos])
+
+        meta['num_t'] += pos
+        buffer['chunk'] += 1
+        buffer['pos'] = 0
+        self.writeMeta(epoch)
+
+        return
+
+    def saveChunk(self, filename, values):
+        if self.compress:
+            np.savez_compressed(filename + '.npz', data=values)
+        else:
+            np.save(filename + '.npy', np.ascontiguousarray(values))
+
+        return
+
+    def flush(self):
+        for epoch in self.buffers:
+            self.flushEpoch(epoch)
+
+        return
+
+    def close(self):
+        if self.mode == 'w':
+            self.flush()
+
+        return
+
+    #### reading
+
+    def getEpochs(self):
+        epochs = [int(name.split('_')[1]) for name in os.listdir(self.path)
+                  if name.startswith('epoch_')]
+
+        return sorted(epochs)
+
+    def getMeta(self, epoch):
+        if epoch not in self.meta or self.mode == 'r':
+            with open(os.path.join(self.epochPath(epoch), 'meta.json')) as file:
+                self.meta[epoch] = json.load(file)
+
+        return self.meta[epoch]
+
+    def getEdges(self, epoch):
+        meta = self.getMeta(epoch)
+        nodes = meta['nodes']
+
+        return [(nodes[u], nodes[v]) for u, v in meta['edges']]
+
+    def getGrid(self, epoch, edge):
+        offsets = np.load(os.path.join(self.epochPath(epoch), 'offsets.npy'))
+        i = self.edgeIndex(epoch)[edge]
+
+        return np.load(os.path.join(self.epochPath(epoch), 'x.npy'),
+                       mmap_mode='r')[offsets[i]:offsets[i + 1]]
+
+    def edgeIndex(self, epoch):
+        # edge position for both orientations, edges are directed by flow during the run
+        edge_idx = {}
+        for i, (u, v) in enumerate(self.getEdges(epoch)):
+            edge_idx[(u, v)] = i
+            edge_idx[(v, u)] = i
+
+        return edge_idx
+
+    def chunkName(self, block, chunk):
+        return 'e%05d_t%05d' % (block, chunk)
+
+    def blockRows(self, epoch, name):
+        # (start, stop) rows of every edge block of a field
+        if name in self.node_fields:
+            return [(0, len(self.meta[epoch]['nodes']))]
+
+        num_edges = len(self.meta[epoch]['edges'])
+        bounds = list(range(0, num_edges, self.meta[epoch]['edge_chunk'])) + [num_edges]
+        if name in self.cell_fields:
+            offsets = np.load(os.path.join(self.epochPath(epoch), 'offsets.npy'))
+            bounds = [offsets[i] for i in bounds]
+
+        return list(zip(bounds[:-1], bounds[1:]))
+
+    def loadChunk(self, epoch, name, block, chunk):
+        filename = os.path.join(self.epochPath(epoch), name, self.chunkName(block, chunk))
+        if self.getMeta(epoch)['compress']:
+            with np.load(filename + '.npz') as data:
+                return data['data']
+
+        return np.load(filename + '.npy', mmap_mode='r')
+
+    def read(self, name, epoch, t_start=None, t_stop=None, edges=None):
+        """
+        reads field name of an epoch for time steps [t_start, t_stop) (absolute,
+            default the whole epoch) and a subset of edges (default all).
+            Only the chunks overlapping the request are opened.
+            returns the time steps and
+                cell fields: {edge: (cells, time) array}
+                'Q': (edges, time) array
+                'head': (nodes, time) array, edges is ignored
+
+        """
+        meta = self.getMeta(epoch)
+        t0 = meta['t0']
+        time_chunk = meta['time_chunk']
+        t_start = t0 if t_start is None else max(t_start, t0)
+        t_stop = t0 + meta['num_t'] if t_stop is None else min(t_stop, t0 + meta['num_t'])
+        t_steps = np.arange(t_start, t_stop)
+        first, last = t_start - t0, t_stop - t0
+        chunks = range(first//time_chunk, (last - 1)//time_chunk + 1)
+
+        if name in self.node_fields:
+            parts = [self.loadChunk(epoch, name, 0, chunk) for chunk in chunks]
+            values = self.sliceTime(parts, chunks, first, last, time_chunk)
+            return t_steps, values
+
+        all_edges = self.getEdges(epoch)
+        edge_idx = self.edgeIndex(epoch)
+        keys = all_edges if edges is None else list(edges)
+        idx_list = [edge_idx[edge] for edge in keys]
+        edge_chunk = meta['edge_chunk']
+        block_rows = self.blockRows(epoch, name)
+        if name in self.cell_fields:
+            offsets = np.load(os.path.join(self.epochPath(epoch), 'offsets.npy'))
+
+        blocks = {}
+        result = {} if name in self.cell_fields else []
+        for key, i in zip(keys, idx_list):
+            block = i//edge_chunk
+            if block not in blocks:
+                parts = [self.loadChunk(epoch, name, block, chunk) for chunk in chunks]
+                blocks[block] = self.sliceTime(parts, chunks, first, last, time_chunk)
+            start = block_rows[block][0]
+            if name in self.cell_fields:
+                rows = slice(offsets[i] - start, offsets[i + 1] - start)
+                result[key] = blocks[block][rows]
+            else:
+                result.append(blocks[block][i - block*edge_chunk])
+
+        if name not in self.cell_fields:
+            result = np.array(result).reshape(len(idx_list), len(t_steps))
+
+        return t_steps, result
+
+    def sliceTime(self, parts, chunks, first, last, time_chunk):
+        # joins the time chunks of one block and cuts them to [first, last)
+        if last <= first:
+            return parts[0][:, :0] if parts else np.zeros((0, 0))
+        start = first - chunks[0]*time_chunk
+        values = np.concatenate(parts, axis=1) if len(parts) > 1 else parts[0]
+
+        return values[:, start:start + last - first]
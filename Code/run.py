@@ -1,6 +1,7 @@
 from dgd import crack, graph
 import numpy as np 
 from processDFN import dfn
+import events
 import os
 
 def crackDiss():
@@ -14,6 +15,7 @@ def crackDiss():
     
     #run crackDiss
     diss = crack(num_years, dt)
+    diss.addObserver(events.progressObserver())
     grid = diss.crackDiss(length, init_alpha, init_beta, hgrad)
 
     #plot results
@@ -24,12 +26,15 @@ def crackDiss():
 
 def graphDiss():
     path = os.getcwd() + '/data/'
-    G = dfn(path).getGraph()
+    network = dfn(path)
     
     num_years = 10
     dt = 1
     
-    diss_graph = graph(num_years, dt, G, path).graphDiss()
+    diss = graph(num_years, dt, network)
+    diss.addObserver(events.progressObserver())
+    diss.addObserver(events.printObserver())
+    diss_graph = diss.graphDiss()
     
     return diss_graph
     
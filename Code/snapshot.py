@@ -0,0 +1,163 @@
+"""
+Created on Mon Oct 19 17:05:32 2026
+
+Compact snapshots of the dissolution graph kept in graph.graph_list, one per
+mapper epoch, instead of live networkx graphs.
+"""
+
+import numpy as np
+import networkx as nx
+
+
+class graphSnapshot:
+    """
+        Topology as node index arrays (u, v), node coordinates, and the edge
+        state of one epoch restricted to its time window [t0, t_end).
+        Per-edge arrays are concatenated along the grid with offsets, dense
+        nodes x nodes x time adjacency arrays are stored as edge values.
+        toGraph rebuilds a networkx graph whose edge arrays are views into
+        the snapshot.
+    """
+
+    adj_keys = ['1/R_adj', 'Hgrad_adj', 'Q_adj']
+    edge_fields = ['alpha', 'beta', 'c', 'f']
+
+    def __init__(self, G, t_end, current=(), epoch=0, share=False):
+        # G: graph of the epoch, t_end: first time step not computed on G
+        # current: fields kept as current state only (graph.currentFields)
+        # share: G was allocated up to t_end (end of the run), its edge and node
+        # arrays are replaced field by field by views into the snapshot, so the
+        # two never hold a full copy of the state each
+        self.epoch = epoch
+        self.t0 = G.graph.get('t0', 0)
+        self.t_end = t_end
+        self.directed = G.is_directed()
+        num_t = t_end - self.t0
+
+        self.nodes = list(G.nodes)
+        node_idx = {node: i for i, node in enumerate(self.nodes)}
+        edges = list(G.edges)
+        self.u = np.array([node_idx[edge[0]] for edge in edges], dtype=int)
+        self.v = np.array([node_idx[edge[1]] for edge in edges], dtype=int)
+
+        self.storeNodes(G, num_t, share)
+        self.storeEdges(G, edges, num_t, current, share)
+        self.storeGraph(G, num_t)
+
+        return
+
+    def storeNodes(self, G, num_t, share=False):
+        self.coords = np.full((len(self.nodes), 3), np.nan)
+        self.has_xyz = np.zeros(len(self.nodes), dtype=bool)
+        self.node_attrs = []
+        for i, node in enumerate(self.nodes):
+            data = G.nodes[node]
+            attrs = {key: value for key, value in data.items() if key != 'head'}
+            if all(key in data for key in ['x', 'y', 'z']):
+                self.coords[i] = [data['x'], data['y'], data['z']]
+                self.has_xyz[i] = True
+                for key in ['x', 'y', 'z']:
+                    attrs.pop(key)
+            self.node_attrs.append(attrs)
+
+        if all('head' in G.nodes[node] for node in self.nodes):
+            self.head = np.array([G.nodes[node]['head'][:num_t] for node in self.nodes])
+            if share:
+                for i, node in enumerate(self.nodes):
+                    G.nodes[node]['head'] = self.head[i]
+        else:
+            self.head = None
+
+        return
+
+    def storeEdges(self, G, edges, num_t, current, share=False):
+        self.edge_attrs = []
+        for edge in edges:
+            data = G.edges[edge]
+            self.edge_attrs.append({key: value for key, value in data.items()
+                                    if key not in self.edge_fields + ['x', 'Q']})
+
+        x_list = [G.edges[edge]['x'] for edge in edges]
+        self.num_cells = np.array([len(x) for x in x_list], dtype=int)
+        self.offsets = np.concatenate(([0], np.cumsum(self.num_cells)))
+        self.x = np.concatenate(x_list) if edges else np.zeros(0)
+
+        self.fields = {}
+        for key in self.edge_fields:
+            if key in current:
+                cols = slice(None)
+            elif key in ['alpha', 'beta']:
+                cols = slice(0, num_t + 1)
+            else:
+                cols = slice(0, num_t)
+            if edges:
+                self.fields[key] = np.concatenate([G.edges[edge][key][:, cols] for edge in edges])
+                if share:
+                    self.shareField(G, edges, key, self.fields[key])
+        self.Q = np.array([G.edges[edge]['Q'][:num_t] for edge in edges])
+        if share:
+            self.shareField(G, edges, 'x', self.x)
+            for i, edge in enumerate(edges):
+                G.edges[edge]['Q'] = self.Q[i]
+
+        return
+
+    def shareField(self, G, edges, key, values):
+        # edge arrays of key in G become views into the concatenated values
+        for i, edge in enumerate(edges):
+            G.edges[edge][key] = values[self.offsets[i]:self.offsets[i + 1]]
+
+        return
+
+    def storeGraph(self, G, num_t):
+        self.graph_attrs = {key: value for key, value in G.graph.items()
+                            if key not in self.adj_keys + ['scenario_head']}
+        # adjacency arrays are symmetric with nonzeros on edges only
+        self.edge_adj = {key: G.graph[key][self.u, self.v, :num_t]
+                         for key in self.adj_keys if key in G.graph}
+        self.scenario_head = {name: head[:, :num_t]
+                              for name, head in G.graph.get('scenario_head', {}).items()}
+
+        return
+
+    def nbytes(self):
+        arrays = [self.u, self.v, self.coords, self.x, self.Q]
+        arrays += list(self.fields.values()) + list(self.edge_adj.values())
+        arrays += list(self.scenario_head.values())
+        if self.head is not None:
+            arrays.append(self.head)
+
+        return sum(array.nbytes for array in arrays)
+
+    def toGraph(self, adjacency=False):
+        # rebuilds the networkx graph of the epoch, edge and node arrays are views
+        # adjacency: also rebuild the dense nodes x nodes x time adjacency arrays
+        G = nx.DiGraph() if self.directed else nx.Graph()
+        G.graph.update(self.graph_attrs)
+        G.graph['t_end'] = self.t_end
+        G.graph['scenario_head'] = dict(self.scenario_head)
+        if adjacency:
+            for key, values in self.edge_adj.items():
+                adj = np.zeros((len(self.nodes), len(self.nodes), values.shape[1]))
+                adj[self.u, self.v] = values
+                adj[self.v, self.u] = values
+                G.graph[key] = adj
+
+        for i, node in enumerate(self.nodes):
+            attrs = dict(self.node_attrs[i])
+            if self.has_xyz[i]:
+                attrs['x'], attrs['y'], attrs['z'] = self.coords[i]
+            if self.head is not None:
+                attrs['head'] = self.head[i]
+            G.add_node(node, **attrs)
+
+        for i in range(len(self.u)):
+            start, end = self.offsets[i], self.offsets[i + 1]
+            attrs = dict(self.edge_attrs[i])
+            attrs['x'] = self.x[start:end]
+            attrs['Q'] = self.Q[i]
+            for key, values in self.fields.items():
+                attrs[key] = values[start:end]
+            G.add_edge(self.nodes[self.u[i]], self.nodes[self.v[i]], **attrs)
+
+        return G
@@ -0,0 +1,199 @@
+"""
+Created on Mon Oct 19 23:02:13 2026
+
+Synthetic discrete fracture networks written in the dfnWorks file set read
+by processDFN.dfn (polygons.dat, aperture.dat, intersection_list.dat,
+graph.gml, params.txt), for benchmarking at arbitrary network size.
+"""
+
+import os
+
+import numpy as np
+import networkx as nx
+
+import ingest
+import intersections
+import processDFN
+
+
+class synthDFN:
+    """
+        Square fractures with uniformly distributed centers in a box domain
+        centered at the origin, truncated at the domain walls. Flow goes from
+        the x = -domain[0]/2 wall (source 's', face -3) to the x = domain[0]/2
+        wall (target 't', face -5). Only the fractures connected to both walls
+        are kept and renumbered 1..n, as dfnWorks does with isolated clusters.
+
+        num_frac        fractures generated before isolated ones are removed
+        domain          box size (x, y, z)
+        density         P32 (fracture area per domain volume), sets the size
+        size            fracture side length when density is None
+        orientation     'uniform' (random normals) or 'fisher' around pole
+        kappa, pole     Fisher concentration and mean normal
+        aperture        'constant' or 'lognormal' (aperture_mean, aperture_sigma)
+        prune           also removes dead-end and stagnant fractures, keeping
+                        those on a simple path from wall to wall
+    """
+
+    def __init__(self, num_frac, domain=(150, 150, 150), density=None, size=30.0,
+                 orientation='uniform', kappa=10.0, pole=(1.0, 0.0, 0.0),
+                 aperture='constant', aperture_mean=0.03, aperture_sigma=0.5, prune=True, seed=0):
+        self.num_frac = num_frac
+        self.domain = np.asarray(domain, dtype=float)
+        self.volume = np.prod(self.domain)
+        if density is not None:
+            size = np.sqrt(density*self.volume/num_frac)
+        self.size = size
+        self.orientation = orientation
+        self.kappa = kappa
+        self.pole = np.asarray(pole, dtype=float)/np.linalg.norm(pole)
+        self.aperture = aperture
+        self.aperture_mean = aperture_mean
+        self.aperture_sigma = aperture_sigma
+        self.prune = prune
+        self.rng = np.random.default_rng(seed)
+
+        return
+
+    #### fractures
+
+    def getNormals(self, n):
+        if self.orientation == 'uniform':
+            normals = self.rng.normal(size=(n, 3))
+        elif self.orientation == 'fisher':
+            # Fisher distribution around the z axis rotated to the pole
+            u = self.rng.random(n)
+            cos_t = 1 + np.log(u + (1 - u)*np.exp(-2*self.kappa))/self.kappa
+            sin_t = np.sqrt(np.clip(1 - cos_t**2, 0, None))
+            phi = 2*np.pi*self.rng.random(n)
+            local = np.column_stack((sin_t*np.cos(phi), sin_t*np.sin(phi), cos_t))
+            normals = local @ self.rotationTo(self.pole).T
+        else:
+            raise ValueError('unknown orientation distribution %s' % self.orientation)
+
+        return normals/np.linalg.norm(normals, axis=1)[:, None]
+
+    def rotationTo(self, pole):
+        # rotation matrix taking the z axis to pole
+        z = np.array([0.0, 0.0, 1.0])
+        v = np.cross(z, pole)
+        c = np.dot(z, pole)
+        if np.linalg.norm(v) < 1e-12:
+            return np.eye(3) if c > 0 else np.diag([1.0, -1.0, -1.0])
+        vx = np.array([[0, -v[2], v[1]], [v[2], 0, -v[0]], [-v[1], v[0], 0]])
+
+        return np.eye(3) + vx + vx @ vx/(1 + c)
+
+    def getApertures(self, n):
+        if self.aperture == 'constant':
+            return np.full(n, self.aperture_mean)
+        elif self.aperture == 'lognormal':
+            mu = np.log(self.aperture_mean) - 0.5*self.aperture_sigma**2
+            return self.rng.lognormal(mu, self.aperture_sigma, n)
+        raise ValueError('unknown aperture distribution %s' % self.aperture)
+
+    def getFractures(self):
+        # square polygons truncated to the domain, list of (vertices, normal)
+        centers = (self.rng.random((self.num_frac, 3)) - 0.5)*self.domain
+        normals = self.getNormals(self.num_frac)
+        half = 0.5*self.size
+
+        polygons = []
+        for center, normal in zip(centers, normals):
+            # in-plane axes with a random rotation about the normal
+            a = np.cross(normal, self.rng.normal(size=3))
+            a = a/np.linalg.norm(a)
+            b = np.cross(normal, a)
+            vertices = center + half*np.array([a + b, -a + b, -a - b, a - b])
+            vertices = self.clipToDomain(vertices)
+            if len(vertices) >= 3:
+                polygons.append((vertices, normal))
+
+        return polygons
+
+    def clipToDomain(self, vertices):
+        return intersections.clipToBox(vertices, 0.5*self.domain)
+
+    #### intersections
+
+    def getIntersections(self, polygons):
+        # rows (f1, f2, midpoint, length) with 0-based fracture indices, f2 -3/-5 for walls
+        engine = intersections.intersectionEngine([vertices for vertices, _ in polygons],
+                                                  self.domain)
+        f1, f2, coords, length = engine.getIntersections()
+        f1 = f1 - 1
+        f2 = np.where(f2 > 0, f2 - 1, f2)
+
+        return list(zip(f1.tolist(), f2.tolist(), coords, length.tolist()))
+
+    #### network
+
+    def keepConnected(self, polygons, rows):
+        # fractures of the cluster touching both walls (0-based)
+        f1 = np.array([row[0] for row in rows], dtype=int) + 1
+        f2 = np.array([row[1] for row in rows], dtype=int)
+        f2 = np.where(f2 >= 0, f2 + 1, f2)
+        try:
+            keep = ingest.connectedFractures(len(polygons), f1, f2, {-3: 's', -5: 't'}, self.prune)
+        except ValueError:
+            raise ValueError('synthetic DFN does not connect the source and target walls, '
+                             'increase num_frac, density or size')
+
+        return [frac - 1 for frac in keep]
+
+    def generate(self):
+        """
+        generates the network. returns
+            polygons: list of (vertices, normal), fractures 1..n
+            apertures: (n,) array
+            rows: intersections (f1, f2, midpoint, length), 1-based fractures,
+                f2 -3 (source wall) or -5 (target wall), sorted by f1 then f2
+                with wall intersections last
+
+        """
+        polygons = self.getFractures()
+        rows = self.getIntersections(polygons)
+        keep = self.keepConnected(polygons, rows)
+        new_id = {old: new + 1 for new, old in enumerate(keep)}
+
+        polygons = [polygons[old] for old in keep]
+        apertures = self.getApertures(len(polygons))
+        kept_rows = []
+        for f1, f2, midpoint, length in rows:
+            if f1 not in new_id or (f2 >= 0 and f2 not in new_id):
+                continue
+            f1 = new_id[f1]
+            f2 = new_id[f2] if f2 >= 0 else f2
+            if f2 >= 0 and f2 < f1:
+                f1, f2 = f2, f1
+            kept_rows.append((f1, f2, midpoint, length))
+        kept_rows.sort(key=lambda row: (row[0], row[1] < 0, abs(row[1])))
+
+        return polygons, apertures, kept_rows
+
+    def buildGraph(self, rows):
+        # intersection graph: nodes are intersections, edges join intersections on
+        # the same fracture, wall intersections are joined to 's' or 't'
+        f1 = np.array([row[0] for row in rows], dtype=int)
+        f2 = np.array([row[1] for row in rows], dtype=int)
+        coords = np.array([row[2] for row in rows], dtype=float).reshape(-1, 3)
+        length = np.array([row[3] for row in rows], dtype=float)
+
+        return processDFN.intersectionGraph(f1, f2, coords, length)
+
+    def write(self, path):
+        # writes the dfnWorks file set to directory path, returns the graph
+        polygons, apertures, rows = self.generate()
+        f1 = np.array([row[0] for row in rows], dtype=int)
+        f2 = np.array([row[1] for row in rows], dtype=int)
+        coords = np.array([row[2] for row in rows], dtype=float).reshape(-1, 3)
+        length = np.array([row[3] for row in rows], dtype=float)
+        ingest.writeDFN(path, [vertices for vertices, _ in polygons], apertures,
+                        f1, f2, coords, length, self.domain)
+
+        # from the written table, so that graph.gml and intersection_list.dat agree
+        G = processDFN.intersectionGraph(*processDFN.readIntersections(
+            os.path.join(path, 'intersection_list.dat')))
+        nx.write_gml(G, os.path.join(path, 'graph.gml'))
+
+        return G
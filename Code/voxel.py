@@ -0,0 +1,211 @@
+"""
+Created on Tue Oct 20 02:14:37 2026
+
+Voxelization of the dissolved edges for the mapper point cloud: every edge is a
+chain of rectangular prisms along its axis, half-widths alpha and beta
+interpolated between its grid points, rasterized on a global lattice of voxel
+centers (integer multiples of the voxel size). voxelGrid keeps the occupancy
+across mapper runs and updates only the edges that changed.
+"""
+
+import numpy as np
+
+
+# lattice keys are packed into one int64, KEY_BITS bits per axis
+KEY_BITS = 21
+KEY_OFFSET = 1 << (KEY_BITS - 1)
+
+
+def packKeys(keys):
+    # int64 codes of lattice keys (points, 3), raises ValueError beyond +-KEY_OFFSET voxels
+    keys = np.asarray(keys, dtype=np.int64).reshape(-1, 3) + KEY_OFFSET
+    if keys.size and (keys.min() < 0 or keys.max() >= 2*KEY_OFFSET):
+        raise ValueError('voxel lattice beyond %d voxels from the origin, increase the voxel size'
+                         % KEY_OFFSET)
+
+    return (keys[:, 0] << 2*KEY_BITS) | (keys[:, 1] << KEY_BITS) | keys[:, 2]
+
+
+def unpackKeys(codes):
+    mask = (1 << KEY_BITS) - 1
+    codes = np.asarray(codes, dtype=np.int64)
+
+    return np.stack((codes >> 2*KEY_BITS, (codes >> KEY_BITS) & mask, codes & mask), axis=1) - KEY_OFFSET
+
+
+def edgeFrame(direction, alpha_axis):
+    # unit vectors of the alpha and beta half-widths, normal to the edge direction
+    a = alpha_axis - np.dot(alpha_axis, direction)*direction
+    if np.linalg.norm(a) < 1e-6:
+        # alpha axis along the edge, take the coordinate axis most normal to it
+        a = np.eye(3)[np.argmin(np.abs(direction))]
+        a = a - np.dot(a, direction)*direction
+    a = a/np.linalg.norm(a)
+
+    return a, np.cross(direction, a)
+
+
+def boxKeys(k_lo, k_hi):
+    # lattice keys (points, 3) of every box [k_lo, k_hi] (boxes, 3), box by box
+    span = np.maximum(k_hi - k_lo + 1, 0)
+    num = np.prod(span, axis=1)
+    box = np.repeat(np.arange(len(num)), num)
+    local = np.arange(num.sum()) - np.repeat(np.cumsum(num) - num, num)
+    kx = k_lo[box, 0] + local % span[box, 0]
+    rest = local//span[box, 0]
+    ky = k_lo[box, 1] + rest % span[box, 1]
+    kz = k_lo[box, 2] + rest//span[box, 1]
+
+    return np.stack((kx, ky, kz), axis=1)
+
+
+def prismCodes(start, end, x, alpha, beta, alpha_axis, voxel_size):
+    """
+    packed lattice keys (see packKeys) of the voxel centers inside an edge
+        from start to end. x: grid positions along the edge, alpha, beta:
+        half-widths at x along alpha_axis and the axis normal to it and to the
+        edge. The edge is covered by bounding boxes about one cross-section
+        long, their voxel centers are kept where they fall within the
+        interpolated half-widths
+
+    """
+    start, end = np.asarray(start, dtype=float), np.asarray(end, dtype=float)
+    alpha, beta = np.asarray(alpha, dtype=float), np.asarray(beta, dtype=float)
+    length = np.linalg.norm(end - start)
+    width = max(alpha.max(initial=0), beta.max(initial=0))
+    if length == 0 or width <= 0:
+        return np.zeros(0, dtype=np.int64)
+    direction = (end - start)/length
+    e_a, e_b = edgeFrame(direction, np.asarray(alpha_axis, dtype=float))
+    s = np.clip(np.asarray(x, dtype=float) - x[0], 0, length)
+
+    # half extent of the widest cross-section along each coordinate axis
+    reach = np.abs(e_a)*alpha.max() + np.abs(e_b)*beta.max()
+    knots = np.linspace(0, length, int(np.ceil(length/max(voxel_size, width))) + 1)
+    centers = start + knots[:, None]*direction
+    lo = np.minimum(centers[:-1], centers[1:]) - reach
+    hi = np.maximum(centers[:-1], centers[1:]) + reach
+    keys = boxKeys(np.ceil(lo/voxel_size).astype(np.int64), np.floor(hi/voxel_size).astype(np.int64))
+
+    q = keys*voxel_size - start
+    t = q @ direction
+    inside = (t >= 0) & (t <= length)
+    inside &= np.abs(q @ e_a) <= np.interp(t, s, alpha)
+    inside &= np.abs(q @ e_b) <= np.interp(t, s, beta)
+
+    return np.unique(packKeys(keys[inside]))
+
+
+def prismKeys(start, end, x, alpha, beta, alpha_axis, voxel_size):
+    # lattice keys (voxels, 3) of the voxel centers inside an edge (see prismCodes)
+    return unpackKeys(prismCodes(start, end, x, alpha, beta, alpha_axis, voxel_size))
+
+
+def voxelizeEdges(prisms, voxel_size):
+    """
+    point cloud (points, 3) of the voxel centers inside any of the edges.
+        prisms: arguments of prismKeys (start, end, x, alpha, beta,
+        alpha_axis) of every edge
+
+    """
+    codes = [prismCodes(*prism, voxel_size) for prism in prisms]
+    if not codes:
+        return np.zeros((0, 3))
+
+    return unpackKeys(np.unique(np.concatenate(codes)))*float(voxel_size)
+
+
+class voxelGrid:
+    """
+        Sparse occupancy grid of the dissolved volume kept across mapper runs.
+        Occupied voxels are the sorted packed keys codes with counts, the
+        number of edges covering each of them (counts above one are overlaps
+        between edges). Every edge keeps the codes it owns and the prism it
+        was voxelized from, and is voxelized again only when its end points or
+        grid change or one of its half-widths moved by more than tol (default
+        the voxel size) since then, so an update costs in proportion to the
+        edges that changed.
+    """
+
+    def __init__(self, voxel_size, tol=None):
+        self.voxel_size = voxel_size
+        self.tol = voxel_size if tol is None else tol
+        self.codes = np.zeros(0, dtype=np.int64)
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.edges = {}             # edge: (owned codes, prism)
+
+        return
+
+    #### ownership
+
+    def addCodes(self, codes):
+        # one more owner for every occurrence of codes
+        codes, num = np.unique(codes, return_counts=True)
+        pos = np.searchsorted(self.codes, codes)
+        found = pos < len(self.codes)
+        found[found] = self.codes[pos[found]] == codes[found]
+        self.counts[pos[found]] += num[found]
+        # codes are sorted, so the new ones are inserted in order
+        self.codes = np.insert(self.codes, pos[~found], codes[~found])
+        self.counts = np.insert(self.counts, pos[~found], num[~found])
+
+        return
+
+    def removeCodes(self, codes):
+        # one owner less for every occurrence of codes
+        np.subtract.at(self.counts, np.searchsorted(self.codes, codes), 1)
+        if np.count_nonzero(self.counts == 0) > len(self.counts)//2:
+            keep = self.counts > 0
+            self.codes, self.counts = self.codes[keep], self.counts[keep]
+
+        return
+
+    def isChanged(self, edge, prism):
+        if edge not in self.edges:
+            return True
+        old = self.edges[edge][1]
+        for i in [0, 1, 2, 5]:
+            # end points, grid and alpha axis
+            if np.shape(old[i]) != np.shape(prism[i]) or not np.array_equal(old[i], prism[i]):
+                return True
+        for i in [3, 4]:
+            # half-widths
+            if np.max(np.abs(old[i] - prism[i]), initial=0) > self.tol:
+                return True
+
+        return False
+
+    #### updates
+
+    def update(self, prisms):
+        """
+        brings the grid to the edges prisms: {edge: arguments of prismCodes
+            but the voxel size}. Edges missing from prisms are removed.
+            returns the number of edges voxelized again
+
+        """
+        removed = [edge for edge in self.edges if edge not in prisms]
+        changed = [edge for edge, prism in prisms.items() if self.isChanged(edge, prism)]
+        old_codes = [self.edges.pop(edge)[0] for edge in removed + changed if edge in self.edges]
+        new_codes = []
+        for edge in changed:
+            prism = tuple(np.array(value, dtype=float) for value in prisms[edge])
+            codes = prismCodes(*prism, self.voxel_size)
+            self.edges[edge] = (codes, prism)
+            new_codes.append(codes)
+
+        # all changes applied at once
+        if old_codes:
+            self.removeCodes(np.concatenate(old_codes))
+        if new_codes:
+            self.addCodes(np.concatenate(new_codes))
+
+        return len(changed)
+
+    def points(self):
+        # point cloud (points, 3) of the occupied voxel centers
+        return unpackKeys(self.codes[self.counts > 0])*float(self.voxel_size)
+
+    def overlaps(self):
+        # lattice keys (voxels, 3) covered by more than one edge
+        return unpackKeys(self.codes[self.counts > 1])
@@ -0,0 +1,75 @@
+"""
+Created on Mon Oct 19 19:02:44 2026
+
+Background writer thread for result and snapshot I/O.
+"""
+
+import queue
+import threading
+
+
+class asyncWriter:
+    """
+        Runs write calls on a background thread in submission order so the
+        step loop does not wait on compression or the filesystem. At most
+        max_queue calls are pending: submit blocks while the queue is full,
+        which bounds the memory held by queued arrays. Arguments are handed
+        off as they are, callers pass copies of arrays they keep modifying.
+        An exception raised in the thread is re-raised by the next submit,
+        flush or close, later calls are dropped.
+    """
+
+    def __init__(self, max_queue=4):
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.error = None
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+        return
+
+    def run(self):
+        while True:
+            task = self.queue.get()
+            try:
+                if task is None:
+                    return
+                if self.error is None:
+                    func, args, kwargs = task
+                    func(*args, **kwargs)
+            except BaseException as error:
+                self.error = error
+            finally:
+                self.queue.task_done()
+
+    def checkError(self):
+        if self.error is not None:
+            raise RuntimeError('background write failed') from self.error
+
+        return
+
+    def submit(self, func, *args, **kwargs):
+        self.checkError()
+        self.queue.put((func, args, kwargs))
+
+        return
+
+    def flush(self):
+        # waits until every submitted call has run
+        self.queue.join()
+        self.checkError()
+
+        return
+
+    def stop(self):
+        # ends the thread after the pending calls, without raising their error
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+
+        return
+
+    def close(self):
+        self.stop()
+        self.checkError()
+
+        return
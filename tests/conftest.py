@@ -0,0 +1,7 @@
+import os
+import sys
+
+CODE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Code')
+DATA = os.path.join(CODE, 'data') + os.sep
+
+sys.path.insert(0, CODE)
@@ -0,0 +1,103 @@
+import numpy as np
+
+from conftest import DATA
+from activity import activityScheduler
+from dgd import crack, graph
+from processDFN import dfn
+
+
+C_EQ, GAMMA, DT = 2e-6, 1.7e9, 1
+
+
+def runGraph(num_years=4, scheduler=None):
+    diss = graph(num_years, 1, dfn(DATA).getGraph(), DATA)
+    diss.setResolution(num_cells=10)
+    if scheduler is not None:
+        diss.setActivityScheduler(**scheduler)
+    G, grid = diss.graphDiss()
+
+    return diss, G
+
+
+def dormantScheduler(refresh_every=10):
+    # scheduler with edge (1, 2) dormant after two quiet full updates
+    scheduler = activityScheduler(rate_tol=1e-3, conc_tol=1e-3, flow_tol=1e-2,
+                                  refresh_every=refresh_every)
+    alpha, f = np.full(5, 0.1), np.full(5, 1e-16)
+    for _ in range(2):
+        scheduler.startStep()
+        scheduler.update((1, 2), alpha, f, 1e-7, 0.0, 1.0, C_EQ, GAMMA, DT)
+
+    return scheduler
+
+
+def test_zero_tolerances_reproduce_plain_run():
+    plain, G_plain = runGraph()
+    scheduled, G = runGraph(scheduler={'rate_tol': 0, 'conc_tol': 0, 'flow_tol': 0})
+
+    assert sum(scheduled.activity.num_dormant) == 0
+    assert list(G.edges) == list(G_plain.edges)
+    for edge in G.edges:
+        for key in ['alpha', 'beta', 'c', 'f', 'Q']:
+            np.testing.assert_array_equal(G.edges[edge][key], G_plain.edges[edge][key])
+
+
+def test_quiet_edge_becomes_dormant():
+    scheduler = dormantScheduler()
+    scheduler.startStep()
+
+    assert scheduler.state[(1, 2)]['dormant']
+    assert not scheduler.isActive((1, 2), 0.0, 1.0, C_EQ)
+    assert scheduler.num_dormant[-1] == 1
+
+
+def test_dormant_edge_reactivated_by_inlet_concentration():
+    scheduler = dormantScheduler()
+    scheduler.startStep()
+
+    assert not scheduler.isActive((1, 2), 0.5e-3*C_EQ, 1.0, C_EQ)
+    assert scheduler.isActive((1, 2), 2e-3*C_EQ, 1.0, C_EQ)
+
+
+def test_dormant_edge_reactivated_by_flow():
+    scheduler = dormantScheduler()
+    scheduler.startStep()
+
+    assert not scheduler.isActive((1, 2), 0.0, 1.005, C_EQ)
+    assert scheduler.isActive((1, 2), 0.0, 1.02, C_EQ)
+    # flow direction flipped
+    assert scheduler.isActive((2, 1), 0.0, 1.0, C_EQ)
+
+
+def test_refresh_every_forces_full_update():
+    scheduler = dormantScheduler(refresh_every=3)
+    active = []
+    for _ in range(4):
+        scheduler.startStep()
+        active.append(scheduler.isActive((1, 2), 0.0, 1.0, C_EQ))
+
+    assert active == [False, False, False, True]
+
+
+def test_frozen_engine_keeps_profiles_and_widens_at_frozen_rate():
+    diss = crack(2, 1)
+    L, Hgrad = 1.0, 0.01
+    grid = diss.createGrid(L, 0.02, 100, num_cells=10)
+    R = diss.calcR(grid['alpha'][:, 0], grid['beta'][:, 0], grid['x'], 0)
+    diss.forward_engine_dc(grid, L, 0, R, Hgrad, 0, 0)
+    R = diss.calcR(grid['alpha'][:, 1], grid['beta'][:, 1], grid['x'], 0)
+    diss.forward_engine_frozen(grid, L, R, Hgrad, 1)
+
+    np.testing.assert_array_equal(grid['c'][:, 1], grid['c'][:, 0])
+    np.testing.assert_array_equal(grid['f'][:, 1], grid['f'][:, 0])
+    np.testing.assert_allclose(grid['alpha'][:, 2] - grid['alpha'][:, 1],
+                               2*diss.gamma*grid['f'][:, 0]*diss.dt)
+    np.testing.assert_allclose(grid['Q'][1], diss.calcFlow(R, Hgrad, L))
+
+
+def test_loose_tolerances_refresh_dormant_edges():
+    diss, G = runGraph(6, {'rate_tol': 1, 'conc_tol': 1, 'flow_tol': 1, 'refresh_every': 2})
+
+    assert sum(diss.activity.num_dormant) > 0
+    # no edge stays dormant longer than refresh_every steps
+    assert all(state['since_full'] <= 2 for state in diss.activity.state.values())
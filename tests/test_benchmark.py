@@ -0,0 +1,30 @@
+from benchmark import compare
+
+
+def result(seconds, peak_rss_mb=100.0, phases=None, skipped=None, error=None):
+    return {'name': 'crack', 'seconds': seconds, 'peak_rss_mb': peak_rss_mb,
+            'phases': phases or {}, 'skipped': skipped, 'error': error}
+
+
+def baseline(**kwargs):
+    return {'results': [result(2.0, phases={'transport': 1.0, 'R': 0.01}, **kwargs)],
+            'tolerances': {'time': 0.25, 'memory': 0.2, 'phase': 0.5, 'min_seconds': 0.1}}
+
+
+def test_within_tolerance_passes():
+    assert compare([result(2.4, 110.0, {'transport': 1.4, 'R': 0.05})], baseline()) == []
+
+
+def test_slowdown_and_memory_growth_are_reported():
+    regressions = compare([result(3.0, 130.0, {'transport': 1.6})], baseline())
+
+    assert len(regressions) == 3
+    assert any('wall time' in message for message in regressions)
+    assert any('peak RSS' in message for message in regressions)
+    assert any('phase transport' in message for message in regressions)
+
+
+def test_tolerance_override_and_failures():
+    assert compare([result(3.0)], baseline(), {'time': 1.0}) == []
+    assert len(compare([result(None, error='RuntimeError: x')], baseline())) == 1
+    assert compare([result(None, skipped='ImportError: x')], baseline()) == []
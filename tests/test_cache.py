@@ -0,0 +1,88 @@
+import os
+import shutil
+
+import numpy as np
+
+from conftest import DATA
+from dgd import graph
+from processDFN import dfn, loadDFN
+
+
+def copyDFN(tmp_path):
+    path = str(tmp_path / 'dfn') + os.sep
+    shutil.copytree(DATA, path, ignore=shutil.ignore_patterns('.dfn_cache'))
+
+    return path
+
+
+def sameGraph(G1, G2):
+    assert G1.graph == G2.graph
+    assert list(G1.nodes) == list(G2.nodes)
+    assert list(G1.edges) == list(G2.edges)
+    for node in G1.nodes:
+        for key, value in G1.nodes[node].items():
+            assert type(value) == type(G2.nodes[node][key])
+            assert np.all(np.asarray(value) == np.asarray(G2.nodes[node][key]))
+    for edge in G1.edges:
+        assert G1.edges[edge] == G2.edges[edge]
+
+    return
+
+
+def test_cached_load_matches_parsing(tmp_path):
+    path = copyDFN(tmp_path)
+    parsed = dfn(path, use_cache=False)
+    first = dfn(path)
+    first.getGraph(), first.aperture, first.polyCoords
+    cached = dfn(path)
+
+    assert os.path.exists(os.path.join(path, '.dfn_cache', 'graph', 'meta.json'))
+    sameGraph(parsed.G, cached.G)
+    assert np.array_equal(parsed.aperture, cached.aperture)
+    assert len(parsed.polyCoords) == len(cached.polyCoords)
+    assert all(np.array_equal(p, c) for p, c in zip(parsed.polyCoords, cached.polyCoords))
+
+
+def test_changed_source_invalidates_entry(tmp_path):
+    path = copyDFN(tmp_path)
+    num_frac = len(dfn(path).aperture)
+    with open(path + 'aperture.dat', 'a') as file:
+        file.write('-%d 0 0 0.05\n' % (num_frac + 7))
+
+    assert len(dfn(path).aperture) == num_frac + 1
+
+
+def test_parsing_is_lazy_and_shared(tmp_path):
+    path = copyDFN(tmp_path)
+    network = dfn(path)
+    network.getNumPolygons()
+
+    assert network._G is None and network._aperture is None
+    assert loadDFN(path) is loadDFN(path)
+
+    diss = graph(1, 1, network)
+    # the graph is copied, its attribute values and the parsed arrays are shared
+    assert diss.G is not network.G
+    assert 's' in network.G and 's' not in diss.G
+    node = next(iter(diss.G.nodes))
+    assert diss.G.nodes[node]['frac'] is network.G.nodes[node]['frac']
+    polygons = network.polyCoords
+    assert graph(1, 1, network).num_frac == network.getNumPolygons()
+    assert network.polyCoords is polygons
+    assert diss.num_frac == network.getNumPolygons()
+
+
+def test_graphs_from_one_loaded_dfn(tmp_path):
+    path = copyDFN(tmp_path)
+    network = loadDFN(path)
+    results = []
+    for _ in range(2):
+        diss = graph(1, 1, loadDFN(path))
+        diss.setResolution(num_cells=10)
+        G, grid = diss.graphDiss()
+        results.append({edge: G.edges[edge]['alpha'].copy() for edge in G.edges})
+
+    assert list(results[0]) == list(results[1])
+    for edge in results[0]:
+        assert np.array_equal(results[0][edge], results[1][edge])
+    assert 's' in network.G and 't' in network.G
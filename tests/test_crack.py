@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from dgd import crack
+
+
+def runCrack(num_cells, L=1.0, Hgrad=0.01, num_steps=2):
+    diss = crack(num_steps, 1)
+    grid = diss.createGrid(L, 0.02, 100, num_cells=num_cells)
+    for j in range(num_steps):
+        R = diss.calcR(grid['alpha'][:, j], grid['beta'][:, j], grid['x'], 0)
+        diss.forward_engine_dc(grid, L, 0, R, Hgrad, 0, j)
+
+    return grid
+
+
+@pytest.mark.parametrize('num_cells', [200, 20, 10, 3])
+def test_dc_engine_converges_on_coarse_grids(num_cells):
+    fine = runCrack(None)
+    coarse = runCrack(num_cells)
+
+    np.testing.assert_allclose(coarse['c'][-1], fine['c'][-1], rtol=1e-3)
+    np.testing.assert_allclose(coarse['alpha'][-1], fine['alpha'][-1], rtol=1e-6)
+    np.testing.assert_allclose(coarse['Q'], fine['Q'], rtol=1e-3)
+
+
+def test_dc_grid_without_flow_saturates_at_inlet():
+    diss = crack(1, 1)
+    x_ref = np.linspace(0, 1, 11)
+    alpha = np.full(11, 0.02)
+    P = diss.calcPerimeter(alpha, np.full(11, 100), 0)
+
+    x_dc = diss.xGrid_dc(alpha, P, 0, x_ref, 1, 0)
+    c = np.interp(x_ref, x_dc, diss.cGrid_dc(x_dc, 0))
+
+    assert np.all(np.diff(x_dc) > 0)
+    assert c[0] == 0
+    np.testing.assert_allclose(c[1:], diss.c_eq - diss.dc)
@@ -0,0 +1,26 @@
+from conftest import DATA
+from dgd import graph
+from events import observer
+from processDFN import dfn
+
+
+class stepRecorder(observer):
+
+    def __init__(self):
+        self.steps = []
+
+    def onStep(self, t_step, num_steps, info):
+        self.steps.append((t_step, num_steps, info['edges']))
+
+
+def test_steps_go_to_observers_only(capsys):
+    diss = graph(3, 1, dfn(DATA).getGraph(), DATA)
+    diss.setResolution(num_cells=10)
+    recorder = stepRecorder()
+    diss.addObserver(recorder)
+    diss.graphDiss()
+
+    captured = capsys.readouterr()
+    assert captured.out == '' and captured.err == ''
+    assert [step[:2] for step in recorder.steps] == [(t_step, 4) for t_step in range(4)]
+    assert all(step[2] > 0 for step in recorder.steps)
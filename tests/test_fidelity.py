@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+from conftest import DATA
+from dgd import crack, graph
+from processDFN import dfn
+
+
+def lumpedGrid(diss, L, alpha, beta):
+    # two point (inlet, outlet) grid as left by graph.demoteEdge
+    grid = diss.createGrid(L, alpha, beta, num_cells=10)
+    for key in ['alpha', 'beta', 'c', 'f']:
+        grid[key] = grid[key][[0, -1], :]
+    grid['x'] = np.array([0, L], dtype=float)
+
+    return grid
+
+
+def test_lumped_engine_matches_full_grid_on_short_edge():
+    diss = crack(1, 1)
+    L, Hgrad = 0.01, 0.01
+    full = diss.createGrid(L, 0.02, 100, num_cells=10)
+    lumped = lumpedGrid(diss, L, 0.02, 100)
+    R = diss.calcR(full['alpha'][:, 0], full['beta'][:, 0], full['x'], 0)
+    diss.forward_engine_dc(full, L, 0, R, Hgrad, 0, 0)
+    diss.forward_engine_lumped(lumped, L, 0, R, Hgrad, 0, 0)
+
+    np.testing.assert_allclose(lumped['Q'][0], full['Q'][0])
+    np.testing.assert_allclose(lumped['c'][-1, 0], full['c'][-1, 0], rtol=1e-3)
+    np.testing.assert_allclose(lumped['f'][-1, 0], full['f'][-1, 0], rtol=1e-3)
+    np.testing.assert_allclose(lumped['alpha'][-1, 1], full['alpha'][-1, 1], rtol=1e-6)
+    np.testing.assert_allclose(lumped['beta'][-1, 1], full['beta'][-1, 1], rtol=1e-6)
+
+
+@pytest.mark.parametrize('n', [2, 3, 4])
+def test_breakthrough_time_closed_form(n):
+    diss = crack(1, 1)
+    diss.n = n
+    m = 3*n/(n - 1)
+    alpha, u_L, f_L = 0.01, 0.05, 1e-12
+
+    T_B = diss.calcBreakthroughTime(alpha, u_L, f_L)
+
+    np.testing.assert_allclose(T_B, alpha/((m - 1)*2*diss.gamma*f_L))
+    # linear regime at the outlet: already broken through
+    assert diss.calcBreakthroughTime(alpha, 1 - diss.c_s/diss.c_eq, f_L) == 0
+    assert diss.calcBreakthroughTime(alpha, u_L, 0) == np.inf
+
+
+def test_demote_promote_round_trip():
+    diss = graph(2, 1, dfn(DATA).getGraph(), DATA)
+    diss.setResolution(num_cells=10)
+    diss.graphDiss()
+    edge = list(diss.G.edges)[0]
+    data = diss.G.edges[edge]
+    t_step = 1
+    before = {key: data[key].copy() for key in ['alpha', 'beta', 'c', 'f']}
+    x = data['x'].copy()
+    alpha = np.amin(data['alpha'][:, diss.getCol('alpha', t_step)])
+    beta = np.amin(data['beta'][:, diss.getCol('beta', t_step)])
+
+    diss.demoteEdge(edge, t_step, alpha, beta)
+    assert data['fidelity'] == 'reduced'
+    np.testing.assert_array_equal(data['x'], [0, data['length']])
+    for key, values in before.items():
+        assert data[key].shape == (2, values.shape[1])
+    # history before t_step is kept at the end points, the lumped aperture after it
+    ja = diss.getCol('alpha', t_step)
+    np.testing.assert_array_equal(data['alpha'][:, :ja], before['alpha'][[0, -1], :ja])
+    np.testing.assert_array_equal(data['c'], before['c'][[0, -1], :])
+    assert np.all(data['alpha'][:, ja:] == alpha)
+    assert np.all(data['beta'][:, diss.getCol('beta', t_step):] == beta)
+
+    lumped = {key: data[key].copy() for key in before}
+    diss.promoteEdge(edge)
+    assert data['fidelity'] == 'full'
+    np.testing.assert_allclose(data['x'], x)
+    for key, values in before.items():
+        assert data[key].shape == values.shape
+        np.testing.assert_allclose(data[key][0], lumped[key][0])
+        np.testing.assert_allclose(data[key][-1], lumped[key][1])
+        s = (data['x']/data['length'])[:, None]
+        np.testing.assert_allclose(data[key], lumped[key][0]*(1 - s) + lumped[key][1]*s)
+
+
+def test_hybrid_run_keeps_edge_grids_consistent():
+    diss = graph(3, 1, dfn(DATA).getGraph(), DATA)
+    diss.setResolution(num_cells=10)
+    diss.setHybridFidelity(max_length=np.inf, demote_margin=0)
+    G, grid = diss.graphDiss()
+
+    fidelity = [G.edges[edge].get('fidelity') for edge in G.edges]
+    assert 'reduced' in fidelity
+    for edge in G.edges:
+        data = G.edges[edge]
+        assert (len(data['x']) == 2) == (data.get('fidelity') == 'reduced')
+        for key in ['alpha', 'beta', 'c', 'f']:
+            assert data[key].shape[0] == len(data['x'])
+            assert np.all(np.isfinite(data[key]))
+        assert np.all(np.diff(data['alpha'], axis=1) >= 0)
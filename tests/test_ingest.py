@@ -0,0 +1,44 @@
+import numpy as np
+
+from conftest import DATA
+from dgd import graph
+from ingest import cutDFN, readIntersectionList, readPolygons
+from processDFN import dfn
+
+ROI = ([-40, -75, -75], [40, 75, 75])
+
+
+def test_chunks_and_filters_match_full_read():
+    coords, offsets, ids = readPolygons(DATA + 'polygons.dat')
+    lo = np.array([coords[a:b].min(axis=0) for a, b in zip(offsets[:-1], offsets[1:])])
+    hi = np.array([coords[a:b].max(axis=0) for a, b in zip(offsets[:-1], offsets[1:])])
+    inside = ids[np.all((lo <= ROI[1]) & (hi >= ROI[0]), axis=1)]
+    subset = inside[::2]
+
+    c, o, i = readPolygons(DATA + 'polygons.dat', ROI, subset, chunk_lines=5)
+    assert np.array_equal(i, subset)
+    assert np.array_equal(c, np.concatenate([coords[offsets[k - 1]:offsets[k]] for k in subset]))
+    assert np.array_equal(np.diff(o), np.diff(offsets)[subset - 1])
+
+    f1, f2, midpoints, length = readIntersectionList(DATA + 'intersection_list.dat')
+    g1, g2, g_mid, g_len = readIntersectionList(DATA + 'intersection_list.dat', ROI, subset,
+                                                chunk_lines=7)
+    keep = (np.all((midpoints >= ROI[0]) & (midpoints <= ROI[1]), axis=1)
+            & np.isin(f1, subset) & ((f2 < 0) | np.isin(f2, subset)))
+    assert np.array_equal(g1, f1[keep]) and np.array_equal(g2, f2[keep])
+    assert np.array_equal(g_mid, midpoints[keep]) and np.array_equal(g_len, length[keep])
+
+
+def test_cut_sub_volume_runs(tmp_path):
+    output = str(tmp_path / 'cut') + '/'
+    ids = cutDFN(DATA, output, ROI)
+    network = dfn(output)
+
+    assert network.getNumPolygons() == len(ids)
+    assert np.allclose(network.getDomainSize(), [80, 150, 150])
+    assert np.array_equal(network.aperture, dfn(DATA).aperture[ids - 1])
+    assert len(list(network.getGraph().neighbors('s'))) > 0
+
+    diss = graph(1, 1, network)
+    diss.setResolution(num_cells=8)
+    diss.graphDiss()
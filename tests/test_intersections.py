@@ -0,0 +1,57 @@
+import os
+import shutil
+
+import networkx as nx
+import numpy as np
+
+from conftest import DATA
+from intersections import intersectionEngine
+from processDFN import dfn, intersectionGraph, readIntersections
+
+
+def test_tables_give_the_gml_graph():
+    G = nx.read_gml(DATA + 'graph.gml')
+    H = intersectionGraph(*readIntersections(DATA + 'intersection_list.dat'))
+
+    assert G.graph == H.graph
+    assert list(G.nodes) == list(H.nodes)
+    assert list(G.edges) == list(H.edges)
+    assert all(G.nodes[node] == H.nodes[node] for node in G.nodes)
+    assert all(G.edges[edge] == H.edges[edge] for edge in G.edges)
+    assert all(list(G.adj[node]) == list(H.adj[node]) for node in G.nodes)
+
+
+def test_dfn_without_gml_uses_tables(tmp_path):
+    path = str(tmp_path / 'dfn') + os.sep
+    shutil.copytree(DATA, path, ignore=shutil.ignore_patterns('.dfn_cache', 'graph.gml'))
+    G = dfn(path).getGraph()
+    G_gml = dfn(DATA, use_cache=False).getGraph()
+
+    assert list(G.edges) == list(G_gml.edges)
+    assert all(G.edges[edge]['alpha'] == G_gml.edges[edge]['alpha'] for edge in G.edges)
+    assert all(G.edges[edge]['beta'] == G_gml.edges[edge]['beta'] for edge in G.edges)
+
+
+def test_engine_reproduces_intersection_list():
+    network = dfn(DATA, use_cache=False)
+    engine = intersectionEngine(network.polyCoords, network.getDomainSize())
+    f1, f2, coords, length = engine.getIntersections()
+    g1, g2, g_coords, g_length = readIntersections(DATA + 'intersection_list.dat')
+
+    assert np.array_equal(f1, g1) and np.array_equal(f2, g2)
+    assert np.allclose(coords, g_coords, atol=1e-7)
+    assert np.allclose(length, g_length, rtol=1e-8)
+
+    G = dfn(DATA, use_cache=False, graph_source='polygons').getGraph()
+    assert list(G.edges) == list(network.getGraph().edges)
+
+
+def test_engine_pads_polygons():
+    # a square and a triangle crossing it, on the same grid cell
+    square = np.array([[-1, -1, 0], [1, -1, 0], [1, 1, 0], [-1, 1, 0]], dtype=float)
+    triangle = np.array([[0, -0.5, -1], [0, 0.5, -1], [0, 0, 1]], dtype=float)
+    engine = intersectionEngine([square, triangle], (4, 4, 4), walls={})
+    f1, f2, coords, length = engine.getIntersections()
+
+    assert list(zip(f1, f2)) == [(1, 2)]
+    assert np.allclose(coords, [[0, 0, 0]]) and np.allclose(length, [0.5])
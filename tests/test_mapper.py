@@ -0,0 +1,48 @@
+import numpy as np
+import networkx as nx
+
+from conftest import DATA
+from dgd import graph
+from processDFN import dfn
+
+
+def mapperOutput(diss, num_nodes=40, seed=0):
+    # random mapper graph spread over the bounding box of the DFN nodes
+    coords = np.array([diss.getCoords(node) for node in diss.G.nodes])
+    points = np.random.default_rng(seed).uniform(coords.min(axis=0), coords.max(axis=0), (num_nodes, 3))
+    mapperGraph = nx.Graph()
+    for i, point in enumerate(points):
+        mapperGraph.add_node(str(i), coords=point, alpha=1e-3*(i + 1), beta=2e-3*(i + 1))
+
+    return mapperGraph, points
+
+
+def test_boundary_nodes_attach_to_nearest():
+    network = dfn(DATA)
+    diss = graph(1, 1, network, network)
+    mapperGraph, points = mapperOutput(diss)
+    s_list, t_list = diss.findBoundaryNodes()
+    mapperGraph = diss.processMapper(mapperGraph)
+
+    for node in s_list + t_list:
+        dist = np.linalg.norm(points - diss.getCoords(node), axis=1)
+        closest = str(np.argmin(dist))
+        assert list(mapperGraph.neighbors(node + '111')) == [closest]
+        assert np.isclose(mapperGraph.edges[node + '111', closest]['length'], dist.min())
+        assert mapperGraph.nodes[node + '111']['alpha'] == mapperGraph.nodes[closest]['alpha']
+
+
+def test_boundary_nodes_attach_to_k_nearest_within_radius():
+    network = dfn(DATA)
+    diss = graph(1, 1, network, network)
+    mapperGraph, points = mapperOutput(diss)
+    s_list, t_list = diss.findBoundaryNodes()
+    radius = 0.25*np.max(np.ptp(points, axis=0))
+    diss.setBoundaryAttachment(k=3, radius=radius)
+    mapperGraph = diss.processMapper(mapperGraph)
+
+    for node in s_list + t_list:
+        dist = np.linalg.norm(points - diss.getCoords(node), axis=1)
+        order = np.argsort(dist)[:3]
+        expected = {str(i) for j, i in enumerate(order) if j == 0 or dist[i] <= radius}
+        assert set(mapperGraph.neighbors(node + '111')) == expected
@@ -0,0 +1,71 @@
+import networkx as nx
+import numpy as np
+
+from conftest import DATA
+from dgd import crack, graph
+from processDFN import dfn
+import utilities
+
+
+def test_alloc_grid_from_time_offset():
+    diss = crack(6, 1)
+    t0 = 3
+    grid = diss.allocGrid(np.linspace(0, 1, 5), 0.02, 100, t0=t0)
+    num_t = len(diss.t) - t0
+
+    assert grid['alpha'].shape == (5, num_t + 1)
+    assert grid['beta'].shape == (5, num_t + 1)
+    assert grid['c'].shape == (5, num_t) and grid['f'].shape == (5, num_t)
+    assert grid['Q'].shape == (num_t,)
+    assert diss.col(grid, 'c', t0) == 0
+    assert diss.col(grid, 'alpha', len(diss.t)) == num_t
+
+
+class chainMapper:
+    # stands in for utilities.processMapper: a chain of mapper nodes from the
+    # source to the target boundary nodes of the graph
+    diss = None
+
+    def __init__(self, pcloud):
+        s_list, t_list = self.diss.findBoundaryNodes()
+        start = np.mean([self.diss.getCoords(node) for node in s_list], axis=0)
+        end = np.mean([self.diss.getCoords(node) for node in t_list], axis=0)
+        self.G = nx.Graph()
+        points = np.linspace(start, end, 4)
+        for i, point in enumerate(points):
+            self.G.add_node('cube%d_cluster0' % i, coords=point, x=point[0], y=point[1],
+                            z=point[2], alpha=0.01, beta=1.0)
+        for i in range(3):
+            self.G.add_edge('cube%d_cluster0' % i, 'cube%d_cluster0' % (i + 1),
+                            length=np.linalg.norm(points[i + 1] - points[i]))
+
+    def getGraph(self):
+        return self.G
+
+
+def test_post_mapper_time_window(monkeypatch):
+    diss = graph(6, 1, dfn(DATA).getGraph(), DATA)
+    diss.setResolution(num_cells=10)
+    diss.mapper_cond_start = 2
+    chainMapper.diss = diss
+    monkeypatch.setattr(utilities, 'processMapper', chainMapper)
+    monkeypatch.setattr(diss, 'parGetGridVox', lambda t_step: np.zeros((1, 3)))
+    G, grid = diss.graphDiss()
+
+    t0 = 2
+    num_t = len(diss.t) - t0
+    assert G.graph['t0'] == t0
+    assert diss.getTimeWindow() == num_t
+    assert diss.getTimeIndex(t0) == 0 and diss.getAdjIndex(t0) == 0
+    assert G.graph['Q_adj'].shape[2] == num_t
+    for edge in G.edges:
+        data = G.edges[edge]
+        assert data['alpha'].shape[1] == num_t + 1 and data['c'].shape[1] == num_t
+        assert data['Q'].shape == (num_t,)
+        # every step from t0 on was computed, none left unwritten
+        assert np.all(data['Q'] != 0)
+        assert np.all(np.diff(data['alpha'], axis=1) > 0)
+        # column 0 is the mapper aperture at t0
+        np.testing.assert_allclose(data['alpha'][:, 0], 0.01)
+        for node in edge:
+            assert len(G.nodes[node]['head']) == num_t
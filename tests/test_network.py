@@ -0,0 +1,63 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from conftest import DATA
+from dgd import graph
+from processDFN import dfn
+
+
+@pytest.fixture
+def dissGraph():
+    diss = graph(2, 1, dfn(DATA).getGraph(), DATA)
+    diss.setResolution(num_cells=20)
+    diss.graphGrid()
+    # non-uniform apertures so every edge has its own resistance
+    rng = np.random.default_rng(0)
+    for edge in diss.G.edges:
+        diss.G.edges[edge]['alpha'][:, 0] *= 1 + rng.random()
+
+    return diss
+
+
+def test_conductance_matches_calcR(dissGraph):
+    net = dissGraph.getNetwork()
+    alpha = net.gatherColumn(dissGraph.G, 'alpha', 0)
+    beta = net.gatherColumn(dissGraph.G, 'beta', 0)
+    k = net.calcConductance(alpha, beta)
+
+    for i, edge in enumerate(net.edges):
+        data = dissGraph.G.edges[edge]
+        R = dissGraph.crack.calcR(data['alpha'][:, 0], data['beta'][:, 0], data['x'], 0)
+        assert k[i] == pytest.approx(1/R, rel=1e-12)
+
+
+def test_adjacency_matches_networkx(dissGraph):
+    net = dissGraph.getNetwork()
+    values = np.arange(1, net.num_edges + 1, dtype=float)
+    for i, edge in enumerate(net.edges):
+        dissGraph.G.edges[edge]['w'] = values[i]
+
+    expected = nx.to_numpy_array(dissGraph.G, nodelist=net.nodes, weight='w')
+    np.testing.assert_array_equal(net.toAdjacency(values), expected)
+
+
+def test_solve_heads_matches_dense_inversion(dissGraph):
+    dissGraph.setRtoEdge(0)
+    net = dissGraph.getNetwork()
+    heads = net.solveHeads(dissGraph.edge_Rinv, dissGraph.getScenarios())
+
+    lapG = dissGraph.calcLaplacian(net.toAdjacency(dissGraph.edge_Rinv))
+    head = dissGraph.calcHead(lapG)
+    np.testing.assert_allclose(heads['base'], head, rtol=1e-9, atol=1e-9)
+
+
+def test_scenarios_accept_partial_dicts(dissGraph):
+    dissGraph.setRtoEdge(0)
+    added = dissGraph.addScenario('swapped', swap=True)
+    heads, flows = dissGraph.solveScenarios(0, [added, {'name': 'low', 'source_pres': 10}])
+
+    base = dissGraph.getNetwork().solveHeads(dissGraph.edge_Rinv, dissGraph.getScenarios())['base']
+    np.testing.assert_allclose(heads['low'], base/100, rtol=1e-9, atol=1e-12)
+    np.testing.assert_allclose(heads['swapped'], 1000 - base, rtol=1e-9, atol=1e-9)
+    assert set(flows) == {'swapped', 'low'}
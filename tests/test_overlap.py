@@ -0,0 +1,47 @@
+import itertools
+
+import networkx as nx
+
+from conftest import DATA
+from processDFN import dfn, overlapEdges
+
+
+def test_keeps_consecutive_intersections():
+    # five intersections along a tilted fracture, joined pairwise as in dfnWorks
+    G = nx.Graph()
+    positions = [3.0, 0.0, 4.5, 1.0, 2.0]
+    for node, s in enumerate(positions):
+        G.add_node(node, x=s, y=0.5*s, z=0.01*(-1)**node)
+    edges = list(itertools.combinations(G.nodes, 2))
+    G.add_edges_from(edges, frac=1)
+
+    redundant = overlapEdges(G, [edges])
+    kept = {frozenset(edge) for edge in edges} - {frozenset(edge) for edge in redundant}
+
+    assert kept == {frozenset(edge) for edge in [(1, 3), (3, 4), (4, 0), (0, 2)]}
+
+
+def test_every_fracture_becomes_a_chain():
+    network = dfn(DATA)
+    G = network.getGraph()
+    frac_list = network.getEdgesOnSameFrac()
+    network.removeEdges(overlapEdges(G, frac_list))
+
+    for edge_list in frac_list:
+        nodes = {node for edge in edge_list for node in edge}
+        kept = [edge for edge in edge_list if G.has_edge(*edge)]
+        chain = nx.Graph(kept)
+        assert len(kept) == len(nodes) - 1
+        assert nx.is_connected(chain) and max(dict(chain.degree).values()) <= 2
+
+
+def test_fracture_index_follows_removals():
+    network = dfn(DATA)
+    G = network.getGraph()
+    index = network.getFracIndex()
+    network.removeEdges(overlapEdges(G, network.getEdgesOnSameFrac()))
+
+    for frac in index.getFractures():
+        scanned = [edge for edge in G.edges if G.edges[edge]['frac'] == frac]
+        assert index.getEdges(frac) == scanned
+    assert sum(len(edges) for edges in index.edges.values()) == G.number_of_edges()
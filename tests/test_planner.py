@@ -0,0 +1,35 @@
+import pytest
+
+from conftest import DATA
+from dgd import graph
+from planner import MemoryBudgetError, memoryPlanner
+from processDFN import dfn
+
+
+@pytest.fixture
+def dissGraph():
+    diss = graph(6, 1, dfn(DATA).getGraph(), DATA)
+    diss.setResolution(num_cells=64)
+
+    return diss
+
+
+def test_mapper_snapshots_are_counted(dissGraph):
+    retention = dict(dissGraph.retention)
+    without = memoryPlanner(dissGraph.G, dissGraph.crack).estimate(retention)
+    mapper = memoryPlanner(dissGraph.G, dissGraph.crack, mapper_steps=[3]).estimate(retention)
+
+    assert without['graph_list snapshots'] == 0
+    assert mapper['graph_list snapshots'] > 0
+    assert mapper['final snapshot build'] == max(mapper['edge ' + key]
+                                                 for key in ['alpha', 'beta', 'c', 'f'])
+
+
+def test_auto_plan_stops_coarsening_at_min_cells(dissGraph):
+    mem = memoryPlanner(dissGraph.G, dissGraph.crack)
+    configs = list(mem.cheaperConfigs({'retention': dict(dissGraph.retention),
+                                       'adjacency': 'full', 'num_cells': 64}))
+    assert min(config['num_cells'] for config in configs) >= mem.min_cells
+
+    with pytest.raises(MemoryBudgetError):
+        dissGraph.planMemory(budget=1, auto=True)
@@ -0,0 +1,107 @@
+import csv
+import json
+import time
+
+import numpy as np
+import pytest
+
+from conftest import DATA
+from dgd import graph
+from processDFN import dfn
+import profiling
+
+
+def nestedRun(prof):
+    with prof.span('outer'):
+        for _ in range(3):
+            with prof.span('inner'):
+                time.sleep(0.01)
+                prof.count('items', 2)
+        prof.sampleMemory('after inner')
+
+    return prof
+
+
+def test_nested_spans_add_up():
+    calls = []
+    prof = nestedRun(profiling.profiler(sample_spans=('outer',),
+                                        listener=lambda name, seconds: calls.append(name)))
+    summary = prof.summary()
+    outer, inner = summary['spans']['outer'], summary['spans']['inner']
+
+    assert inner['calls'] == 3 and outer['calls'] == 1
+    assert inner['total_s'] >= 0.03
+    assert outer['total_s'] >= inner['total_s']
+    assert summary['wall_s'] >= outer['total_s']
+    assert inner['mean_s'] == pytest.approx(inner['total_s']/3)
+    assert summary['counters'] == {'items': 6}
+    assert calls == ['inner']*3 + ['outer']
+    # samples of sampleMemory and of the exits of sample_spans
+    assert [sample['label'] for sample in summary['memory']] == ['after inner', 'outer']
+
+
+def test_peak_memory():
+    peak = profiling.profiler().peakMemory()
+
+    if profiling.resource is None:
+        assert peak is None
+    else:
+        assert peak > 0
+
+
+def test_export_json(tmp_path):
+    prof = nestedRun(profiling.profiler())
+    filename = str(tmp_path / 'profile.json')
+    prof.export(filename)
+    with open(filename) as file:
+        summary = json.load(file)
+
+    assert set(summary) == {'wall_s', 'peak_rss_mb', 'spans', 'counters', 'memory'}
+    assert set(summary['spans']['inner']) == {'total_s', 'calls', 'mean_s'}
+    assert summary['spans']['inner']['calls'] == 3
+    assert summary['counters'] == {'items': 6}
+
+
+def test_export_csv(tmp_path):
+    prof = nestedRun(profiling.profiler())
+    filename = str(tmp_path / 'profile.csv')
+    prof.export(filename)
+    with open(filename, newline='') as file:
+        rows = list(csv.reader(file))
+
+    assert rows[0] == ['kind', 'name', 'value', 'calls', 'mean_s']
+    assert rows[1][:2] == ['wall', 'run']
+    kinds = {(row[0], row[1]): row for row in rows[2:]}
+    assert kinds[('span', 'inner')][3] == '3'
+    assert kinds[('span', 'outer')][3] == '1'
+    assert kinds[('counter', 'items')][2] == '6'
+    assert ('peak_rss_mb', 'after inner') in kinds
+
+
+def test_null_profiler_is_a_no_op():
+    prof = profiling.nullProfiler()
+
+    assert not prof.enabled
+    assert nestedRun(prof) is prof
+    assert prof.span('a') is prof.span('b')
+    assert not hasattr(prof, 'spans')
+    # exceptions inside a span are not swallowed
+    with pytest.raises(ValueError):
+        with prof.span('failing'):
+            raise ValueError
+
+
+def test_profiled_run_matches_unprofiled_run():
+    results = []
+    for enabled in [False, True]:
+        diss = graph(2, 1, dfn(DATA).getGraph(), DATA)
+        diss.setResolution(num_cells=10)
+        diss.setProfiler(enabled)
+        G, grid = diss.graphDiss()
+        results.append((diss, G))
+
+    (plain, G_plain), (profiled, G) = results
+    assert isinstance(plain.prof, profiling.nullProfiler)
+    assert profiled.prof.summary()['spans']['transport']['calls'] == len(profiled.t)
+    for edge in G.edges:
+        np.testing.assert_array_equal(G.edges[edge]['alpha'], G_plain.edges[edge]['alpha'])
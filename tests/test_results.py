@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from results import resultStore
+
+
+@pytest.mark.parametrize('compress', [False, True])
+def test_write_read_round_trip(tmp_path, compress):
+    rng = np.random.default_rng(0)
+    nodes = ['a', 'b', 'c', 'd']
+    edges = [('a', 'b'), ('b', 'c'), ('c', 'd'), ('a', 'd'), ('b', 'd')]
+    x_list = [np.linspace(0, 1, n) for n in [3, 5, 2, 4, 6]]
+    t0, num_t = 2, 11
+
+    store = resultStore(str(tmp_path), 'w', compress, time_chunk=4, edge_chunk=2)
+    store.startEpoch(0, t0, nodes, edges, x_list)
+    written = {'alpha': [], 'Q': [], 'head': []}
+    for t_step in range(t0, t0 + num_t):
+        fields = {'alpha': [rng.random(len(x)) for x in x_list],
+                  'Q': rng.random(len(edges)),
+                  'head': rng.random(len(nodes))}
+        store.writeStep(0, t_step, fields)
+        for key, values in fields.items():
+            written[key].append(values)
+    store.close()
+
+    reader = resultStore(str(tmp_path))
+    assert reader.getEpochs() == [0]
+    assert reader.getEdges(0) == edges
+
+    t_steps, alpha = reader.read('alpha', 0, 4, 11, edges=[('c', 'd'), ('a', 'b')])
+    np.testing.assert_array_equal(t_steps, np.arange(4, 11))
+    for edge in [('c', 'd'), ('a', 'b')]:
+        i = edges.index(edge)
+        expected = np.array([written['alpha'][t - t0][i] for t in t_steps]).T
+        np.testing.assert_array_equal(alpha[edge], expected)
+        np.testing.assert_array_equal(reader.getGrid(0, edge), x_list[i])
+
+    t_steps, Q = reader.read('Q', 0)
+    np.testing.assert_array_equal(Q, np.array(written['Q']).T)
+    t_steps, head = reader.read('head', 0, t_stop=5)
+    np.testing.assert_array_equal(head, np.array(written['head'][:3]).T)
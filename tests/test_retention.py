@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from conftest import DATA
+from dgd import graph
+from processDFN import dfn
+
+
+def runGraph(num_years=3, **retention):
+    diss = graph(num_years, 1, dfn(DATA).getGraph(), DATA)
+    diss.setResolution(num_cells=10)
+    if retention:
+        diss.setRetention(**retention)
+    G, grid = diss.graphDiss()
+
+    return diss, G
+
+
+def finalState(diss, G):
+    t_end = len(diss.t)
+    state = {}
+    for edge in G.edges:
+        data = G.edges[edge]
+        key = tuple(sorted(edge))
+        state[key] = {'alpha': data['alpha'][:, diss.getCol('alpha', t_end)],
+                      'beta': data['beta'][:, diss.getCol('beta', t_end)],
+                      'c': data['c'][:, diss.getCol('c', t_end - 1)],
+                      'Q': data['Q'][-1]}
+
+    return state
+
+
+@pytest.fixture(scope='module')
+def fullRun():
+    return finalState(*runGraph())
+
+
+@pytest.mark.parametrize('retention', [{'c': 'current', 'f': 'current',
+                                        'alpha': 'current', 'beta': 'current'},
+                                       {'c': 2, 'f': 2, 'alpha': 2, 'beta': 2,
+                                        'adjacency': 'current'}])
+def test_current_retention_matches_full(fullRun, retention):
+    state = finalState(*runGraph(**retention))
+
+    assert set(state) == set(fullRun)
+    for key in fullRun:
+        for name in ['alpha', 'beta', 'c', 'Q']:
+            np.testing.assert_array_equal(state[key][name], fullRun[key][name])
+
+
+def test_snapshots_match_full_history():
+    full, G_full = runGraph()
+    every, G_every = runGraph(alpha=2, c=2)
+
+    for edge in G_full.edges:
+        key = tuple(sorted(edge))
+        times, alpha = every.history.get('alpha', 0, key)
+        np.testing.assert_array_equal(alpha, G_full.edges[edge]['alpha'][:, times])
+        times, c = every.history.get('c', 0, key)
+        np.testing.assert_array_equal(c, G_full.edges[edge]['c'][:, times])
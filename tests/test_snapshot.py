@@ -0,0 +1,21 @@
+import numpy as np
+
+from conftest import DATA
+from dgd import graph
+from processDFN import dfn
+
+
+def test_final_snapshot_shares_the_returned_graph_arrays():
+    diss = graph(3, 1, dfn(DATA).getGraph(), DATA)
+    diss.setResolution(num_cells=10)
+    G, grid = diss.graphDiss()
+    snap = diss.graph_list[-1]
+
+    arrays = dict(snap.fields, x=snap.x, Q=snap.Q)
+    rebuilt = snap.toGraph()
+    for edge in G.edges:
+        for key, values in arrays.items():
+            assert np.shares_memory(G.edges[edge][key], values)
+            np.testing.assert_array_equal(G.edges[edge][key], rebuilt.edges[edge][key])
+    for node in G.nodes:
+        assert np.shares_memory(G.nodes[node]['head'], snap.head)
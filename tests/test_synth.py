@@ -0,0 +1,72 @@
+import os
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from processDFN import dfn
+from synthDFN import synthDFN
+
+
+def generator(num_frac, seed=0, density=0.3, size=10.0):
+    # fixed fracture density, the domain grows with num_frac (as in benchmark.runCase)
+    side = (num_frac*size**2/density)**(1/3)
+
+    return synthDFN(num_frac, domain=(side, side, side), size=size, seed=seed)
+
+
+def test_fixed_seed_is_reproducible():
+    polygons, apertures, rows = generator(150, seed=4).generate()
+    polygons_2, apertures_2, rows_2 = generator(150, seed=4).generate()
+
+    assert len(polygons) == len(polygons_2)
+    for (vertices, normal), (vertices_2, normal_2) in zip(polygons, polygons_2):
+        np.testing.assert_array_equal(vertices, vertices_2)
+        np.testing.assert_array_equal(normal, normal_2)
+    np.testing.assert_array_equal(apertures, apertures_2)
+    assert [row[:2] + (row[3],) for row in rows] == [row[:2] + (row[3],) for row in rows_2]
+    np.testing.assert_array_equal([row[2] for row in rows], [row[2] for row in rows_2])
+
+    other = generator(150, seed=5).generate()[2]
+    assert [row[:2] for row in rows] != [row[:2] for row in other]
+
+
+def test_written_files_are_reproducible(tmp_path):
+    for name in ['a', 'b']:
+        generator(150, seed=4).write(str(tmp_path / name))
+
+    for filename in ['polygons.dat', 'aperture.dat', 'intersection_list.dat', 'params.txt']:
+        with open(tmp_path / 'a' / filename) as a, open(tmp_path / 'b' / filename) as b:
+            assert a.read() == b.read()
+
+
+def test_network_connects_source_and_target(tmp_path):
+    path = str(tmp_path / 'dfn') + os.sep
+    G = generator(200, seed=1).write(path)
+
+    assert nx.has_path(G, 's', 't')
+    # every kept fracture is on the cluster joining the walls
+    fracs = {frac for node in G.nodes if node not in ['s', 't']
+             for frac in G.nodes[node]['frac'] if not isinstance(frac, str)}
+    network = dfn(path)
+    assert fracs == set(range(1, network.getNumPolygons() + 1))
+    assert nx.has_path(network.getGraph(), 's', 't')
+
+
+def test_sparse_network_raises():
+    with pytest.raises(ValueError):
+        synthDFN(5, domain=(100, 100, 100), size=5.0, seed=0).generate()
+
+
+def test_counts_scale_with_size():
+    counts = []
+    for num_frac in [100, 200, 400]:
+        polygons, apertures, rows = generator(num_frac, seed=2).generate()
+        G = generator(num_frac, seed=2).buildGraph(rows)
+        counts.append((len(polygons), len(rows), G.number_of_edges()))
+
+    for (frac, rows, edges), (frac_2, rows_2, edges_2) in zip(counts[:-1], counts[1:]):
+        # doubling num_frac at fixed density about doubles the network
+        assert 1.5 < frac_2/frac < 2.5
+        assert 1.5 < rows_2/rows < 3
+        assert 1.5 < edges_2/edges < 4
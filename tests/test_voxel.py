@@ -0,0 +1,124 @@
+import itertools
+
+import numpy as np
+
+from conftest import DATA
+from dgd import graph
+from processDFN import dfn
+import voxel
+
+
+def bruteForce(start, end, x, alpha, beta, alpha_axis, voxel_size, bound=6):
+    # every lattice point around the edge tested against the prism chain
+    direction = (end - start)/np.linalg.norm(end - start)
+    e_a, e_b = voxel.edgeFrame(direction, alpha_axis)
+    keys = []
+    for key in itertools.product(range(-bound, bound + 1), repeat=3):
+        q = np.array(key)*voxel_size - start
+        t = q @ direction
+        if (0 <= t <= np.linalg.norm(end - start) and abs(q @ e_a) <= np.interp(t, x, alpha)
+                and abs(q @ e_b) <= np.interp(t, x, beta)):
+            keys.append(key)
+
+    return {tuple(key) for key in keys}
+
+
+def test_axis_aligned_box():
+    keys = voxel.prismKeys([-2.0, 0, 0], [2.0, 0, 0], [0, 4], [1.0, 1.0], [0.5, 0.5],
+                           [0, 1, 0], 0.5)
+    expected = {(i, j, k) for i in range(-4, 5) for j in range(-2, 3) for k in range(-1, 2)}
+
+    assert {tuple(key) for key in keys.tolist()} == expected
+
+
+def test_oblique_tapered_prism_matches_brute_force():
+    start, end = np.array([-1.3, -0.7, -1.1]), np.array([1.2, 0.9, 1.4])
+    x = np.linspace(0, np.linalg.norm(end - start), 7)
+    alpha = np.linspace(0.2, 0.9, 7)
+    beta = np.linspace(0.6, 0.1, 7)
+    keys = voxel.prismKeys(start, end, x, alpha, beta, np.array([0.0, 1, 0]), 0.25)
+
+    assert {tuple(key) for key in keys.tolist()} == bruteForce(start, end, x, alpha, beta,
+                                                                np.array([0.0, 1, 0]), 0.25, 12)
+
+
+def test_union_of_edges_has_no_duplicates():
+    prisms = [([0.0, 0, 0], [3.0, 0, 0], [0, 3], [0.6, 0.6], [0.6, 0.6], [0, 1, 0]),
+              ([0.0, 0, 0], [0.0, 3, 0], [0, 3], [0.6, 0.6], [0.6, 0.6], [1, 0, 0])]
+    points = voxel.voxelizeEdges(prisms, 0.5)
+
+    assert len(points) == len(np.unique(points, axis=0))
+    assert len(points) == 2*7*3*3 - 2*2*3
+
+
+def test_graph_point_cloud():
+    diss = graph(1, 1, dfn(DATA).getGraph(), DATA)
+    diss.setResolution(num_cells=10)
+    diss.graphDiss()
+    t_step = len(diss.t)
+    edge = list(diss.G.edges)[0]
+    start, end, x, alpha, beta, alpha_axis = diss.getEdgePrism(edge, t_step)
+    diss.voxel_size = 0.5*min(alpha.min(), beta.min())
+    pc = diss.edgeToVox(edge, t_step)
+
+    assert len(pc) > 0
+    assert np.allclose(pc/diss.voxel_size, np.round(pc/diss.voxel_size))
+    # every point within the half-diagonal of the widest cross-section from the edge axis
+    direction = (end - start)/np.linalg.norm(end - start)
+    q = pc - start
+    radial = q - np.outer(q @ direction, direction)
+    assert np.all(np.linalg.norm(radial, axis=1) <= np.hypot(alpha.max(), beta.max())*(1 + 1e-9))
+
+
+def test_packed_keys_round_trip():
+    keys = np.array([[0, 0, 0], [-5, 7, -(1 << 20)], [(1 << 20) - 1, -3, 12]])
+
+    assert np.array_equal(voxel.unpackKeys(voxel.packKeys(keys)), keys)
+
+
+def crossPrisms(width=0.6):
+    return {('a', 'b'): ([0.0, 0, 0], [3.0, 0, 0], [0, 3], [width, width], [0.6, 0.6], [0, 1, 0]),
+            ('a', 'c'): ([0.0, 0, 0], [0.0, 3, 0], [0, 3], [0.6, 0.6], [0.6, 0.6], [1, 0, 0])}
+
+
+def test_grid_counts_owners_of_overlapping_voxels():
+    grid = voxel.voxelGrid(0.5)
+
+    assert grid.update(crossPrisms()) == 2
+    assert np.array_equal(np.unique(grid.points(), axis=0),
+                          voxel.voxelizeEdges(crossPrisms().values(), 0.5))
+    overlaps = {tuple(key) for key in grid.overlaps().tolist()}
+    assert overlaps == {(i, j, k) for i in range(2) for j in range(2) for k in range(-1, 2)}
+
+
+def test_grid_updates_only_changed_edges():
+    grid = voxel.voxelGrid(0.5)
+    grid.update(crossPrisms())
+
+    # below the tolerance nothing is voxelized again
+    assert grid.update(crossPrisms(0.8)) == 0
+    assert grid.update(crossPrisms(1.2)) == 1
+    assert np.array_equal(grid.points(), voxel.voxelizeEdges(crossPrisms(1.2).values(), 0.5))
+
+    # edges missing from an update are removed with their voxels
+    prisms = crossPrisms(1.2)
+    del prisms[('a', 'c')]
+    assert grid.update(prisms) == 0
+    assert np.array_equal(grid.points(), voxel.voxelizeEdges(prisms.values(), 0.5))
+    assert len(grid.overlaps()) == 0
+
+
+def test_graph_point_cloud_is_incremental():
+    diss = graph(2, 1, dfn(DATA).getGraph(), DATA)
+    diss.setResolution(num_cells=10)
+    diss.graphDiss()
+    diss.setVoxelGrid(0.5, tol=0)
+    diss.setProfiler()
+    diss.parGetGridVox(1)
+    t_step = len(diss.t)
+    changed = sum(diss.voxels.isChanged(edge, diss.getEdgePrism(edge, t_step)) for edge in diss.G.edges)
+    diss.parGetGridVox(t_step)
+
+    assert diss.prof.counters['point cloud updated edges'] == len(diss.G.edges) + changed
+    expected = voxel.voxelizeEdges([diss.getEdgePrism(edge, t_step) for edge in diss.G.edges], 0.5)
+    assert np.array_equal(diss.voxels.points(), expected)
@@ -0,0 +1,45 @@
+import pytest
+
+from conftest import DATA
+from dgd import graph
+from processDFN import dfn
+from writer import asyncWriter
+
+
+def fail():
+    raise IOError('disk full')
+
+
+def test_writer_runs_calls_in_order():
+    calls = []
+    writer_thread = asyncWriter(max_queue=2)
+    for i in range(10):
+        writer_thread.submit(calls.append, i)
+    writer_thread.close()
+
+    assert calls == list(range(10))
+    assert not writer_thread.thread.is_alive()
+
+
+def test_writer_error_is_raised_on_close():
+    writer_thread = asyncWriter()
+    writer_thread.submit(fail)
+
+    with pytest.raises(RuntimeError) as error:
+        writer_thread.close()
+    assert isinstance(error.value.__cause__, IOError)
+    assert not writer_thread.thread.is_alive()
+
+
+def test_close_results_stops_a_failed_writer(tmp_path):
+    diss = graph(1, 1, dfn(DATA).getGraph(), DATA)
+    diss.setResultStore(str(tmp_path))
+    diss.submitWrite(fail)
+    writer_thread = diss.writer
+    writer_thread.queue.join()
+
+    with pytest.raises(RuntimeError) as error:
+        diss.closeResults()
+    assert isinstance(error.value.__cause__, IOError)
+    assert diss.writer is None
+    assert not writer_thread.thread.is_alive()